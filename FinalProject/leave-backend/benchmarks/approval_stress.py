@@ -0,0 +1,101 @@
+"""Hammer concurrent approvals for one employee and check the balance never goes negative.
+
+Run from leave-backend/:  python benchmarks/approval_stress.py [leaves] [thread counts...]
+Every leave is approved by two threads at once, so double-spends would show up as an
+approved-days total that does not match the balance actually deducted.
+Uses a throwaway SQLite file, never the service's instance/lms.db.
+
+This is a correctness check, not a scaling benchmark. Every approval is a write transaction and
+SQLite admits one writer at a time, so approvals serialize on the database write lock. req/s
+stays flat, or dips slightly from lock hand-offs, as threads are added.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "stress.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_FILE}"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "employee_service"))
+
+from app import app, db  # noqa: E402
+from models import User, LeaveRequest, LeaveBalance  # noqa: E402
+from migrations import bootstrap  # noqa: E402
+
+
+
+def reset(n_leaves: int, start_balance: int) -> int:
+    with app.app_context():
+        LeaveRequest.query.delete()
+        LeaveBalance.query.delete()
+        emp = User.query.filter_by(username="stress").first()
+        if not emp:
+            emp = User(username="stress", password="x", role="employee", approved=True)
+            db.session.add(emp)
+            db.session.flush()
+        db.session.add(LeaveBalance(employee_id=emp.id, sick_casual=start_balance, medical=0, privileged=0))
+        # Monday and Tuesday of consecutive weeks, two working days each (the throwaway DB has no
+        # holidays). Leave is charged in working days, so weekend dates would skew the check.
+        monday = date(2024, 1, 1)
+        db.session.execute(LeaveRequest.__table__.insert(), [
+            {"employee_id": emp.id, "reason": "stress", "leave_type": "sick", "status": "Pending",
+             "start_date": monday + timedelta(weeks=i), "end_date": monday + timedelta(weeks=i, days=1)}
+            for i in range(n_leaves)
+        ])
+        db.session.commit()
+        return emp.id
+
+
+def run(threads: int, n_leaves: int):
+    start_balance = n_leaves * 3 // 2  # enough for three quarters of the 2-day leaves
+    emp_id = reset(n_leaves, start_balance)
+    with app.app_context():
+        ids = [l.id for l in LeaveRequest.query.all()]
+    work = [i for i in ids for _ in range(2)]  # each leave approved twice, back to back
+    lock = threading.Lock()
+    statuses = Counter()
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                if not work:
+                    return
+                leave_id = work.pop()
+            resp = client.put(f"/update_leave/{leave_id}", json={"status": "Approved"})
+            with lock:
+                statuses[resp.status_code] += 1
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    with app.app_context():
+        balance = LeaveBalance.query.filter_by(employee_id=emp_id).first().sick_casual
+        approved = LeaveRequest.query.filter_by(status="Approved").count()
+    consistent = balance >= 0 and start_balance - balance == approved * 2 and statuses[200] == approved
+    print(f"{threads:>7} {2 * n_leaves / elapsed:>9.0f} {approved:>8} {balance:>7} "
+          f"{dict(sorted(statuses.items()))!s:<32} {'OK' if consistent else 'INCONSISTENT'}")
+    return consistent
+
+
+def main():
+    with app.app_context():
+        bootstrap()
+    n_leaves = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    thread_counts = [int(a) for a in sys.argv[2:]] or [1, 2, 4, 8]
+    print(f"{'threads':>7} {'req/s':>9} {'approved':>8} {'balance':>7} {'status codes':<32} check")
+    ok = all([run(t, n_leaves) for t in thread_counts])
+    print("req/s is for reference only: approvals serialize on the SQLite write lock, so it does not scale with threads.")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""How long an annual balance reset blocks live writes: one transaction vs the chunked job.
+
+Run from leave-backend/:  python benchmarks/balance_job.py [employees] [chunk sizes...]
+A writer thread keeps updating one balance (as an approval would) while the reset runs and
+records how long each of its commits waited. Chunk size = employees is the single-transaction
+baseline. Uses a throwaway SQLite file.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'balances.db')}"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "employee_service"))
+
+from app import app, db, DEFAULT_BALANCE  # noqa: E402
+from models import User, LeaveBalance  # noqa: E402
+from migrations import bootstrap  # noqa: E402
+from balance_jobs import job_params, start_job, run_job  # noqa: E402
+
+
+def seed(employees: int):
+    db.session.execute(User.__table__.insert(), [
+        {"username": f"bal{i}", "password": "x", "role": "employee", "approved": True} for i in range(employees)])
+    db.session.execute(LeaveBalance.__table__.insert(), [
+        {"employee_id": u.id, "sick_casual": 4, "medical": 12, "privileged": u.id % 30}
+        for u in User.query.filter_by(role="employee").all()])
+    db.session.commit()
+
+
+def live_writer(employee_id: int, stop: threading.Event, waits: list):
+    table = LeaveBalance.__table__
+    with app.app_context():
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            db.session.execute(table.update().where(table.c.employee_id == employee_id)
+                               .values(medical=table.c.medical + 0))
+            db.session.commit()
+            waits.append((time.perf_counter() - t0) * 1000)
+            time.sleep(0.005)
+
+
+def measure(name: str, chunk_size: int, employee_id: int):
+    stop, waits = threading.Event(), []
+    writer = threading.Thread(target=live_writer, args=(employee_id, stop, waits))
+    writer.start()
+    time.sleep(0.2)
+    with app.app_context():
+        start_job(name, job_params("reset", DEFAULT_BALANCE, {"privileged": 10}, DEFAULT_BALANCE))
+        t0 = time.perf_counter()
+        job = run_job(name, chunk_size)
+        elapsed = time.perf_counter() - t0
+    stop.set()
+    writer.join()
+    return job.processed, elapsed, statistics.median(waits), max(waits)
+
+
+def main():
+    employees = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    chunks = [int(a) for a in sys.argv[2:]] or [employees, 2000, 500]
+    with app.app_context():
+        bootstrap()
+        seed(employees)
+        employee_id = LeaveBalance.query.order_by(LeaveBalance.employee_id.desc()).first().employee_id
+    print(f"{employees} balances; live writer on employee {employee_id}")
+    for i, chunk in enumerate(chunks):
+        processed, elapsed, p50, worst = measure(f"bench-{i}", chunk, employee_id)
+        label = "single transaction" if chunk >= employees else f"chunks of {chunk}"
+        print(f"  {label:20} job {elapsed:6.2f}s  ({processed} rows)   "
+              f"live write p50 {p50:6.1f} ms  max {worst:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
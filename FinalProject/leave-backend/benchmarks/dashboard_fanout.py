@@ -0,0 +1,84 @@
+"""Compare loading the manager dashboard as separate gateway calls vs one /dashboard/manager.
+
+Run from leave-backend/:  python benchmarks/dashboard_fanout.py [upstream delay ms] [requests]
+A local stub stands in for employee_service and answers every endpoint after a fixed delay
+(standing in for query time), so no database or container is needed. The last case makes
+one section hang past DASHBOARD_TIMEOUT to show it is reported instead of failing the page.
+"""
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Request, Response
+
+UPSTREAM_PORT, GATEWAY_PORT = 18121, 18120
+os.environ["EMPLOYEE_URL"] = f"http://127.0.0.1:{UPSTREAM_PORT}"
+os.environ["MANAGER_URL"] = f"http://127.0.0.1:{UPSTREAM_PORT}"
+os.environ.setdefault("DASHBOARD_TIMEOUT", "1")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gateway"))
+
+from app import app as gateway_app, MANAGER_SECTIONS  # noqa: E402
+
+DELAY = {"default": 0.02}
+SLOW_PATH = {"path": None}
+BODY = json.dumps([{"id": i, "username": f"emp{i}"} for i in range(50)]).encode()
+
+
+@Request.application
+def stub(req):
+    time.sleep(5 if req.path == SLOW_PATH["path"] else DELAY["default"])
+    return Response(BODY, mimetype="application/json")
+
+
+def serve(app, port):
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timed(fn, n):
+    out = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(out)
+
+
+def main():
+    DELAY["default"] = (float(sys.argv[1]) if len(sys.argv) > 1 else 20) / 1000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    serve(stub, UPSTREAM_PORT)
+    serve(gateway_app, GATEWAY_PORT)
+    client = requests.Session()
+    base = f"http://127.0.0.1:{GATEWAY_PORT}"
+    paths = [path for _, path in MANAGER_SECTIONS.values()]
+
+    def separate():
+        for path in paths:
+            client.get(base + path).content
+
+    def composite():
+        client.get(base + "/dashboard/manager").content
+
+    print(f"{len(paths)} sections, {DELAY['default'] * 1000:.0f} ms upstream delay each, median of {n}")
+    print(f"  separate calls:     {timed(separate, n):8.1f} ms")
+    print(f"  /dashboard/manager: {timed(composite, n):8.1f} ms")
+
+    SLOW_PATH["path"] = paths[-1]
+    t0 = time.perf_counter()
+    resp = client.get(base + "/dashboard/manager")
+    body = resp.json()
+    print(f"  one section hung:   {(time.perf_counter() - t0) * 1000:8.1f} ms -> HTTP {resp.status_code}, "
+          f"errors={body['errors']}")
+
+
+if __name__ == "__main__":
+    main()
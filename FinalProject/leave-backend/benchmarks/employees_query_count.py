@@ -0,0 +1,70 @@
+"""Show that GET /employees issues a constant number of SQL queries as headcount grows.
+
+Run from leave-backend/:  python benchmarks/employees_query_count.py
+Leaves are bulk-inserted, so the leave_stat counters /employees reads are rebuilt after each
+seeding step, and every returned count is checked against what was seeded.
+Uses a throwaway SQLite file, never the service's instance/lms.db.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+DB_FILE = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_FILE}"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "employee_service"))
+
+from sqlalchemy import event  # noqa: E402
+from app import app, db  # noqa: E402
+from models import User, LeaveRequest  # noqa: E402
+from migrations import bootstrap  # noqa: E402
+from stats import rebuild_leave_stats  # noqa: E402
+
+HEADCOUNTS = (10, 100, 1000, 5000)
+LEAVES_PER_EMPLOYEE = 3
+PENDING_PER_EMPLOYEE = LEAVES_PER_EMPLOYEE // 2  # odd-numbered leaves are Pending
+
+
+def seed_up_to(target: int, current: int):
+    users = [
+        {"username": f"bench{i}", "password": "x", "role": "employee", "approved": i % 4 != 0}
+        for i in range(current, target)
+    ]
+    db.session.execute(User.__table__.insert(), users)
+    ids = [u.id for u in User.query.filter(User.username.in_([u["username"] for u in users])).all()]
+    leaves = [
+        {"employee_id": emp_id, "reason": "bench", "leave_type": "sick",
+         "start_date": date(2024, 1, 1), "end_date": date(2024, 1, 2),
+         "status": "Pending" if n % 2 else "Approved", "remarks": ""}
+        for emp_id in ids for n in range(LEAVES_PER_EMPLOYEE)
+    ]
+    db.session.execute(LeaveRequest.__table__.insert(), leaves)
+    db.session.commit()
+    rebuild_leave_stats()
+
+
+def main():
+    with app.app_context():
+        bootstrap()
+    client = app.test_client()
+    queries = []
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", lambda *a, **k: queries.append(1))
+        current = 0
+        print(f"{'employees':>10} {'queries':>8} {'ms':>9}")
+        for n in HEADCOUNTS:
+            seed_up_to(n, current)
+            current = n
+            queries.clear()
+            t0 = time.perf_counter()
+            resp = client.get("/employees")
+            elapsed = (time.perf_counter() - t0) * 1000
+            assert resp.status_code == 200 and len(resp.json) == n
+            counts = {(e["total_leaves"], e["pending_leaves"]) for e in resp.json}
+            assert counts == {(LEAVES_PER_EMPLOYEE, PENDING_PER_EMPLOYEE)}, counts
+            print(f"{n:>10} {len(queries):>8} {elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
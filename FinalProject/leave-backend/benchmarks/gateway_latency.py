@@ -0,0 +1,75 @@
+"""Measure the latency the gateway adds on top of a direct upstream call.
+
+Run from leave-backend/:  python benchmarks/gateway_latency.py [requests-per-case]
+A local stub stands in for employee_service, so no database or container is needed.
+"""
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Request, Response
+
+UPSTREAM_PORT, GATEWAY_PORT = 18101, 18100
+os.environ["EMPLOYEE_URL"] = f"http://127.0.0.1:{UPSTREAM_PORT}"
+os.environ["MANAGER_URL"] = f"http://127.0.0.1:{UPSTREAM_PORT}"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gateway"))
+
+from app import app as gateway_app  # noqa: E402
+
+SMALL = json.dumps({"status": "employee-ok"}).encode()
+LARGE = json.dumps([
+    {"id": i, "employee_id": i % 500, "employee_name": f"emp{i % 500}", "reason": "bench",
+     "leave_type": "sick", "status": "Pending", "remarks": "", "start_date": "2024-01-01",
+     "end_date": "2024-01-02"} for i in range(20000)
+]).encode()
+
+
+@Request.application
+def stub(req):
+    return Response(LARGE if req.path == "/all_leaves" else SMALL, mimetype="application/json")
+
+
+def serve(app, port):
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timings(session, url, n):
+    out = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        r = session.get(url)
+        r.content
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    serve(stub, UPSTREAM_PORT)
+    serve(gateway_app, GATEWAY_PORT)
+    client = requests.Session()
+    print(f"{'endpoint':<12} {'direct p50':>10} {'gateway p50':>11} {'added p50':>9} {'added p95':>9}  (ms, n={n})")
+    for path in ("ping", "all_leaves"):
+        direct = timings(client, f"http://127.0.0.1:{UPSTREAM_PORT}/{path}", n)
+        via = timings(client, f"http://127.0.0.1:{GATEWAY_PORT}/{path}", n)
+        d50 = statistics.median(direct)
+        print(f"{path:<12} {d50:>10.2f} {statistics.median(via):>11.2f} "
+              f"{statistics.median(via) - d50:>9.2f} {pct(via, 0.95) - pct(direct, 0.95):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
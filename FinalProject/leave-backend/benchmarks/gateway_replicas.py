@@ -0,0 +1,160 @@
+"""Gateway upstream pools against local stub replicas: balancing, ejection, circuit breaking, hedging.
+
+Run from leave-backend/:  python benchmarks/gateway_replicas.py [requests-per-phase]
+Three stub employee_service replicas and one stub manager_service run in-process, so no database
+or container is needed. Each phase prints what it checks; the process exits 1 if a check fails.
+"""
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Request, Response
+
+PORTS = [18201, 18202, 18203]
+MANAGER_PORT, GATEWAY_PORT = 18204, 18200
+os.environ.update({
+    "EMPLOYEE_URL": ",".join(f"http://127.0.0.1:{p}" for p in PORTS),
+    "MANAGER_URL": f"http://127.0.0.1:{MANAGER_PORT}",
+    "UPSTREAM_HEALTH_INTERVAL": "0.2",
+    "UPSTREAM_READ_TIMEOUT": "0.5",
+    "UPSTREAM_BREAKER_COOLDOWN": "1",
+})
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "gateway"))
+
+import upstreams  # noqa: E402
+from app import app as gateway_app  # noqa: E402
+
+# port -> behaviour: fixed delay, and a fraction of requests that take slow_ms instead.
+behaviour = {p: {"delay_ms": 0, "slow_p": 0.0, "slow_ms": 0} for p in PORTS + [MANAGER_PORT]}
+failures = []
+# With 1 in 20 requests slow, p99 only separates hedged from unhedged once several samples sit
+# above it; at n=100 it is the single worst request.
+HEDGE_MIN_SAMPLES = 400
+
+
+def stub(port):
+    counter = Counter()
+
+    @Request.application
+    def handle(req):
+        b = behaviour[port]
+        counter[req.path] += 1
+        if req.path != "/health":
+            slow = b["slow_p"] and counter[req.path] % int(1 / b["slow_p"]) == 0
+            time.sleep((b["slow_ms"] if slow else b["delay_ms"]) / 1000)
+        return Response(f'{{"port": {port}}}', mimetype="application/json")
+    return handle
+
+
+class StubServer:
+    def __init__(self, port):
+        self.port = port
+        self.start()
+
+    def start(self):
+        self.server = make_server("127.0.0.1", self.port, stub(self.port), threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def check(ok: bool, message: str):
+    print(f"  [{'ok' if ok else 'FAIL'}] {message}")
+    if not ok:
+        failures.append(message)
+
+
+def hammer(path: str, n: int, workers: int = 8):
+    # -> [(status, port or None, ms)]
+    session = requests.Session()
+
+    def one(_):
+        t0 = time.perf_counter()
+        r = session.get(f"http://127.0.0.1:{GATEWAY_PORT}{path}")
+        ms = (time.perf_counter() - t0) * 1000
+        return r.status_code, r.json().get("port") if r.status_code == 200 else None, ms
+    with ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(one, range(n)))
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def replica_state():
+    return {r["url"].rsplit(":", 1)[1]: r for r in requests.get(
+        f"http://127.0.0.1:{GATEWAY_PORT}/gateway/upstreams").json()["employee_service"]["replicas"]}
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    stubs = {p: StubServer(p) for p in PORTS + [MANAGER_PORT]}
+    gateway = make_server("127.0.0.1", GATEWAY_PORT, gateway_app, threaded=True)
+    threading.Thread(target=gateway.serve_forever, daemon=True).start()
+
+    print("least outstanding requests: one replica 50 ms slower than the others")
+    for p in PORTS:
+        behaviour[p]["delay_ms"] = 2
+    behaviour[PORTS[0]]["delay_ms"] = 50
+    share = Counter(port for _, port, _ in hammer("/ping", n))
+    print(f"  requests per replica: {dict(sorted(share.items()))}")
+    check(share[PORTS[0]] < n / 6, "the slow replica gets under half its equal share")
+    behaviour[PORTS[0]]["delay_ms"] = 2
+
+    print("health checks: a replica goes down, then comes back")
+    stubs[PORTS[1]].stop()
+    results = hammer("/ping", n // 2)
+    check(all(status == 200 for status, _, _ in results), "GETs keep succeeding (retried on another replica)")
+    time.sleep(0.6)
+    check(not replica_state()[str(PORTS[1])]["healthy"], "the dead replica is ejected")
+    stubs[PORTS[1]].start()
+    time.sleep(0.6)
+    check(replica_state()[str(PORTS[1])]["healthy"], "it is readmitted once /health passes again")
+    share = Counter(port for _, port, _ in hammer("/ping", n // 2))
+    check(share[PORTS[1]] > 0, f"and takes traffic again ({share[PORTS[1]]} of {n // 2})")
+
+    print("circuit breaker: manager_service (one replica) stops answering within the read timeout")
+    behaviour[MANAGER_PORT]["delay_ms"] = 2000
+    timings = [ms for _, _, ms in hammer("/manager/leave_requests", 20, workers=1)]
+    print(f"  first request {timings[0]:.0f} ms, last request {timings[-1]:.1f} ms")
+    check(timings[-1] < 50, "once open, the breaker fails requests fast instead of waiting for the timeout")
+    behaviour[MANAGER_PORT]["delay_ms"] = 0
+    time.sleep(1.1)
+    status, _, _ = hammer("/manager/leave_requests", 1, workers=1)[0]
+    check(status == 200, "after the cooldown a trial request closes it again")
+
+    print("hedging: 1 in 20 requests takes 300 ms on every replica")
+    for p in PORTS:
+        behaviour[p].update(delay_ms=2, slow_p=0.05, slow_ms=300)
+    runs = {}
+    for hedge_ms in (0, 50):
+        upstreams.HEDGE_MS = hedge_ms
+        ms = runs[hedge_ms] = [m for _, _, m in hammer("/ping", n)]
+        print(f"  UPSTREAM_HEDGE_MS={hedge_ms:<3} p50 {statistics.median(ms):6.1f} ms  "
+              f"p99 {pct(ms, 0.99):6.1f} ms  max {max(ms):6.1f} ms")
+    (p50, p99), (hedged_p50, hedged_p99) = ((statistics.median(ms), pct(ms, 0.99)) for ms in runs.values())
+    # Every hedged GET runs on the hedge pool while the request thread waits on its future, so
+    # even fast requests pay a thread hand-off; the slow tail is what it buys back.
+    print(f"  p99 {p99:.1f} -> {hedged_p99:.1f} ms, at a p50 cost of {hedged_p50 - p50:+.1f} ms "
+          f"(thread hand-off to the hedge pool on every GET)")
+    if n >= HEDGE_MIN_SAMPLES:
+        check(hedged_p99 < p99 / 2, "hedging at least halves p99 against the same slow replicas")
+    else:
+        print(f"  [skip] p99 comparison needs at least {HEDGE_MIN_SAMPLES} requests per phase")
+    gateway.shutdown()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
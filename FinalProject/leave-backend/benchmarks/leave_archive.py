@@ -0,0 +1,96 @@
+"""Hot-path latency as decided history grows 100x, with and without archiving it.
+
+Run from leave-backend/:  python benchmarks/leave_archive.py [history sizes...]
+Every size gets the same live set (recent leaves, a quarter of them Pending) plus N decided
+leaves from earlier years, in its own throwaway SQLite file. The hot endpoints are timed over
+the full table, then again after `archive_leaves` has moved the history out.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "employee_service"))
+
+from app import create_app, db  # noqa: E402
+from config import Config  # noqa: E402
+from models import User, LeaveRequest  # noqa: E402
+from migrations import bootstrap  # noqa: E402
+from stats import rebuild_leave_stats  # noqa: E402
+from archive import archive_leaves  # noqa: E402
+
+RUNS = 7
+EMPLOYEES = 500
+LIVE_LEAVES = 2000
+CUTOFF = date(2025, 1, 1)
+
+
+def seed(history: int) -> int:
+    rng = random.Random(11)
+    db.session.execute(User.__table__.insert(), [
+        {"username": f"arc{i}", "password": "x", "role": "employee", "approved": True} for i in range(EMPLOYEES)])
+    ids = [u.id for u in User.query.filter_by(role="employee").all()]
+
+    def leave(day, status):
+        return {"employee_id": rng.choice(ids), "reason": "r", "leave_type": "sick", "status": status,
+                "remarks": "", "start_date": day, "end_date": day}
+    # History first so it holds the low ids, as it would in a real table.
+    rows = [leave(date(2015, 1, 1) + timedelta(days=rng.randrange(3600)), rng.choice(["Approved", "Rejected"]))
+            for _ in range(history)]
+    rows += [leave(CUTOFF + timedelta(days=rng.randrange(600)), "Pending" if rng.random() < 0.25 else "Approved")
+             for _ in range(LIVE_LEAVES)]
+    for i in range(0, len(rows), 5000):
+        db.session.execute(LeaveRequest.__table__.insert(), rows[i:i + 5000])
+    db.session.commit()
+    rebuild_leave_stats()
+    return ids[0]
+
+
+def timed(client, path: str) -> float:
+    samples = []
+    for _ in range(RUNS):
+        t0 = time.perf_counter()
+        client.get(path)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [2000, 20000, 200000]
+    results = {}
+    for history in sizes:
+        class SizedConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'archive.db')}"
+        app = create_app(SizedConfig)
+        with app.app_context():
+            bootstrap()
+            employee_id = seed(history)
+        paths = {
+            "my_leaves": f"/my_leaves/{employee_id}",
+            "all_leaves?status=Pending&limit=50": "/all_leaves?status=Pending&limit=50",
+            "calendar (one month)": "/calendar?from=2025-06-01&to=2025-06-30",
+            "employees": "/employees",
+            "leave_statistics": "/leave_statistics",
+        }
+        client = app.test_client()
+        before = {name: timed(client, path) for name, path in paths.items()}
+        with app.app_context():
+            t0 = time.perf_counter()
+            moved = archive_leaves(CUTOFF, pause=0)
+            elapsed = time.perf_counter() - t0
+        after = {name: timed(client, path) for name, path in paths.items()}
+        results[history] = (before, after, moved, elapsed)
+
+    print(f"{EMPLOYEES} employees, {LIVE_LEAVES} live leaves; median ms over {RUNS} runs (unarchived -> archived)")
+    print(f"  {'history':>8}  " + "  ".join(f"{name:>36}" for name in paths))
+    for history, (before, after, moved, elapsed) in results.items():
+        cells = "  ".join(f"{before[n]:16.1f} -> {after[n]:6.1f} ms".rjust(36) for n in paths)
+        print(f"  {history:>8}  {cells}")
+        print(f"  {'':>8}  archived {moved} leaves in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""Reproducible load tests for the whole stack: employee_service, manager_service and the gateway.
+
+Run from leave-backend/:
+    python -m benchmarks.loadsuite seed --employees 500 --leaves 10000 --data-dir /tmp/lms-bench
+    python -m benchmarks.loadsuite run [--workload NAME ...] [--target direct|gateway ...] [--duration 20]
+    python -m benchmarks.loadsuite compare [OLD.json NEW.json]
+
+'seed' builds a template pair of SQLite files (employee + replicated manager DB) from a fixed
+RNG seed. Every (workload, target) run starts gunicorn for each service on a fresh copy of
+that template, so runs never see each other's writes. Results go to benchmarks/results/ as
+JSON tagged with the git commit; 'compare' diffs two of them and exits 1 on a regression.
+Nothing outside this machine is used.
+"""
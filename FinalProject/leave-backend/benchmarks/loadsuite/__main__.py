@@ -0,0 +1,101 @@
+import argparse
+import os
+import sys
+import tempfile
+
+from . import __doc__ as USAGE
+from .report import compare, latest_results, metadata, print_run, save_results, summarise
+from .runner import run_workload
+from .seed import copy_template, load_manifest, seed
+from .stack import Stack
+from .workloads import WORKLOADS
+
+TARGETS = ("direct", "gateway")
+
+
+def add_dataset_args(parser):
+    parser.add_argument("--employees", type=int, default=500)
+    parser.add_argument("--leaves", type=int, default=10_000, help="total seeded leave requests")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed for data and workloads")
+    parser.add_argument("--data-dir", help="template DB directory; reused by 'run' if already seeded")
+
+
+def dataset(args) -> tuple:
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="lms-bench-")
+    manifest = load_manifest(data_dir)
+    wanted = {"employees": args.employees, "leaves": args.leaves, "seed": args.seed}
+    if not manifest or any(manifest["params"][k] != v for k, v in wanted.items()):
+        print(f"seeding {args.employees} employees / {args.leaves} leaves into {data_dir} ...", flush=True)
+        manifest = seed(data_dir, args.employees, args.leaves, args.seed)
+    return data_dir, manifest
+
+
+def cmd_seed(args):
+    data_dir, manifest = dataset(args)
+    print(f"{data_dir}: {len(manifest['employees'])} approved + {manifest['pending_employees']} pending employees, "
+          f"leaves {manifest['leaves']}, {manifest['outbox_events']} outbox events")
+
+
+def cmd_run(args):
+    data_dir, manifest = dataset(args)
+    if args.work_dir:
+        os.makedirs(args.work_dir, exist_ok=True)
+    runs = []
+    for workload in args.workload or list(WORKLOADS):
+        for target in args.target or TARGETS:
+            run_dir = tempfile.mkdtemp(prefix=f"{workload}-{target}-", dir=args.work_dir)
+            employee_db, manager_db = copy_template(data_dir, run_dir)
+            with Stack(employee_db, manager_db, with_gateway=target == "gateway", log_dir=run_dir) as stack:
+                result = run_workload(workload, stack.urls, target, manifest, args.users, args.duration,
+                                      args.warmup, args.seed)
+            run = {"workload": workload, "target": target, "users": args.users, "duration": args.duration,
+                   "users_exhausted": result["users_exhausted"], **summarise(result),
+                   "server_errors": stack.log_errors()}
+            print_run(run)
+            runs.append(run)
+    params = {k: getattr(args, k) for k in ("users", "duration", "warmup", "seed")}
+    path = save_results(metadata(params, manifest), runs, args.output)
+    print(f"\nresults: {path}")
+    return 1 if any(r["total"]["errors"] for r in runs) else 0
+
+
+def cmd_compare(args):
+    paths = [args.old, args.new] if args.new else latest_results(2)
+    if len(paths) < 2 or not all(paths):
+        sys.exit("need two result files (or two runs in benchmarks/results/)")
+    return compare(*paths, threshold=args.threshold, min_ms=args.min_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadsuite", description=USAGE,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("seed", help="build the template databases")
+    add_dataset_args(p)
+    p.set_defaults(func=cmd_seed)
+
+    p = sub.add_parser("run", help="run workloads and save a JSON result file")
+    add_dataset_args(p)
+    p.add_argument("--workload", action="append", choices=list(WORKLOADS), help="repeatable; default all")
+    p.add_argument("--target", action="append", choices=TARGETS, help="repeatable; default both")
+    p.add_argument("--users", type=int, default=8, help="concurrent virtual users (closed loop)")
+    p.add_argument("--duration", type=float, default=20, help="measured seconds per workload and target")
+    p.add_argument("--warmup", type=float, default=2, help="unmeasured seconds before each measurement")
+    p.add_argument("--work-dir", help="where per-run DB copies and service logs go (default: a temp dir)")
+    p.add_argument("--output", help="result file (default: benchmarks/results/<time>-<commit>.json)")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("compare", help="diff two result files; exits 1 on a regression")
+    p.add_argument("old", nargs="?")
+    p.add_argument("new", nargs="?")
+    p.add_argument("--threshold", type=float, default=10, help="percent change that counts as a regression")
+    p.add_argument("--min-ms", type=float, default=2, help="ignore p95 moves smaller than this")
+    p.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args) or 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from .stack import HERE, PASSTHROUGH_ENV, ROOT
+
+RESULTS_DIR = os.path.join(HERE, "..", "results")
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    # Nearest-rank: the smallest value with at least p% of samples at or below it.
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _stats(samples: list, window: float) -> dict:
+    latencies = sorted(s[2] * 1000 for s in samples)
+    statuses = defaultdict(int)
+    for s in samples:
+        statuses[str(s[3])] += 1
+    return {
+        "requests": len(samples),
+        "rps": round(len(samples) / window, 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        # 0 is a connection error or timeout; 4xx are expected business errors and reported apart.
+        "errors": sum(1 for s in samples if s[3] == 0 or s[3] >= 500),
+        "client_errors": sum(1 for s in samples if 400 <= s[3] < 500),
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+def summarise(result: dict) -> dict:
+    by_label = defaultdict(list)
+    for s in result["samples"]:
+        by_label[s[0]].append(s)
+    return {
+        "endpoints": {label: _stats(rows, result["window"]) for label, rows in sorted(by_label.items())},
+        "total": _stats(result["samples"], result["window"]),
+    }
+
+
+def print_run(run: dict):
+    print(f"\n== {run['workload']} via {run['target']} ({run['users']} users, {run['duration']:.0f}s"
+          + (f", {run['users_exhausted']} ran out of work" if run["users_exhausted"] else "") + ")")
+    print(f"  {'endpoint':<48} {'reqs':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5} {'4xx':>5}")
+    rows = list(run["endpoints"].items()) + [("TOTAL", run["total"])]
+    for label, s in rows:
+        print(f"  {label:<48} {s['requests']:>7} {s['rps']:>8.1f} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} "
+              f"{s['p99_ms']:>8.1f} {s['errors']:>5} {s['client_errors']:>5}")
+    locked = {name: e for name, e in run["server_errors"].items() if any(e.values())}
+    if locked:
+        print(f"  server logs: {locked}")
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def metadata(params: dict, manifest: dict) -> dict:
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(_git("status", "--porcelain", "--", ".")),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "env": {k: os.environ[k] for k in PASSTHROUGH_ENV if k in os.environ},
+        "params": params,
+        "dataset": {**manifest["params"], "approved_employees": len(manifest["employees"]),
+                    "leaves_by_status": manifest["leaves"]},
+    }
+
+
+def save_results(meta: dict, runs: list, path=None) -> str:
+    if not path:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"{stamp}-{meta['commit']}{'-dirty' if meta['dirty'] else ''}.json")
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "runs": runs}, f, indent=2)
+    return os.path.normpath(path)
+
+
+def latest_results(n: int = 2) -> list:
+    return sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")), key=os.path.getmtime)[-n:]
+
+
+def compare(old_path: str, new_path: str, threshold: float, min_ms: float) -> int:
+    # A regression is p95 latency up, or throughput down, by more than threshold percent;
+    # latency moves smaller than min_ms are ignored as noise on fast endpoints.
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"old: {old['meta']['commit']} ({old['meta']['created_at']})  {old_path}")
+    print(f"new: {new['meta']['commit']} ({new['meta']['created_at']})  {new_path}")
+    if old["meta"]["dataset"] != new["meta"]["dataset"]:
+        print("warning: the runs used different datasets")
+
+    old_runs = {(r["workload"], r["target"]): r for r in old["runs"]}
+    regressions = 0
+    for run in new["runs"]:
+        base = old_runs.get((run["workload"], run["target"]))
+        if not base:
+            continue
+        print(f"\n== {run['workload']} via {run['target']}")
+        print(f"  {'endpoint':<48} {'req/s old':>10} {'new':>8} {'p95 old':>9} {'new':>8} {'change':>8}")
+        rows = list(run["endpoints"].items()) + [("TOTAL", run["total"])]
+        for label, s in rows:
+            b = base["total"] if label == "TOTAL" else base["endpoints"].get(label)
+            if not b:
+                continue
+            p95_change = (s["p95_ms"] - b["p95_ms"]) / b["p95_ms"] * 100 if b["p95_ms"] else 0.0
+            rps_change = (s["rps"] - b["rps"]) / b["rps"] * 100 if b["rps"] else 0.0
+            slower = p95_change > threshold and s["p95_ms"] - b["p95_ms"] > min_ms
+            flag = "  REGRESSION" if slower or rps_change < -threshold else ""
+            regressions += bool(flag)
+            print(f"  {label:<48} {b['rps']:>10.1f} {s['rps']:>8.1f} {b['p95_ms']:>9.1f} {s['p95_ms']:>8.1f} "
+                  f"{p95_change:>+7.0f}%{flag}")
+    print(f"\n{regressions} regression(s) over {threshold:.0f}%")
+    return 1 if regressions else 0
@@ -0,0 +1,77 @@
+import random
+import threading
+import time
+
+import requests
+
+from .workloads import WORKLOADS, Exhausted, VirtualUser
+
+REQUEST_TIMEOUT = 30
+
+
+class Client:
+    """Issues one virtual user's requests and records (label, start, seconds, status) for each.
+
+    target "direct" sends every call to the service that owns it; "gateway" sends everything
+    through the gateway, with manager_service calls under /manager as the frontend does.
+    """
+
+    def __init__(self, urls: dict, target: str, manifest: dict):
+        self.urls, self.target, self.manifest = urls, target, manifest
+        self.http = requests.Session()
+        self.etags = {}
+        self.samples = []
+
+    def url(self, service: str, path: str) -> str:
+        if self.target == "gateway":
+            return self.urls["gateway"] + ("/manager" if service == "manager" else "") + path
+        return self.urls[service] + path
+
+    def call(self, service, method, path, label=None, conditional=False, **kwargs):
+        # Labels name the endpoint, not the URL, so /my_leaves/3 and /my_leaves/7 are one row.
+        label = f"{service} {method} {label or path}"
+        url = self.url(service, path)
+        headers = {}
+        if conditional and url in self.etags:
+            headers["If-None-Match"] = self.etags[url]
+        t0 = time.perf_counter()
+        try:
+            resp = self.http.request(method, url, headers=headers, timeout=REQUEST_TIMEOUT, **kwargs)
+            resp.content
+            status = resp.status_code
+        except requests.RequestException:
+            resp, status = None, 0
+        self.samples.append((label, t0, time.perf_counter() - t0, status))
+        if conditional and resp is not None and resp.headers.get("ETag"):
+            self.etags[url] = resp.headers["ETag"]
+        return resp
+
+
+def run_workload(name: str, urls: dict, target: str, manifest: dict, users: int, duration: float,
+                 warmup: float, rng_seed: int) -> dict:
+    _, scenarios = WORKLOADS[name]
+    weights = [w for w, _ in scenarios]
+    funcs = [f for _, f in scenarios]
+    clients = [Client(urls, target, manifest) for _ in range(users)]
+    start = time.perf_counter()
+    measure_from, stop = start + warmup, start + warmup + duration
+    stopped_early = []
+
+    def loop(idx: int):
+        user = VirtualUser(idx, users, random.Random(rng_seed * 1000 + idx), manifest)
+        client = clients[idx]
+        while time.perf_counter() < stop:
+            try:
+                user.rng.choices(funcs, weights)[0](client, user)
+            except Exhausted:
+                stopped_early.append(idx)
+                return
+
+    threads = [threading.Thread(target=loop, args=(i,), daemon=True) for i in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    samples = [s for c in clients for s in c.samples if measure_from <= s[1] < stop]
+    return {"samples": samples, "window": duration, "users_exhausted": len(stopped_early)}
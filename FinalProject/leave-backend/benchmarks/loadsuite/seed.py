@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+from .stack import EMPLOYEE_DIR, MANAGER_DIR, Service, sqlite_url
+
+PASSWORD = "bench-pass"
+MANIFEST = "manifest.json"
+DB_FILES = ("employee.db", "manager.db")
+
+# Leave status and type mix of the generated history; pending employees get no leaves.
+STATUS_MIX = {"Approved": 0.6, "Pending": 0.25, "Rejected": 0.15}
+TYPE_MIX = {"sick": 0.5, "medical": 0.2, "privileged": 0.3}
+PENDING_EMPLOYEES = 0.05
+
+# Runs inside employee_service against DATABASE_URL. One password hash is computed and shared,
+# since hashing per user would dominate seeding; every row goes in with bulk inserts and the
+# stats counters, rollups, search index and outbox are rebuilt from the result, as bootstrap would.
+SEED_SCRIPT = """
+import json, random, sys
+from datetime import date, timedelta
+from werkzeug.security import generate_password_hash
+from app import app, db
+from models import User, LeaveRequest, LeaveBalance, OutboxEvent
+from migrations import bootstrap
+from stats import rebuild_leave_stats
+from rollups import rebuild_leave_rollups
+from search import rebuild_search_index
+from outbox import backfill_outbox
+
+p = json.loads(sys.argv[1])
+rng = random.Random(p["seed"])
+pick = lambda mix: rng.choices(list(mix), weights=list(mix.values()))[0]
+with app.app_context():
+    bootstrap()
+    password = generate_password_hash(p["password"])
+    n_pending = int(p["employees"] * p["pending_employees"])
+    db.session.execute(User.__table__.insert(), [
+        {"username": f"bench{i}", "password": password, "role": "employee", "approved": i >= n_pending}
+        for i in range(p["employees"])])
+    users = User.query.filter(User.role == "employee").order_by(User.id).all()
+    approved = [u for u in users if u.approved]
+    # Balances are sized so the approval workloads do not run out mid-run.
+    db.session.execute(LeaveBalance.__table__.insert(), [
+        {"employee_id": u.id, "sick_casual": 365, "medical": 365, "privileged": 365} for u in users])
+    next_free = {u.id: date(2024, 1, 1) + timedelta(days=rng.randrange(30)) for u in approved}
+    rows, counts = [], {}
+    for _ in range(p["leaves"] if approved else 0):
+        emp = rng.choice(approved).id
+        start = next_free[emp]
+        end = start + timedelta(days=rng.choice([0, 0, 0, 1, 1, 2, 4]))
+        next_free[emp] = end + timedelta(days=rng.randint(3, 30))
+        status = pick(p["status_mix"])
+        counts[status] = counts.get(status, 0) + 1
+        rows.append({"employee_id": emp, "reason": "bench", "leave_type": pick(p["type_mix"]),
+                     "status": status, "remarks": "", "start_date": start, "end_date": end})
+    for i in range(0, len(rows), 5000):
+        db.session.execute(LeaveRequest.__table__.insert(), rows[i:i + 5000])
+    db.session.commit()
+    rebuild_leave_stats()
+    rebuild_leave_rollups()
+    rebuild_search_index()
+    OutboxEvent.query.delete()
+    events = backfill_outbox()
+    print(json.dumps({"employees": [[u.id, u.username] for u in approved],
+                      "pending_employees": len(users) - len(approved),
+                      "leaves": counts, "outbox_events": events}))
+"""
+
+
+def seed(data_dir: str, employees: int, leaves: int, rng_seed: int = 42) -> dict:
+    params = {"employees": employees, "leaves": leaves, "seed": rng_seed, "password": PASSWORD,
+              "status_mix": STATUS_MIX, "type_mix": TYPE_MIX, "pending_employees": PENDING_EMPLOYEES}
+    os.makedirs(data_dir, exist_ok=True)
+    for name in os.listdir(data_dir):
+        if name.split("-")[0] in DB_FILES or name == MANIFEST:
+            os.remove(os.path.join(data_dir, name))
+
+    employee_db, manager_db = (os.path.join(data_dir, f) for f in DB_FILES)
+    out = subprocess.run([sys.executable, "-c", SEED_SCRIPT, json.dumps(params)], cwd=EMPLOYEE_DIR,
+                         env=dict(os.environ, DATABASE_URL=sqlite_url(employee_db)),
+                         check=True, capture_output=True, text=True).stdout
+    seeded = json.loads(out.strip().splitlines()[-1])
+
+    # The manager DB is a replica: bootstrap it and drain the feed from a running primary.
+    with Service("employee", EMPLOYEE_DIR, {"DATABASE_URL": sqlite_url(employee_db)}) as primary:
+        env = dict(os.environ, DATABASE_URL=sqlite_url(manager_db), EMPLOYEE_URL=primary.url)
+        for command in (["bootstrap"], ["replicate", "--once"]):
+            subprocess.run([sys.executable, "-m", "flask", "--app", "app", *command], cwd=MANAGER_DIR, env=env,
+                           check=True, capture_output=True)
+
+    manifest = {"params": params, **seeded}
+    with open(os.path.join(data_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def load_manifest(data_dir: str):
+    try:
+        with open(os.path.join(data_dir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def copy_template(data_dir: str, dest: str):
+    # Seeding ends with every connection closed, so the .db files are self-contained.
+    os.makedirs(dest, exist_ok=True)
+    for name in DB_FILES:
+        shutil.copyfile(os.path.join(data_dir, name), os.path.join(dest, name))
+    return tuple(os.path.join(dest, name) for name in DB_FILES)
@@ -0,0 +1,128 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.normpath(os.path.join(HERE, "..", ".."))
+EMPLOYEE_DIR = os.path.join(ROOT, "employee_service")
+MANAGER_DIR = os.path.join(ROOT, "manager_service")
+GATEWAY_DIR = os.path.join(ROOT, "gateway")
+
+# Serving knobs passed through to every gunicorn process and recorded with the results.
+PASSTHROUGH_ENV = ("WEB_WORKERS", "WEB_THREADS", "GATEWAY_CACHE", "DB_POOL_SIZE", "SQLITE_BUSY_TIMEOUT_MS")
+
+
+def sqlite_url(path: str) -> str:
+    return f"sqlite:///{path}"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Service:
+    """One gunicorn process (or, with command=, any long-running process) for the duration of a run."""
+
+    def __init__(self, name: str, cwd: str, env: dict, command=None, log_dir=None, bootstrap=True):
+        self.name, self.cwd, self.command, self.bootstrap = name, cwd, command, bootstrap
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.env = dict(os.environ, PORT=str(self.port), **env)
+        self.log_path = os.path.join(log_dir, f"{name}.log") if log_dir else os.devnull
+        self.proc = None
+
+    def start(self):
+        if not self.command and self.bootstrap:
+            # As the containers do: bring the schema up to date before any worker boots.
+            with open(self.log_path, "ab") as log:
+                subprocess.run([sys.executable, "-m", "flask", "--app", "app", "bootstrap"], cwd=self.cwd,
+                               env=self.env, stdout=log, stderr=log, check=True)
+        command = self.command or [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+                                   "--access-logfile", "/dev/null", "app:app"]
+        with open(self.log_path, "ab") as log:
+            self.proc = subprocess.Popen(command, cwd=self.cwd, env=self.env, stdout=log, stderr=log)
+        if not self.command:
+            self.wait_ready()
+        return self
+
+    def wait_ready(self, timeout: float = 60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"{self.name} exited with {self.proc.returncode}, see {self.log_path}")
+            try:
+                if requests.get(f"{self.url}/health", timeout=1).status_code == 200:
+                    return
+            except requests.RequestException:
+                time.sleep(0.1)
+        raise RuntimeError(f"{self.name} did not come up, see {self.log_path}")
+
+    def stop(self):
+        if self.proc and self.proc.poll() is None:
+            self.proc.send_signal(signal.SIGINT)  # quick shutdown; keep-alive sockets would stall a graceful one
+            try:
+                self.proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class Stack:
+    """employee_service, manager_service, its replicator and (optionally) the gateway on one DB pair."""
+
+    def __init__(self, employee_db: str, manager_db: str, with_gateway: bool, log_dir=None):
+        self.employee_db, self.manager_db = employee_db, manager_db
+        self.with_gateway = with_gateway
+        self.log_dir = log_dir
+        self.services = []
+
+    def __enter__(self):
+        try:
+            employee = self._start("employee", EMPLOYEE_DIR, {"DATABASE_URL": sqlite_url(self.employee_db)})
+            manager_env = {"DATABASE_URL": sqlite_url(self.manager_db), "EMPLOYEE_URL": employee.url}
+            manager = self._start("manager", MANAGER_DIR, manager_env)
+            self._start("replicator", MANAGER_DIR, manager_env,
+                        [sys.executable, "-m", "flask", "--app", "app", "replicate", "--interval", "0.5"])
+            self.urls = {"employee": employee.url, "manager": manager.url}
+            if self.with_gateway:
+                gateway = self._start("gateway", GATEWAY_DIR, {"EMPLOYEE_URL": employee.url, "MANAGER_URL": manager.url},
+                                      bootstrap=False)
+                self.urls["gateway"] = gateway.url
+        except BaseException:
+            self.__exit__()
+            raise
+        return self
+
+    def _start(self, name, cwd, env, command=None, bootstrap=True):
+        service = Service(name, cwd, env, command, self.log_dir, bootstrap)
+        self.services.append(service)
+        return service.start()
+
+    def __exit__(self, *exc):
+        for service in reversed(self.services):
+            service.stop()
+
+    def log_errors(self) -> dict:
+        # Counted from the service logs: lock contention is what WAL + busy_timeout should keep at zero.
+        out = {}
+        for service in self.services:
+            if service.log_path == os.devnull:
+                continue
+            with open(service.log_path, errors="replace") as f:
+                text = f.read()
+            out[service.name] = {"database_locked": text.count("database is locked"),
+                                 "tracebacks": text.count("Traceback (most recent call last)")}
+        return out
@@ -0,0 +1,95 @@
+import itertools
+from datetime import date, timedelta
+
+MANAGER_LOGIN = {"username": "manager", "password": "manager123"}
+BULK_PAGE = 500
+
+
+class Exhausted(Exception):
+    """Raised by a scenario that has nothing left to do; the virtual user then stops."""
+
+
+class VirtualUser:
+    # Per-thread state: each virtual user is pinned to one employee and keeps its own cursors.
+    def __init__(self, idx: int, users: int, rng, manifest: dict):
+        self.idx, self.users, self.rng = idx, users, rng
+        self.employee_id, self.username = manifest["employees"][idx % len(manifest["employees"])]
+        self.password = manifest["params"]["password"]
+        self.since = 0
+        self.cursor = None
+
+
+# New leaves are dated after all seeded history, one fresh weekday each, so they never overlap.
+_next_day = itertools.count()
+
+
+def employee_login(client, user):
+    username = user.rng.choice(client.manifest["employees"])[1]
+    client.call("employee", "POST", "/login", json={"username": username, "password": user.password})
+
+
+def manager_login(client, user):
+    client.call("manager", "POST", "/login", json=MANAGER_LOGIN)
+
+
+def employee_poll(client, user):
+    # What an open employee dashboard does: conditional GETs of its own data plus the change feed.
+    client.call("employee", "GET", f"/my_leaves/{user.employee_id}", "/my_leaves/<id>", conditional=True)
+    client.call("employee", "GET", f"/leave_balance/{user.employee_id}", "/leave_balance/<id>", conditional=True)
+    resp = client.call("employee", "GET", "/changes", params={"since": user.since})
+    if resp is not None and resp.status_code == 200:
+        user.since = resp.json()["version"]
+
+
+def apply_leave(client, user):
+    day = date(2030, 1, 1) + timedelta(days=next(_next_day))
+    while day.weekday() >= 5:  # weekend-only leave is rejected
+        day = date(2030, 1, 1) + timedelta(days=next(_next_day))
+    day = day.isoformat()
+    client.call("employee", "POST", "/apply_leave", json={
+        "employee_id": user.employee_id, "reason": "bench", "leave_type": user.rng.choice(["sick", "privileged"]),
+        "start_date": day, "end_date": day})
+
+
+def bulk_decide(client, user, batch: int = 50):
+    # Each virtual user owns the pending leaves whose id % users == idx, so managers never race.
+    while True:
+        params = {"status": "Pending", "limit": BULK_PAGE}
+        if user.cursor is not None:
+            params["cursor"] = user.cursor
+        resp = client.call("manager", "GET", "/all_leaves", "/all_leaves?status=Pending", params=params)
+        if resp is None or resp.status_code != 200:
+            return
+        page = resp.json()
+        mine = [l["id"] for l in page["items"] if l["id"] % user.users == user.idx][:batch]
+        if mine:
+            break
+        if page["next_cursor"] is None:
+            raise Exhausted
+        user.cursor = page["next_cursor"]
+    items = [{"leave_id": i, "status": "Approved" if user.rng.random() < 0.85 else "Rejected"} for i in mine]
+    client.call("manager", "PUT", "/update_leaves", json=items)
+    user.cursor = mine[-1]
+
+
+def manager_browse(client, user):
+    client.call("manager", "GET", "/all_leaves", "/all_leaves?limit=50", params={"limit": 50})
+    client.call("employee", "GET", "/leave_statistics")
+    client.call("employee", "GET", "/employee_balances", conditional=True)
+    client.call("employee", "GET", "/reports/utilization", params={"from": "2024-01", "to": "2024-12"},
+                conditional=True)
+
+
+# name -> (description, [(weight, scenario), ...]); every iteration of a virtual user runs one
+# scenario picked by weight.
+WORKLOADS = {
+    "login_storm": ("every user logs in back to back (password hashing bound)",
+                    [(19, employee_login), (1, manager_login)]),
+    "employee_polling": ("employees polling their leaves, balance and the change feed",
+                         [(1, employee_poll)]),
+    "manager_bulk_approvals": ("managers paging pending leaves and deciding 50 at a time",
+                               [(1, bulk_decide)]),
+    "mixed": ("mostly polling, with leave applications, small approval batches and manager reads",
+              [(12, employee_poll), (3, apply_leave), (2, lambda c, u: bulk_decide(c, u, batch=10)),
+               (2, manager_browse), (1, employee_login)]),
+}
@@ -0,0 +1,114 @@
+"""How fast manager_service's replica catches up from employee_service's outbox.
+
+Run from leave-backend/:  python benchmarks/replication_catchup.py [employees] [leaves per employee]
+Seeds the employee DB, backfills the outbox, serves employee_service with gunicorn and then
+times a cold replica draining the whole feed, then a warm replica applying a burst of
+approvals. Uses throwaway SQLite files.
+"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EMPLOYEE_DIR = os.path.join(HERE, "..", "employee_service")
+MANAGER_DIR = os.path.join(HERE, "..", "manager_service")
+TMP = tempfile.mkdtemp()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+SEED = """
+import sys
+from datetime import date, timedelta
+from app import app, db
+from models import User, LeaveRequest, LeaveBalance
+from migrations import bootstrap
+employees, per = int(sys.argv[1]), int(sys.argv[2])
+with app.app_context():
+    bootstrap()
+    db.session.execute(User.__table__.insert(), [
+        {"username": f"rep{i}", "password": "x", "role": "employee", "approved": True} for i in range(employees)])
+    ids = [u.id for u in User.query.filter_by(role="employee").all()]
+    db.session.execute(LeaveBalance.__table__.insert(), [
+        {"employee_id": i, "sick_casual": 1000, "medical": 0, "privileged": 0} for i in ids])
+    day = date(2024, 1, 1)
+    db.session.execute(LeaveRequest.__table__.insert(), [
+        {"employee_id": i, "reason": "rep", "leave_type": "sick", "status": "Pending",
+         "start_date": day + timedelta(days=2 * k), "end_date": day + timedelta(days=2 * k)}
+        for i in ids for k in range(per)])
+    db.session.commit()
+    # Bulk inserts bypass the outbox; clear bootstrap's single event and snapshot everything.
+    from models import OutboxEvent
+    from outbox import backfill_outbox
+    OutboxEvent.query.delete()
+    print(backfill_outbox())
+"""
+
+
+def main():
+    employees = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    per = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    port = free_port()
+    employee_env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(TMP, 'employee.db')}",
+                        PORT=str(port), WEB_WORKERS="1")
+    events = subprocess.run([sys.executable, "-c", SEED, str(employees), str(per)], cwd=EMPLOYEE_DIR,
+                            env=employee_env, check=True, capture_output=True, text=True).stdout.split()[-1]
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null", "app:app"],
+        cwd=EMPLOYEE_DIR, env=employee_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(200):
+            try:
+                requests.get(f"{base}/health", timeout=1)
+                break
+            except requests.RequestException:
+                time.sleep(0.1)
+
+        os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(TMP, 'manager.db')}", EMPLOYEE_URL=base)
+        sys.path.insert(0, MANAGER_DIR)
+        from app import app  # noqa: E402
+        from migrations import bootstrap  # noqa: E402
+        from replication import sync_once, replication_status  # noqa: E402
+
+        with app.app_context():
+            bootstrap()
+            t0 = time.perf_counter()
+            applied = sync_once()
+            cold = time.perf_counter() - t0
+        print(f"cold catch-up: {applied} events ({events} backfilled) in {cold:.2f}s "
+              f"= {applied / cold:.0f} events/s")
+
+        leaves = requests.get(f"{base}/all_leaves", params={"status": "Pending", "limit": 500}).json()["items"]
+        t0 = time.perf_counter()
+        for i in range(0, len(leaves), 50):
+            requests.put(f"{base}/update_leaves",
+                         json=[{"leave_id": l["id"], "status": "Approved"} for l in leaves[i:i + 50]])
+        writes = time.perf_counter() - t0
+        head = requests.get(f"{base}/outbox", params={"after": 2**62, "limit": 1}).json()["head_seq"]
+        with app.app_context():
+            behind = head - replication_status()["last_seq"]
+            t0 = time.perf_counter()
+            applied = sync_once()
+            warm = time.perf_counter() - t0
+            after = replication_status()
+        print(f"burst: {len(leaves)} approvals in {writes:.2f}s -> {behind} events "
+              f"behind before the poll; applied {applied} in {warm * 1000:.0f} ms, lag now {after['lag_events']}")
+    finally:
+        server.send_signal(signal.SIGINT)  # quick shutdown; keep-alive sockets would stall a graceful one
+        server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
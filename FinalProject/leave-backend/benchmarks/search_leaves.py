@@ -0,0 +1,83 @@
+"""Finding leaves by a word in the reason: /search_leaves (FTS5) vs a LIKE scan vs filtering /all_leaves.
+
+Run from leave-backend/:  python benchmarks/search_leaves.py [leaves]
+The /all_leaves path is what the frontend does today: download everything and filter in the
+browser (timed here as the request plus a substring filter). Uses a throwaway SQLite file.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'search.db')}"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "employee_service"))
+
+from app import app, db  # noqa: E402
+from models import User, LeaveRequest  # noqa: E402
+from migrations import bootstrap  # noqa: E402
+from search import rebuild_search_index  # noqa: E402
+
+RUNS = 5
+WORDS = ("fever", "flu", "family", "function", "travel", "doctor", "appointment", "personal", "work",
+         "home", "repair", "move", "exam", "child", "school", "visit", "parents", "festival", "rest", "cold")
+RARE = ("surgery", "wedding")
+
+
+def seed(total: int):
+    rng = random.Random(3)
+    db.session.execute(User.__table__.insert(), [
+        {"username": f"srch{i}", "password": "x", "role": "employee", "approved": True} for i in range(1000)])
+    ids = [u.id for u in User.query.filter_by(role="employee").all()]
+    rows = []
+    for i in range(total):
+        words = rng.sample(WORDS, 4) + ([rng.choice(RARE)] if rng.random() < 0.01 else [])
+        day = date(2020, 1, 1) + timedelta(days=rng.randrange(2000))
+        rows.append({"employee_id": rng.choice(ids), "reason": " ".join(words), "leave_type": "sick",
+                     "status": rng.choice(["Approved", "Pending", "Rejected"]), "remarks": "",
+                     "start_date": day, "end_date": day})
+    for i in range(0, len(rows), 5000):
+        db.session.execute(LeaveRequest.__table__.insert(), rows[i:i + 5000])
+    db.session.commit()
+
+
+def timed(fn) -> float:
+    samples = []
+    for _ in range(RUNS):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with app.app_context():
+        bootstrap()
+        seed(total)
+        t0 = time.perf_counter()
+        rebuild_search_index()
+        rebuild = time.perf_counter() - t0
+
+        def like():
+            LeaveRequest.query.filter(LeaveRequest.reason.like("%surgery%")).all()
+            db.session.rollback()
+        like_ms = timed(like)
+
+    client = app.test_client()
+
+    def download_and_filter():
+        [l for l in client.get("/all_leaves").get_json() if "surgery" in l["reason"]]
+    hits = len(client.get("/search_leaves?q=surgery&limit=100").get_json()["items"])
+    print(f"{total} leaves, index rebuilt in {rebuild:.2f}s; first page holds {hits} hits")
+    print(f"  /all_leaves + filter in the client     {timed(download_and_filter):8.1f} ms")
+    print(f"  LIKE '%surgery%' (all matches)         {like_ms:8.1f} ms")
+    print(f"  /search_leaves?q=surgery               {timed(lambda: client.get('/search_leaves?q=surgery')):8.1f} ms")
+    print(f"  /search_leaves?q=surgery&status=...    "
+          f"{timed(lambda: client.get('/search_leaves?q=surgery&status=Approved&from=2022-01-01')):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
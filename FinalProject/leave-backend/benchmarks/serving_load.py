@@ -0,0 +1,164 @@
+"""Mixed read/write load against employee_service served by gunicorn with 1, 2 and 4 workers.
+
+Run from leave-backend/:  python benchmarks/serving_load.py [seconds] [worker counts...]
+Reader threads poll /all_leaves, /my_leaves and /leave_balance while writer threads keep
+applying and approving leaves. Reports read and write throughput plus any 5xx/locked errors,
+which is what WAL + busy_timeout are meant to keep at zero. Uses a throwaway SQLite file.
+"""
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "employee_service")
+DB_FILE = os.path.join(tempfile.mkdtemp(), "serving.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_FILE}"
+sys.path.insert(0, SERVICE_DIR)
+
+from app import app, db  # noqa: E402
+from models import User, LeaveRequest, LeaveBalance  # noqa: E402
+from migrations import bootstrap  # noqa: E402
+
+EMPLOYEES = 200
+READERS = 8
+WRITERS = 2
+
+
+def seed() -> list:
+    with app.app_context():
+        db.session.execute(User.__table__.insert(), [
+            {"username": f"load{i}", "password": "x", "role": "employee", "approved": True}
+            for i in range(EMPLOYEES)
+        ])
+        ids = [u.id for u in User.query.filter_by(role="employee").all()]
+        db.session.execute(LeaveBalance.__table__.insert(), [
+            {"employee_id": i, "sick_casual": 10_000, "medical": 0, "privileged": 0} for i in ids
+        ])
+        day = date(2023, 1, 1)
+        db.session.execute(LeaveRequest.__table__.insert(), [
+            {"employee_id": i, "reason": "seed", "leave_type": "sick", "status": "Approved",
+             "start_date": day + timedelta(days=3 * k), "end_date": day + timedelta(days=3 * k)}
+            for i in ids for k in range(20)
+        ])
+        db.session.commit()
+        db.engine.dispose()
+    return ids
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port: int, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not come up")
+
+
+def call(conn, method, path, body=None):
+    payload = json.dumps(body) if body is not None else None
+    conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    data = resp.read()
+    return resp.status, data
+
+
+def run(workers: int, seconds: float, employee_ids: list, day_offset: list):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), WEB_WORKERS=str(workers), WEB_THREADS="4")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null", "app:app"],
+        cwd=SERVICE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        wait_ready(port)
+        stop = time.time() + seconds
+        lock = threading.Lock()
+        counts = Counter()
+        statuses = Counter()
+
+        def reader():
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            rng = random.Random()
+            while time.time() < stop:
+                emp = rng.choice(employee_ids)
+                path = rng.choice(["/all_leaves?limit=50", f"/my_leaves/{emp}", f"/leave_balance/{emp}"])
+                status, _ = call(conn, "GET", path)
+                with lock:
+                    counts["read"] += 1
+                    statuses[status] += 1
+
+        def writer():
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            rng = random.Random()
+            while time.time() < stop:
+                emp = rng.choice(employee_ids)
+                with lock:
+                    day_offset[0] += 1
+                    start = date(2025, 1, 1) + timedelta(days=day_offset[0])
+                status, data = call(conn, "POST", "/apply_leave", {
+                    "employee_id": emp, "reason": "load", "leave_type": "sick",
+                    "start_date": start.isoformat(), "end_date": start.isoformat(),
+                })
+                with lock:
+                    statuses[status] += 1
+                if status != 201:
+                    continue
+                status, data = call(conn, "GET", f"/my_leaves/{emp}")
+                leave_id = next(l["id"] for l in json.loads(data) if l["start_date"] == start.isoformat())
+                status, _ = call(conn, "PUT", f"/update_leave/{leave_id}", {"status": "Approved"})
+                with lock:
+                    counts["write"] += 2
+                    counts["read"] += 1
+                    statuses[status] += 1
+
+        pool = [threading.Thread(target=reader) for _ in range(READERS)]
+        pool += [threading.Thread(target=writer) for _ in range(WRITERS)]
+        t0 = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - t0
+    finally:
+        proc.terminate()
+        _, err = proc.communicate(timeout=30)
+    locked = err.decode(errors="replace").count("database is locked")
+    errors = sum(n for s, n in statuses.items() if s >= 500)
+    print(f"{workers:>7} {counts['read'] / elapsed:>9.0f} {counts['write'] / elapsed:>9.0f} "
+          f"{errors:>6} {locked:>6}  {dict(sorted(statuses.items()))}")
+    return errors == 0
+
+
+def main():
+    with app.app_context():
+        bootstrap()
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    worker_counts = [int(a) for a in sys.argv[2:]] or [1, 2, 4]
+    employee_ids = seed()
+    day_offset = [0]
+    print(f"{READERS} readers, {WRITERS} writers, {seconds:.0f}s per run, {os.cpu_count()} CPU(s)")
+    print(f"{'workers':>7} {'reads/s':>9} {'writes/s':>9} {'5xx':>6} {'locked':>6}  status codes")
+    ok = all([run(w, seconds, employee_ids, day_offset) for w in worker_counts])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Cold-start cost of a service: fresh-interpreter import and gunicorn time-to-first-request.
+
+Run from leave-backend/:  python benchmarks/startup_time.py [service_dir] [worker counts...]
+The database is bootstrapped once up front, so the numbers show what every worker boot,
+container restart or test import pays on top of that. Uses a throwaway SQLite file.
+"""
+import http.client
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+IMPORT_RUNS = 11
+# Framework imports (~0.4s, the same for every Flask + SQLAlchemy process) are loaded first
+# and timed separately, so the second number is only what the service's own modules cost.
+FRAMEWORK_MODULES = "flask, flask_cors, flask_sqlalchemy, sqlalchemy, werkzeug.security, click"
+IMPORT_SNIPPET = ("import time; t = time.perf_counter(); import {0}; f = time.perf_counter(); import app; "
+                  "print(f - t, time.perf_counter() - f)")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def import_time(service_dir: str, env: dict) -> tuple:
+    framework, own = [], []
+    for _ in range(IMPORT_RUNS):
+        out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET.format(FRAMEWORK_MODULES)], cwd=service_dir,
+                             env=env, check=True, capture_output=True, text=True).stdout
+        f, o = out.strip().splitlines()[-1].split()
+        framework.append(float(f))
+        own.append(float(o))
+    return statistics.median(framework), statistics.median(own)
+
+
+def time_to_ready(service_dir: str, env: dict, workers: int) -> float:
+    port = free_port()
+    env = dict(env, PORT=str(port), WEB_WORKERS=str(workers))
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null", "app:app"],
+        cwd=service_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - t0 < 60:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("GET", "/health")
+                status = conn.getresponse().status
+                conn.close()
+                if status == 200:
+                    return time.perf_counter() - t0
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError("gunicorn did not come up")
+    finally:
+        proc.send_signal(signal.SIGINT)  # quick shutdown, no graceful drain
+        proc.wait(timeout=30)
+
+
+def main():
+    service = sys.argv[1] if len(sys.argv) > 1 else "employee_service"
+    worker_counts = [int(a) for a in sys.argv[2:]] or [1, 4]
+    service_dir = os.path.join(HERE, "..", service) if not os.path.isabs(service) else service
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}")
+    subprocess.run([sys.executable, "-m", "flask", "--app", "app", "bootstrap"], cwd=service_dir, env=env,
+                   check=True, capture_output=True)
+
+    print(f"{os.path.basename(os.path.normpath(service_dir))}")
+    framework, own = import_time(service_dir, env)
+    print(f"  framework imports (median of {IMPORT_RUNS}):  {framework * 1000:8.1f} ms")
+    print(f"  import app on top (median of {IMPORT_RUNS}):  {own * 1000:8.1f} ms")
+    for workers in worker_counts:
+        print(f"  gunicorn {workers} worker(s) to first 200:   {time_to_ready(service_dir, env, workers) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
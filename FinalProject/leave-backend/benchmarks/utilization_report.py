@@ -0,0 +1,93 @@
+"""A year's utilization report: from leave_rollup vs expanding every approved leave in Python.
+
+Run from leave-backend/:  python benchmarks/utilization_report.py [employees] [leaves per employee]
+The naive path is what answering the report without rollups takes: load every approved
+leave and walk its days. Also times the full rollup rebuild. Uses a throwaway SQLite file.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "employee_service")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'report.db')}"
+sys.path.insert(0, SERVICE_DIR)
+
+from app import app, db  # noqa: E402
+from models import User, LeaveRequest  # noqa: E402
+from migrations import bootstrap  # noqa: E402
+from rollups import rebuild_leave_rollups  # noqa: E402
+
+RUNS = 5
+
+
+def seed(employees: int, per: int):
+    rng = random.Random(7)
+    db.session.execute(User.__table__.insert(), [
+        {"username": f"rep{i}", "password": "x", "role": "employee", "approved": True} for i in range(employees)])
+    ids = [u.id for u in User.query.filter_by(role="employee").all()]
+    rows = []
+    for emp in ids:
+        day = date(2023, 1, 1) + timedelta(days=rng.randrange(20))
+        for _ in range(per):
+            end = day + timedelta(days=rng.choice([0, 0, 1, 2, 4]))
+            rows.append({"employee_id": emp, "reason": "r", "leave_type": rng.choice(["sick", "medical", "privileged"]),
+                         "status": rng.choice(["Approved", "Approved", "Pending", "Rejected"]),
+                         "start_date": day, "end_date": end})
+            day = end + timedelta(days=rng.randint(5, 40))
+    for i in range(0, len(rows), 5000):
+        db.session.execute(LeaveRequest.__table__.insert(), rows[i:i + 5000])
+    db.session.commit()
+    return len(rows)
+
+
+def naive_report(year: int) -> dict:
+    out = {}
+    for leave in LeaveRequest.query.filter_by(status="Approved").all():
+        day = leave.start_date
+        while day <= leave.end_date:
+            if day.year == year:
+                key = (day.strftime("%Y-%m"), leave.leave_type)
+                out[key] = out.get(key, 0) + 1
+            day += timedelta(days=1)
+    return out
+
+
+def timed(fn) -> float:
+    samples = []
+    for _ in range(RUNS):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    employees = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    per = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with app.app_context():
+        bootstrap()
+        total = seed(employees, per)
+        t0 = time.perf_counter()
+        rollup_rows = rebuild_leave_rollups()
+        rebuild = time.perf_counter() - t0
+
+        def naive():
+            naive_report(2024)
+            db.session.rollback()
+        naive_ms = timed(naive)
+
+    client = app.test_client()
+    org_ms = timed(lambda: client.get("/reports/utilization?from=2024-01&to=2024-12"))
+    emp_ms = timed(lambda: client.get("/reports/utilization?from=2024-01&to=2024-12&group=employee"))
+    print(f"{employees} employees, {total} leaves -> {rollup_rows} rollup rows (rebuild {rebuild:.2f}s)")
+    print(f"  naive: load + expand approved leaves   {naive_ms:8.1f} ms")
+    print(f"  /reports/utilization (org)             {org_ms:8.1f} ms")
+    print(f"  /reports/utilization?group=employee    {emp_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,30 @@
 import os
-from flask import Flask, request, jsonify
+import json
+import time
+import threading
+import click
+from flask import Blueprint, Flask, current_app, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
+from sqlalchemy import String, and_, case, cast, exists, func, literal, select, union_all
+from sqlalchemy.dialects.sqlite import insert
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime
-from extension import db
-from models import User, LeaveRequest, LeaveBalance
+from datetime import datetime, timedelta
+from extension import db, tune_sqlite
+from config import Config
+from metrics import init_metrics
+from models import User, LeaveRequest, LeaveArchive, LeaveBalance, LeaveStat, OutboxEvent, Holiday, BalanceJob
+from versions import bump_versions, conditional
+from migrations import upgrade_schema, bootstrap
+from onboarding import InvalidUpload, iter_records, import_employees
+from outbox import record_changes, read_events, compact_outbox, compacted_through
+from search import index_leaves, unindex_leaves, match_expression, search_filter, rebuild_search_index, unindexed_leaves
+from rollups import move_leave_rollups, utilization_report, parse_month, month_range, REPORT_MAX_MONTHS, compute_leave_rollups, stored_leave_rollups, rebuild_leave_rollups, replace_leave_rollups
+from archive import leave_source, archive_leaves, default_cutoff, ARCHIVE_AFTER_DAYS, ARCHIVE_CHUNK, ARCHIVE_PAUSE
+from balance_jobs import JobConflict, job_params, job_to_dict, start_job, run_job, BALANCE_JOB_CHUNK, BALANCE_JOB_PAUSE
+from workdays import work_calendar, parse_weekdays, read_weekend, set_weekend, save_holidays, delete_holiday, WEEKDAYS
+from stats import bump_leave_stats, move_leave_stats, leave_totals, read_leave_stats, compute_leave_stats, stored_leave_stats, rebuild_leave_stats
 
-app = Flask(__name__)
-CORS(app, supports_credentials=True) 
-
-
-INSTANCE_DIR = os.path.join(os.path.dirname(__file__), "instance")
-
-os.makedirs(INSTANCE_DIR, exist_ok=True)
-DB_PATH = os.path.join(INSTANCE_DIR, "lms.db")
-
-app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DB_PATH}"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-db.init_app(app)
+bp = Blueprint("employee", __name__, cli_group=None)
 
 def parse_date(date_str: str):
     try:
@@ -25,16 +32,106 @@ def parse_date(date_str: str):
     except ValueError:
         return datetime.strptime(date_str, "%d-%m-%Y").date()
 
-def ensure_balance_for(employee_id: int) -> LeaveBalance:
-    bal = LeaveBalance.query.filter_by(employee_id=employee_id).first()
-    if not bal:
-        bal = LeaveBalance(employee_id=employee_id, sick_casual=10, medical=20, privileged=18)
-        db.session.add(bal)
-        db.session.commit()
-    return bal
+def leave_to_dict(leave: LeaveRequest, user: User) -> dict:
+    return {
+        "id": leave.id,
+        "employee_id": user.id,
+        "employee_name": user.username,
+        "reason": leave.reason,
+        "leave_type": leave.leave_type,
+        "status": leave.status,
+        "remarks": leave.remarks or "",
+        "start_date": leave.start_date.isoformat(),
+        "end_date": leave.end_date.isoformat()
+    }
+
+def include_archived(args) -> bool:
+    return args.get("include_archived") in {"1", "true"}
+
+def filtered_leaves_query(args):
+    leave = leave_source(include_archived(args))
+    q = db.session.query(leave, User).join(User, leave.employee_id == User.id)
+    if args.get("status"):
+        q = q.filter(leave.status == args["status"])
+    employee_id = args.get("employee_id", type=int)
+    if employee_id is not None:
+        q = q.filter(leave.employee_id == employee_id)
+    leave_type = (args.get("leave_type") or "").strip().lower()
+    if leave_type:
+        q = q.filter(leave.leave_type == leave_type)
+    if args.get("from"):
+        q = q.filter(leave.end_date >= parse_date(args["from"]))
+    if args.get("to"):
+        q = q.filter(leave.start_date <= parse_date(args["to"]))
+    cursor = args.get("cursor", type=int)
+    if cursor is not None:
+        q = q.filter(leave.id > cursor)
+    return q.order_by(leave.id)
+
+def stream_json_array(rows, to_dict):
+    yield "["
+    first = True
+    for row in rows:
+        yield ("" if first else ",") + json.dumps(to_dict(*row))
+        first = False
+    yield "]"
+
+DEFAULT_BALANCE = {"sick_casual": 10, "medical": 20, "privileged": 18}
 
+# leave_type -> (LeaveBalance column, label used in error messages)
+BALANCE_FIELDS = {
+    "sick": ("sick_casual", "Sick/Casual"),
+    "medical": ("medical", "Medical"),
+    "privileged": ("privileged", "Privileged"),
+}
 
-@app.route("/login", methods=["POST"])
+# Write paths never read-check-write a row. Reads happen before the transaction (pysqlite only
+# opens one at the first DML), and every write is a conditional statement checked by rowcount,
+# so concurrent workers can neither double-spend nor deadlock upgrading a read lock.
+
+def ensure_balance_for(employee_id: int) -> None:
+    stmt = insert(LeaveBalance).values(employee_id=employee_id, **DEFAULT_BALANCE)
+    db.session.execute(stmt.on_conflict_do_nothing(index_elements=["employee_id"]))
+
+def leave_days(leave: LeaveRequest, calendar) -> int:
+    # Working days only: weekends and holidays from the calendar are not charged.
+    return calendar.working_days(leave.start_date, leave.end_date)
+
+def overlapping_leaves(table, employee_id: int, start, end):
+    # Rejected leave frees its dates; pending and approved leave both hold them.
+    return select(table.c.id, table.c.start_date, table.c.end_date).where(
+        table.c.employee_id == employee_id,
+        table.c.start_date <= end,
+        table.c.end_date >= start,
+        func.coalesce(table.c.status, "Pending") != "Rejected"
+    )
+
+def deduct_balance(employee_id: int, deductions: dict) -> bool:
+    # UPDATE ... SET col = col - :days WHERE employee_id = :id AND col >= :days, for every column at once.
+    table = LeaveBalance.__table__
+    stmt = table.update().where(
+        table.c.employee_id == employee_id,
+        *(table.c[col] >= days for col, days in deductions.items())
+    ).values({col: table.c[col] - days for col, days in deductions.items()})
+    return db.session.execute(stmt).rowcount == 1
+
+def credit_balance(employee_id: int, credits: dict) -> None:
+    # Days given back when approved leave is moved to Pending or Rejected; never conditional.
+    table = LeaveBalance.__table__
+    db.session.execute(table.update().where(table.c.employee_id == employee_id)
+                       .values({col: table.c[col] + days for col, days in credits.items()}))
+
+def claim_leave(leave_id: int, old_status: str, new_status: str, remarks: str) -> bool:
+    # Moves the leave only if nobody else changed its status since we read it.
+    table = LeaveRequest.__table__
+    stmt = table.update().where(
+        table.c.id == leave_id,
+        func.coalesce(table.c.status, "Pending") == old_status
+    ).values(status=new_status, remarks=remarks)
+    return db.session.execute(stmt).rowcount == 1
+
+
+@bp.route("/login", methods=["POST"])
 def login():
     data = (request.get_json(silent=True) or {})
     username = (data.get("username") or "").strip()
@@ -53,7 +150,7 @@ def login():
     return jsonify({"message": f"Welcome {user.username}", "role": user.role, "id": user.id, "username": user.username}), 200
 
 
-@app.route("/create_employee", methods=["POST"])
+@bp.route("/create_employee", methods=["POST"])
 def create_employee():
     data = (request.get_json(silent=True) or {})
     username = (data.get("username") or "").strip()
@@ -68,42 +165,75 @@ def create_employee():
     hashed = generate_password_hash(password)
     emp = User(username=username, password=hashed, role="employee", approved=False)
     db.session.add(emp)
+    db.session.flush()
+    record_changes(users=[emp.id])
+    bump_versions("users")
     db.session.commit()
     return jsonify({"message": f"Employee {username} created successfully."}), 201
 
-@app.route("/pending_employees", methods=["GET"])
+@bp.route("/import_employees", methods=["POST"])
+def import_employees_route():
+    # Raw CSV (username,password[,approved]) or JSONL body, or a multipart "file" field.
+    # ?approve=1 approves everyone and creates their LeaveBalance rows in the same batches.
+    upload = request.files.get("file")
+    fmt = (request.args.get("format") or "").lower()
+    if not fmt:
+        name = (upload.filename if upload else "") or ""
+        kind = upload.mimetype if upload else (request.mimetype or "")
+        fmt = "csv" if name.endswith(".csv") or "csv" in kind else "jsonl"
+    if fmt not in {"csv", "jsonl"}:
+        return jsonify({"error": "format must be csv or jsonl"}), 400
+    stream = upload.stream if upload else request.stream
+    approve = request.args.get("approve") in {"1", "true"}
+    try:
+        summary = import_employees(
+            iter_records(stream, fmt), approve=approve,
+            progress=lambda s: current_app.logger.info("import_employees: %(processed)d processed, %(created)d created", s)
+        )
+    except InvalidUpload as e:
+        return jsonify({"error": f"Invalid upload: {e}", **e.summary}), 400
+    return jsonify(summary), 200
+
+@bp.route("/pending_employees", methods=["GET"])
+@conditional("users")
 def pending_employees():
     users = User.query.filter_by(role="employee", approved=False).all()
     return jsonify([{"id": u.id, "username": u.username} for u in users]), 200
 
-@app.route("/approve_employee/<int:user_id>", methods=["PUT"])
+@bp.route("/approve_employee/<int:user_id>", methods=["PUT"])
 def approve_employee(user_id: int):
     user = User.query.get(user_id)
     if not user or user.role != "employee":
         return jsonify({"error": "User not found"}), 404
     user.approved = True
     ensure_balance_for(user.id)
+    record_changes(users=[user.id], balances=[user.id])
+    bump_versions("users", "balances", f"balance:{user.id}")
     db.session.commit()
     return jsonify({"message": f"Employee {user.username} approved"}), 200
 
-@app.route("/employees", methods=["GET"])
+@bp.route("/employees", methods=["GET"])
 def employees():
-    emps = User.query.filter_by(role="employee").all()
-    out = []
-    for e in emps:
-        total_leaves = LeaveRequest.query.filter_by(employee_id=e.id).count()
-        pending = LeaveRequest.query.filter_by(employee_id=e.id, status="Pending").count()
-        out.append({
-            "id": e.id,
-            "username": e.username,
-            "approved": e.approved,
-            "total_leaves": total_leaves,
-            "pending_leaves": pending
-        })
-    return jsonify(out), 200
+    rows = db.session.query(
+        User.id,
+        User.username,
+        User.approved,
+        # From the per-employee counters, which still count archived leaves.
+        func.coalesce(func.sum(LeaveStat.count), 0),
+        func.coalesce(func.sum(case((LeaveStat.status == "Pending", LeaveStat.count), else_=0)), 0)
+    ).outerjoin(LeaveStat, and_(LeaveStat.scope == "employee", LeaveStat.key == cast(User.id, String)))\
+        .filter(User.role == "employee")\
+        .group_by(User.id).all()
+    return jsonify([{
+        "id": id_,
+        "username": username,
+        "approved": approved,
+        "total_leaves": total_leaves,
+        "pending_leaves": pending
+    } for id_, username, approved, total_leaves, pending in rows]), 200
 
 
-@app.route("/apply_leave", methods=["POST"])
+@bp.route("/apply_leave", methods=["POST"])
 def apply_leave():
     data = (request.get_json(silent=True) or {})
     employee_id = data.get("employee_id")
@@ -132,61 +262,127 @@ def apply_leave():
     if (ed - sd).days < 0:
         return jsonify({"error": "end_date must be on/after start_date"}), 400
 
-    leave = LeaveRequest(
-        employee_id=emp.id,
-        reason=reason,
-        leave_type=leave_type,
-        start_date=sd.strftime("%Y-%m-%d"),
-        end_date=ed.strftime("%Y-%m-%d"),
-        status="Pending",
-        remarks=data.get("remarks") or ""
-    )
-    db.session.add(leave)
+    days = work_calendar().working_days(sd, ed)
+    if not days:
+        return jsonify({"error": "Leave covers no working days"}), 400
+    bal = LeaveBalance.query.filter_by(employee_id=emp.id).first()
+    col, label = BALANCE_FIELDS[leave_type]
+    if bal and getattr(bal, col) < days:
+        return jsonify({"error": f"Insufficient {label} balance: {days} working days requested, "
+                                 f"{getattr(bal, col)} left"}), 400
+
+    # The overlap check is part of the INSERT, so identical requests racing each other cannot
+    # both pass it. Back-dated leave can also overlap history that has already been archived.
+    values = {"employee_id": emp.id, "reason": reason, "leave_type": leave_type, "start_date": sd,
+              "end_date": ed, "status": "Pending", "remarks": data.get("remarks") or ""}
+    live = LeaveRequest.__table__
+    clashes = [overlapping_leaves(t, emp.id, sd, ed) for t in (live, LeaveArchive.__table__)]
+    result = db.session.execute(live.insert().from_select(list(values), select(
+        *(literal(v, live.c[k].type) for k, v in values.items())
+    ).where(*(~exists(c) for c in clashes))))
+    if not result.rowcount:
+        db.session.rollback()
+        clash = db.session.execute(union_all(*clashes).limit(1)).first()
+        return jsonify({"error": f"Overlaps leave #{clash.id} ({clash.start_date.isoformat()} to "
+                                 f"{clash.end_date.isoformat()})" if clash else "Overlaps an existing leave"}), 409
+
+    leave_id = result.lastrowid
+    record_changes(leaves=[leave_id])
+    index_leaves([leave_id])
+    bump_leave_stats(emp.id, leave_type, "Pending", 1)
+    bump_versions("leaves", f"leaves:{emp.id}")
     db.session.commit()
-    return jsonify({"message": "Leave applied successfully"}), 201
+    return jsonify({"message": "Leave applied successfully", "days": days}), 201
 
-@app.route("/my_leaves/<int:employee_id>", methods=["GET"])
+@bp.route("/my_leaves/<int:employee_id>", methods=["GET"])
+@conditional("leaves:{employee_id}")
 def my_leaves(employee_id: int):
-    leaves = LeaveRequest.query.filter_by(employee_id=employee_id).all()
+    leave = leave_source(include_archived(request.args))
+    leaves = db.session.query(leave).filter(leave.employee_id == employee_id).all()
     return jsonify([{
         "id": l.id,
         "reason": l.reason,
         "leave_type": l.leave_type,
         "status": l.status,
         "remarks": l.remarks or "",
-        "start_date": l.start_date,
-        "end_date": l.end_date
+        "start_date": l.start_date.isoformat(),
+        "end_date": l.end_date.isoformat()
     } for l in leaves]), 200
 
-@app.route("/delete_leave/<int:leave_id>", methods=["DELETE"])
+@bp.route("/delete_leave/<int:leave_id>", methods=["DELETE"])
 def delete_leave(leave_id: int):
     l = LeaveRequest.query.get(leave_id)
     if not l:
         return jsonify({"error": "Leave request not found"}), 404
     if l.status != "Pending":
         return jsonify({"error": f"Cannot delete leave with status '{l.status}'"}), 400
-    db.session.delete(l)
+    # Conditional like claim_leave: an approval committed since the read wins, and its days stay charged.
+    table = LeaveRequest.__table__
+    if not db.session.execute(table.delete().where(table.c.id == l.id, table.c.status == "Pending")).rowcount:
+        db.session.rollback()
+        return jsonify({"error": "Leave was modified concurrently, reload and retry"}), 409
+    record_changes(deleted_leaves=[l.id])
+    unindex_leaves([l.id])
+    bump_leave_stats(l.employee_id, l.leave_type, "Pending", -1)
+    bump_versions("leaves", f"leaves:{l.employee_id}")
     db.session.commit()
     return jsonify({"message": "Leave request successfully deleted"}), 200
 
 
-@app.route("/all_leaves", methods=["GET"])
+ALL_LEAVES_PAGE_MAX = 500
+STREAM_BATCH_SIZE = 500
+
+@bp.route("/all_leaves", methods=["GET"])
+@conditional("leaves")
 def all_leaves():
-    rows = db.session.query(LeaveRequest, User).join(User, LeaveRequest.employee_id == User.id).all()
-    result = [{
-        "id": leave.id,
-        "employee_id": user.id,
-        "employee_name": user.username,
-        "reason": leave.reason,
-        "leave_type": leave.leave_type,
-        "status": leave.status,
-        "remarks": leave.remarks or "",
-        "start_date": leave.start_date,
-        "end_date": leave.end_date
-    } for leave, user in rows]
-    return jsonify(result), 200
+    # ?limit=N[&cursor=<last id>] returns one keyset page, ?stream=1 streams rows straight
+    # off the cursor; with neither, the full (filtered) list is returned as before.
+    # ?include_archived=1 adds archived history, here and on the other leave listings.
+    try:
+        q = filtered_leaves_query(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid date format (use YYYY-MM-DD)"}), 400
+
+    limit = request.args.get("limit", type=int)
+    if request.args.get("stream") in {"1", "true"}:
+        if limit:
+            q = q.limit(limit)
+        rows = q.yield_per(STREAM_BATCH_SIZE)
+        return Response(stream_with_context(stream_json_array(rows, leave_to_dict)), mimetype="application/json")
+
+    if limit:
+        limit = max(1, min(limit, ALL_LEAVES_PAGE_MAX))
+        rows = q.limit(limit + 1).all()
+        page = rows[:limit]
+        next_cursor = page[-1][0].id if len(rows) > limit else None
+        return jsonify({"items": [leave_to_dict(leave, user) for leave, user in page], "next_cursor": next_cursor}), 200
+
+    return jsonify([leave_to_dict(leave, user) for leave, user in q.all()]), 200
+
+SEARCH_PAGE_MAX = 100
+
+@bp.route("/search_leaves", methods=["GET"])
+@conditional("leaves")
+def search_leaves():
+    # ?q=surgery[&status&employee_id&leave_type&from&to][&limit=N&offset=M]: ranked best match
+    # first, so pages are by offset; the same filters as /all_leaves apply.
+    expression = match_expression(request.args.get("q", ""))
+    if not expression:
+        return jsonify({"error": "q must contain at least one word"}), 400
+    try:
+        q = filtered_leaves_query(request.args).order_by(None)
+    except ValueError:
+        return jsonify({"error": "Invalid date format (use YYYY-MM-DD)"}), 400
+    limit = max(1, min(request.args.get("limit", 20, type=int), SEARCH_PAGE_MAX))
+    offset = max(0, request.args.get("offset", 0, type=int))
+    rows = search_filter(q, expression, leave_source(include_archived(request.args))).offset(offset).limit(limit + 1).all()
+    page = rows[:limit]
+    return jsonify({
+        "items": [leave_to_dict(leave, user) for leave, user in page],
+        "next_offset": offset + limit if len(rows) > limit else None
+    }), 200
 
-@app.route("/update_leave/<int:leave_id>", methods=["PUT"])
+@bp.route("/update_leave/<int:leave_id>", methods=["PUT"])
 def update_leave(leave_id: int):
     data = (request.get_json(silent=True) or {})
     status = data.get("status")
@@ -198,37 +394,140 @@ def update_leave(leave_id: int):
     leave = LeaveRequest.query.get(leave_id)
     if not leave:
         return jsonify({"error": "Leave not found"}), 404
+    field = BALANCE_FIELDS.get(leave.leave_type)
+    if status == "Approved" and not field:
+        return jsonify({"error": "Invalid leave type on record"}), 400
 
+    old_status = leave.status or "Pending"
+    if status == "Approved" and old_status == "Approved":
+        return jsonify({"error": "Leave is already approved"}), 409
+    if not claim_leave(leave.id, old_status, status, remarks):
+        db.session.rollback()
+        return jsonify({"error": "Leave was modified concurrently, reload and retry"}), 409
+
+    calendar = work_calendar()
     if status == "Approved":
-        bal = ensure_balance_for(leave.employee_id)
-        start = parse_date(leave.start_date)
-        end = parse_date(leave.end_date)
-        days = (end - start).days + 1
-
-        if leave.leave_type == "sick":
-            if bal.sick_casual < days:
-                return jsonify({"error": "Insufficient Sick/Casual balance"}), 400
-            bal.sick_casual -= days
-        elif leave.leave_type == "medical":
-            if bal.medical < days:
-                return jsonify({"error": "Insufficient Medical balance"}), 400
-            bal.medical -= days
-        elif leave.leave_type == "privileged":
-            if bal.privileged < days:
-                return jsonify({"error": "Insufficient Privileged balance"}), 400
-            bal.privileged -= days
-        else:
-            return jsonify({"error": "Invalid leave type on record"}), 400
-
-        db.session.add(bal)
-
-    leave.status = status
-    leave.remarks = remarks
+        ensure_balance_for(leave.employee_id)
+        if not deduct_balance(leave.employee_id, {field[0]: leave_days(leave, calendar)}):
+            db.session.rollback()
+            return jsonify({"error": f"Insufficient {field[1]} balance"}), 400
+    elif old_status == "Approved" and field:
+        credit_balance(leave.employee_id, {field[0]: leave_days(leave, calendar)})
+    charged = field and (status == "Approved") != (old_status == "Approved")
+    if charged:
+        bump_versions("balances", f"balance:{leave.employee_id}")
+
+    move_leave_stats(leave, old_status, status)
+    move_leave_rollups(leave, old_status, status, calendar)
+    record_changes(leaves=[leave.id], balances=[leave.employee_id] if charged else ())
+    index_leaves([leave.id])
+    bump_versions("leaves", f"leaves:{leave.employee_id}")
     db.session.commit()
     return jsonify({"message": f"Leave {status.lower()} successfully"}), 200
 
+UPDATE_LEAVES_MAX = 500
+
+def item_leave_id(item: dict):
+    # 42 or "42" -> 42; anything else (lists, objects, booleans, floats) -> None
+    leave_id = item.get("leave_id")
+    if isinstance(leave_id, str) and leave_id.strip().isdigit():
+        return int(leave_id)
+    return leave_id if isinstance(leave_id, int) and not isinstance(leave_id, bool) else None
+
+@bp.route("/update_leaves", methods=["PUT"])
+def update_leaves():
+    # Body: [{"leave_id", "status", "remarks"}, ...] (or {"items": [...]}). Everything is applied
+    # in one transaction; each item gets its own result so partial failures are reported.
+    data = request.get_json(silent=True)
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "A non-empty list of {leave_id, status, remarks} is required"}), 400
+    if len(items) > UPDATE_LEAVES_MAX:
+        return jsonify({"error": f"At most {UPDATE_LEAVES_MAX} items per call"}), 400
 
-@app.route("/leave_balance/<int:employee_id>", methods=["GET"])
+    items = [item if isinstance(item, dict) else {} for item in items]
+    # Resolved once, before any lookup: a list or object as leave_id is a per-item error, not a 500.
+    item_ids = [item_leave_id(i) for i in items]
+    leaves = {l.id: l for l in LeaveRequest.query.filter(LeaveRequest.id.in_(set(item_ids) - {None})).all()}
+    approving = sorted({leaves[leave_id].employee_id for i, leave_id in zip(items, item_ids)
+                        if i.get("status") == "Approved" and leave_id in leaves})
+
+    # The first write takes SQLite's write lock, so the balance snapshot read right after it
+    # cannot move under us; deductions are then applied as one conditional UPDATE per employee.
+    for employee_id in approving:
+        ensure_balance_for(employee_id)
+    remaining = {b.employee_id: {col: getattr(b, col) for col in DEFAULT_BALANCE}
+                 for b in LeaveBalance.query.filter(LeaveBalance.employee_id.in_(approving)).all()}
+    deductions, credits = {}, {}
+    calendar = work_calendar()
+
+    results = []
+    touched = {"leaves"}
+    for item, leave_id in zip(items, item_ids):
+        status = item.get("status")
+        if leave_id is None:
+            results.append({"leave_id": item.get("leave_id"), "ok": False, "error": "leave_id must be an integer"})
+            continue
+        if status not in {"Approved", "Rejected", "Pending"}:
+            results.append({"leave_id": leave_id, "ok": False, "error": "Invalid status"})
+            continue
+        leave = leaves.get(leave_id)
+        if not leave:
+            results.append({"leave_id": leave_id, "ok": False, "error": "Leave not found"})
+            continue
+        field = BALANCE_FIELDS.get(leave.leave_type)
+        if status == "Approved":
+            if not field:
+                results.append({"leave_id": leave_id, "ok": False, "error": "Invalid leave type on record"})
+                continue
+            if (leave.status or "Pending") == "Approved":
+                results.append({"leave_id": leave_id, "ok": False, "error": "Leave is already approved"})
+                continue
+            days = leave_days(leave, calendar)
+            if remaining[leave.employee_id][field[0]] < days:
+                results.append({"leave_id": leave_id, "ok": False, "error": f"Insufficient {field[1]} balance"})
+                continue
+        old_status = leave.status or "Pending"
+        if not claim_leave(leave.id, old_status, status, (item.get("remarks") or "").strip()):
+            results.append({"leave_id": leave_id, "ok": False, "error": "Leave was modified concurrently"})
+            continue
+        if status == "Approved":
+            remaining[leave.employee_id][field[0]] -= days
+            per_emp = deductions.setdefault(leave.employee_id, {})
+            per_emp[field[0]] = per_emp.get(field[0], 0) + days
+            touched.update({"balances", f"balance:{leave.employee_id}"})
+        elif old_status == "Approved" and field:
+            days = leave_days(leave, calendar)
+            if leave.employee_id in remaining:
+                remaining[leave.employee_id][field[0]] += days
+            per_emp = credits.setdefault(leave.employee_id, {})
+            per_emp[field[0]] = per_emp.get(field[0], 0) + days
+            touched.update({"balances", f"balance:{leave.employee_id}"})
+        move_leave_stats(leave, old_status, status)
+        move_leave_rollups(leave, old_status, status, calendar)
+        leave.status = status
+        touched.add(f"leaves:{leave.employee_id}")
+        results.append({"leave_id": leave_id, "ok": True, "status": status})
+
+    # Credits first: a deduction later in the batch may rely on days given back earlier in it.
+    for employee_id, cols in credits.items():
+        credit_balance(employee_id, cols)
+    for employee_id, cols in deductions.items():
+        if not deduct_balance(employee_id, cols):
+            db.session.rollback()
+            return jsonify({"error": "Balances changed concurrently, reload and retry"}), 409
+
+    updated = sum(1 for r in results if r["ok"])
+    if updated:
+        record_changes(leaves=[r["leave_id"] for r in results if r["ok"]], balances=sorted(set(deductions) | set(credits)))
+        index_leaves(r["leave_id"] for r in results if r["ok"])
+        bump_versions(*sorted(touched))
+    db.session.commit()
+    return jsonify({"updated": updated, "failed": len(results) - updated, "results": results}), 200
+
+
+@bp.route("/leave_balance/<int:employee_id>", methods=["GET"])
+@conditional("balance:{employee_id}")
 def leave_balance(employee_id: int):
     bal = LeaveBalance.query.filter_by(employee_id=employee_id).first()
     if not bal:
@@ -239,7 +538,49 @@ def leave_balance(employee_id: int):
         "privileged": bal.privileged
     }), 200
 
-@app.route("/employee_balances", methods=["GET"])
+BALANCE_JOB_BUDGET = 10  # seconds of work per request; the caller re-posts to continue
+
+def balance_job_params(data: dict) -> dict:
+    # Resets default to the standard entitlement for every type; accruals only add what is given.
+    mode = data.get("mode", "reset")
+    amounts = data.get("amounts", {})
+    if mode == "reset" and isinstance(amounts, dict):
+        amounts = {**DEFAULT_BALANCE, **amounts}
+    return job_params(mode, amounts, data.get("caps", {}), DEFAULT_BALANCE)
+
+def default_job_name(mode: str) -> str:
+    today = datetime.utcnow()
+    return f"reset-{today.year}" if mode == "reset" else f"accrue-{today:%Y-%m}"
+
+@bp.route("/balance_jobs", methods=["POST"])
+def balance_job():
+    # Body: {"mode": "reset"|"accrue", "name", "amounts": {col: days}, "caps": {col: days}, "chunk_size"}.
+    # Runs for up to BALANCE_JOB_BUDGET seconds: 200 when finished, 202 to be posted again.
+    data = request.get_json(silent=True) or {}
+    try:
+        params = balance_job_params(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    name = str(data.get("name") or default_job_name(params["mode"])).strip()[:60]
+    chunk_size = data.get("chunk_size", BALANCE_JOB_CHUNK)
+    if not isinstance(chunk_size, int) or not 1 <= chunk_size <= 5000:
+        return jsonify({"error": "chunk_size must be between 1 and 5000"}), 400
+    try:
+        start_job(name, params)
+    except JobConflict:
+        return jsonify({"error": f"Job {name} already exists with different parameters"}), 409
+    job = run_job(name, chunk_size, budget=BALANCE_JOB_BUDGET)
+    return jsonify(job_to_dict(job)), 200 if job.finished_at else 202
+
+@bp.route("/balance_jobs/<name>", methods=["GET"])
+def balance_job_status(name: str):
+    job = db.session.get(BalanceJob, name)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_to_dict(job)), 200
+
+@bp.route("/employee_balances", methods=["GET"])
+@conditional("balances", "users")
 def employee_balances():
     rows = db.session.query(User, LeaveBalance)\
         .join(LeaveBalance, LeaveBalance.employee_id == User.id)\
@@ -251,34 +592,442 @@ def employee_balances():
         "privileged": bal.privileged
     } for user, bal in rows]), 200
 
-@app.route("/leave_statistics", methods=["GET"])
+@bp.route("/leave_statistics", methods=["GET"])
 def leave_statistics():
-    total = LeaveRequest.query.count()
-    pending = LeaveRequest.query.filter_by(status="Pending").count()
-    approved = LeaveRequest.query.filter_by(status="Approved").count()
-    rejected = LeaveRequest.query.filter_by(status="Rejected").count()
-    return jsonify({"total": total, "pending": pending, "approved": approved, "rejected": rejected}), 200
+    # Served from the leave_stat counters; ?breakdown=leave_type|employee adds that split.
+    out = leave_totals()
+    breakdown = request.args.get("breakdown")
+    if breakdown == "leave_type":
+        out["by_leave_type"] = read_leave_stats("type")
+    elif breakdown == "employee":
+        out["by_employee"] = read_leave_stats("employee")
+    elif breakdown:
+        return jsonify({"error": "Invalid breakdown. Use leave_type|employee"}), 400
+    return jsonify(out), 200
+
+@bp.route("/reports/utilization", methods=["GET"])
+@conditional("leaves", "users", "calendar")
+def utilization():
+    # ?from=YYYY-MM&to=YYYY-MM (default: this calendar year), optional employee_id and
+    # group=employee for a per-employee breakdown. Answered from leave_rollup only.
+    today = datetime.utcnow().date()
+    try:
+        first = parse_month(request.args.get("from") or f"{today.year}-01")
+        last = parse_month(request.args.get("to") or f"{today.year}-12")
+    except ValueError:
+        return jsonify({"error": "from and to must be months (YYYY-MM)"}), 400
+    months = month_range(first, last)
+    if not months:
+        return jsonify({"error": "to must be on/after from"}), 400
+    if len(months) > REPORT_MAX_MONTHS:
+        return jsonify({"error": f"Range is limited to {REPORT_MAX_MONTHS} months"}), 400
+    group = request.args.get("group", "org")
+    if group not in {"org", "employee"}:
+        return jsonify({"error": "Invalid group. Use org|employee"}), 400
+    entitlements = {leave_type: DEFAULT_BALANCE[col] for leave_type, (col, _) in BALANCE_FIELDS.items()}
+    return jsonify(utilization_report(months, entitlements, request.args.get("employee_id", type=int),
+                                      by_employee=group == "employee")), 200
+
+@bp.route("/working_days", methods=["GET"])
+def working_days():
+    try:
+        start = parse_date(request.args.get("from") or "")
+        end = parse_date(request.args.get("to") or "")
+    except ValueError:
+        return jsonify({"error": "from and to are required (YYYY-MM-DD)"}), 400
+    if end < start:
+        return jsonify({"error": "to must be on/after from"}), 400
+    return jsonify({"from": start.isoformat(), "to": end.isoformat(),
+                    "days": work_calendar().working_days(start, end)}), 200
+
+@bp.route("/holidays", methods=["GET"])
+@conditional("calendar")
+def list_holidays():
+    q = Holiday.query.order_by(Holiday.day)
+    year = request.args.get("year", type=int)
+    if year:
+        q = q.filter(Holiday.day >= datetime(year, 1, 1).date(), Holiday.day <= datetime(year, 12, 31).date())
+    return jsonify({
+        "weekend": [WEEKDAYS[d].capitalize() for d in read_weekend()],
+        "holidays": [{"date": h.day.isoformat(), "name": h.name} for h in q.all()]
+    }), 200
+
+def calendar_changed(days=None):
+    # Charged days moved: the rollups of the months holding the changed days (every month for a
+    # weekend change) are recomputed in the same transaction as the calendar write.
+    months = None if days is None else {d.strftime("%Y-%m") for d in days}
+    rebuilt = replace_leave_rollups(months)
+    db.session.commit()
+    return rebuilt
+
+@bp.route("/holidays", methods=["POST"])
+def add_holidays():
+    # Body: [{"date", "name"}, ...] (or {"items": [...]}); existing dates are renamed.
+    # Balances already deducted for approved leave are not re-credited.
+    data = request.get_json(silent=True)
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "A non-empty list of {date, name} is required"}), 400
+    parsed = {}
+    for item in items:
+        try:
+            parsed[parse_date(item.get("date") or "")] = (item.get("name") or "").strip()
+        except (AttributeError, ValueError):
+            return jsonify({"error": f"Invalid holiday entry: {item}"}), 400
+    save_holidays(sorted(parsed.items()))
+    rebuilt = calendar_changed(parsed)
+    return jsonify({"message": f"{len(parsed)} holidays saved", "rollups_rebuilt": rebuilt}), 200
+
+@bp.route("/holidays/<day>", methods=["DELETE"])
+def remove_holiday(day: str):
+    try:
+        parsed = parse_date(day)
+    except ValueError:
+        return jsonify({"error": "Invalid date format (use YYYY-MM-DD)"}), 400
+    if not delete_holiday(parsed):
+        return jsonify({"error": "Holiday not found"}), 404
+    rebuilt = calendar_changed([parsed])
+    return jsonify({"message": f"Holiday {parsed.isoformat()} removed", "rollups_rebuilt": rebuilt}), 200
+
+@bp.route("/weekend", methods=["PUT"])
+def update_weekend():
+    # Body: {"days": ["Saturday", "Sunday"]}; an empty list makes every day a working day.
+    days = (request.get_json(silent=True) or {}).get("days")
+    if not isinstance(days, list):
+        return jsonify({"error": "days must be a list of weekday names"}), 400
+    try:
+        weekend = parse_weekdays(days)
+    except ValueError as e:
+        return jsonify({"error": f"Unknown weekday: {e}"}), 400
+    if len(weekend) == len(WEEKDAYS):
+        return jsonify({"error": "At least one working day is required"}), 400
+    set_weekend(weekend)
+    rebuilt = calendar_changed()
+    return jsonify({"weekend": [WEEKDAYS[d].capitalize() for d in weekend], "rollups_rebuilt": rebuilt}), 200
+
+CALENDAR_MAX_DAYS = 366
+
+@bp.route("/calendar", methods=["GET"])
+def calendar():
+    # Who is out on each day of [from, to]: one indexed range scan, then a sweep over
+    # start/end events, so the cost is O(leaves in range + days) rather than per employee.
+    try:
+        start = parse_date(request.args.get("from") or "")
+        end = parse_date(request.args.get("to") or "")
+    except ValueError:
+        return jsonify({"error": "from and to are required (YYYY-MM-DD)"}), 400
+    if end < start:
+        return jsonify({"error": "to must be on/after from"}), 400
+    if (end - start).days >= CALENDAR_MAX_DAYS:
+        return jsonify({"error": f"Range is limited to {CALENDAR_MAX_DAYS} days"}), 400
+    statuses = request.args.getlist("status") or ["Approved"]
+
+    leave = leave_source(include_archived(request.args))
+    rows = db.session.query(
+        leave.employee_id, User.username, leave.start_date, leave.end_date
+    ).join(User, leave.employee_id == User.id)\
+        .filter(leave.end_date >= start, leave.start_date <= end,
+                leave.status.in_(statuses)).all()
+
+    span = (end - start).days + 1
+    arrivals = [[] for _ in range(span + 1)]
+    departures = [[] for _ in range(span + 1)]
+    names = {}
+    for employee_id, username, sd, ed in rows:
+        names[employee_id] = username
+        arrivals[max((sd - start).days, 0)].append(employee_id)
+        departures[min((ed - start).days, span - 1) + 1].append(employee_id)
+
+    out_now = {}
+    days = []
+    for offset in range(span):
+        for emp_id in departures[offset]:
+            out_now[emp_id] -= 1
+            if not out_now[emp_id]:
+                del out_now[emp_id]
+        for emp_id in arrivals[offset]:
+            out_now[emp_id] = out_now.get(emp_id, 0) + 1
+        days.append({
+            "date": (start + timedelta(days=offset)).isoformat(),
+            "count": len(out_now),
+            "employee_ids": sorted(out_now)
+        })
+    return jsonify({
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "employees": {str(k): v for k, v in names.items()},
+        "days": days
+    }), 200
+
+CHANGES_MAX_ROWS = 2000
+SSE_POLL_INTERVAL = float(os.getenv("SSE_POLL_INTERVAL", "1.0"))
+SSE_HEARTBEAT_SECONDS = 15
+# Streams end after this long and EventSource reconnects with Last-Event-ID, so a
+# worker thread is never pinned by one client indefinitely.
+SSE_MAX_SECONDS = int(os.getenv("SSE_MAX_SECONDS", "300"))
+# Each open stream holds one of the worker's WEB_THREADS gthread threads for its whole life,
+# so a worker serves at most this many (a quarter of its threads by default). Clients above
+# the cap get 503 with Retry-After and keep polling /changes in the meantime.
+SSE_MAX_STREAMS = int(os.getenv("SSE_MAX_STREAMS", str(max(1, int(os.getenv("WEB_THREADS", "4")) // 4))))
+SSE_RETRY_AFTER_SECONDS = 30
+_streams = threading.BoundedSemaphore(SSE_MAX_STREAMS) if SSE_MAX_STREAMS > 0 else None
+
+def user_to_dict(u: User) -> dict:
+    return {"id": u.id, "username": u.username, "role": u.role, "approved": bool(u.approved)}
+
+def balance_to_dict(b: LeaveBalance, user: User) -> dict:
+    return {
+        "employee_id": b.employee_id,
+        "username": user.username,
+        "sick_casual": b.sick_casual,
+        "medical": b.medical,
+        "privileged": b.privileged
+    }
+
+def head_version() -> int:
+    return db.session.query(func.max(OutboxEvent.seq)).scalar() or 0
+
+def changeset(since: int) -> dict:
+    # The outbox seq doubles as the change version. Rows are read after the version, so a
+    # row may already be newer than it; the next delta then re-sends it, which is harmless.
+    version = head_version()
+    keys = {"user": set(), "leave": set(), "balance": set()}
+    # A client from before the last compacted deletion may hold rows that no longer exist.
+    usable = 0 < since <= version and since >= compacted_through()
+    if usable:
+        changed = db.session.query(OutboxEvent.entity, OutboxEvent.key).filter(
+            OutboxEvent.seq > since, OutboxEvent.seq <= version
+        ).distinct().limit(CHANGES_MAX_ROWS + 1).all()
+        for entity, key in changed:
+            keys[entity].add(key)
+    reset = not usable or sum(map(len, keys.values())) > CHANGES_MAX_ROWS
+
+    leaves = db.session.query(LeaveRequest, User).join(User, LeaveRequest.employee_id == User.id)
+    users = User.query
+    balances = db.session.query(LeaveBalance, User).join(User, LeaveBalance.employee_id == User.id)
+    if not reset:
+        leaves = leaves.filter(LeaveRequest.id.in_(keys["leave"]))
+        users = users.filter(User.id.in_(keys["user"]))
+        balances = balances.filter(LeaveBalance.employee_id.in_(keys["balance"]))
+    leaves = [leave_to_dict(leave, user) for leave, user in leaves.order_by(LeaveRequest.id).all()]
+    return {
+        "version": version,
+        # reset: replace the local copy with these rows instead of patching it.
+        "reset": reset,
+        "leaves": leaves,
+        "deleted_leaves": sorted(keys["leave"] - {l["id"] for l in leaves}),
+        "users": [user_to_dict(u) for u in users.order_by(User.id).all()],
+        "balances": [balance_to_dict(b, u) for b, u in balances.order_by(LeaveBalance.employee_id).all()]
+    }
+
+@bp.route("/changes", methods=["GET"])
+def changes():
+    # ?since=<version> from the previous response; 0 (or a stale version) returns everything.
+    return jsonify(changeset(request.args.get("since", default=0, type=int))), 200
 
-@app.route("/health", methods=["GET"])
+def change_events(since: int):
+    yield "retry: 2000\n\n"
+    started = last_sent = time.monotonic()
+    while time.monotonic() - started < SSE_MAX_SECONDS:
+        if head_version() != since:
+            delta = changeset(since)
+            since = delta["version"]
+            yield f"id: {since}\nevent: changes\ndata: {json.dumps(delta)}\n\n"
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= SSE_HEARTBEAT_SECONDS:
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
+        # Hand the pooled connection back while idle; streams must not exhaust the pool.
+        db.session.close()
+        time.sleep(SSE_POLL_INTERVAL)
+
+@bp.route("/changes/stream", methods=["GET"])
+def changes_stream():
+    # Server-sent events carrying the same deltas as /changes. A reconnecting EventSource
+    # sends Last-Event-ID, which takes precedence over ?since=.
+    since = request.headers.get("Last-Event-ID", type=int)
+    if since is None:
+        since = request.args.get("since", default=0, type=int)
+    if not _streams or not _streams.acquire(blocking=False):
+        return jsonify({"error": "Too many open change streams, poll /changes instead"}), 503, {
+            "Retry-After": str(SSE_RETRY_AFTER_SECONDS)}
+    resp = Response(stream_with_context(change_events(since)), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+    # Released when the server closes the response, even if the client left before the first event.
+    resp.call_on_close(_streams.release)
+    return resp
+
+@bp.route("/outbox", methods=["GET"])
+def outbox():
+    # Replication feed for manager_service: ?after=<last applied seq>&limit=N, oldest first.
+    after = request.args.get("after", default=0, type=int)
+    limit = request.args.get("limit", default=500, type=int)
+    return jsonify(read_events(after, limit)), 200
+
+@bp.route("/outbox/prune", methods=["POST"])
+def prune_outbox():
+    # Body: {"through": <seq>}, the replica's acknowledged last_seq; see outbox.compact_outbox.
+    through = (request.get_json(silent=True) or {}).get("through")
+    if not isinstance(through, int) or isinstance(through, bool) or through < 0:
+        return jsonify({"error": "through must be a non-negative integer seq"}), 400
+    removed = compact_outbox(through)
+    return jsonify({"through": through, "removed": removed, "compacted_through": compacted_through()}), 200
+
+@bp.route("/health", methods=["GET"])
 def health():
     return jsonify({"status": "employee-ok"}), 200
 
 
-with app.app_context():
-    db.create_all()
-    if not User.query.filter_by(username="manager", role="manager").first():
-        m = User(
-            username="manager",
-            password=generate_password_hash("manager123"),
-            role="manager",
-            approved=True
-        )
-        db.session.add(m)
-        db.session.commit()
-        print("✅ Seeded manager: manager / manager123")
+@bp.cli.command("migrate")
+def migrate_command():
+    upgrade_schema()
+    click.echo("Schema is up to date")
+
+
+@bp.cli.command("bootstrap")
+def bootstrap_command():
+    for message in bootstrap():
+        click.echo(message)
+
+
+@bp.cli.command("rebuild-stats")
+@click.option("--check", is_flag=True, help="Only report drift, do not rewrite the counters.")
+def rebuild_stats_command(check: bool):
+    if check:
+        expected, stored = compute_leave_stats(), stored_leave_stats()
+        drift = {k: (stored.get(k, 0), v) for k, v in expected.items() if stored.get(k, 0) != v}
+        drift.update({k: (v, 0) for k, v in stored.items() if k not in expected})
+        for (scope, key, status), (have, want) in sorted(drift.items()):
+            click.echo(f"{scope}:{key}:{status} stored={have} actual={want}")
+        click.echo("leave_stat is consistent" if not drift else f"{len(drift)} counters out of sync")
+        raise SystemExit(1 if drift else 0)
+    click.echo(f"Rebuilt {rebuild_leave_stats()} leave_stat counters")
+
+
+@bp.cli.command("rebuild-rollups")
+@click.option("--check", is_flag=True, help="Only report drift, do not rewrite the rollups.")
+@click.option("--batch-size", type=int, default=5000, show_default=True, help="Leaves read per batch.")
+def rebuild_rollups_command(check: bool, batch_size: int):
+    if check:
+        expected, stored = compute_leave_rollups(batch_size), stored_leave_rollups()
+        drift = {k: (stored.get(k, 0), v) for k, v in expected.items() if stored.get(k, 0) != v}
+        drift.update({k: (v, 0) for k, v in stored.items() if k not in expected})
+        for (month, employee_id, leave_type), (have, want) in sorted(drift.items()):
+            click.echo(f"{month} employee={employee_id} {leave_type} stored={have} actual={want}")
+        click.echo("leave_rollup is consistent" if not drift else f"{len(drift)} rollups out of sync")
+        raise SystemExit(1 if drift else 0)
+    click.echo(f"Rebuilt {rebuild_leave_rollups(batch_size)} leave_rollup rows")
+
+
+def parse_balance_option(values) -> dict:
+    out = {}
+    for value in values:
+        col, _, days = value.partition("=")
+        if not days.isdigit():
+            raise click.BadParameter(f"expected TYPE=DAYS, got {value}")
+        out[col] = int(days)
+    return out
+
+
+@bp.cli.command("balance-job")
+@click.option("--mode", type=click.Choice(["reset", "accrue"]), default="reset", show_default=True)
+@click.option("--name", help="Job name; defaults to reset-YEAR or accrue-YEAR-MONTH. Re-run to resume.")
+@click.option("--amount", multiple=True, help="TYPE=DAYS granted (reset defaults to the standard entitlement).")
+@click.option("--cap", multiple=True, help="TYPE=DAYS carried forward (reset) or maximum balance (accrue).")
+@click.option("--chunk-size", type=int, default=BALANCE_JOB_CHUNK, show_default=True, help="Balances per transaction.")
+@click.option("--pause", type=float, default=BALANCE_JOB_PAUSE, show_default=True, help="Seconds between chunks.")
+def balance_job_command(mode, name, amount, cap, chunk_size, pause):
+    try:
+        params = balance_job_params({"mode": mode, "amounts": parse_balance_option(amount),
+                                     "caps": parse_balance_option(cap)})
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    name = name or default_job_name(mode)
+    try:
+        job = start_job(name, params)
+    except JobConflict:
+        raise click.UsageError(f"Job {name} already exists with different parameters")
+    if job.finished_at:
+        click.echo(f"{name} already finished at {job.finished_at:%Y-%m-%d %H:%M:%S}, {job.processed} balances")
+        return
+    job = run_job(name, chunk_size, pause, progress=lambda j: click.echo(f"\r{j.processed} balances", nl=False))
+    click.echo()
+    click.echo(f"{name} finished: {job.processed} balances updated")
+
+
+@bp.cli.command("rebuild-search")
+@click.option("--check", is_flag=True, help="Only report leaves missing from the index, do not rebuild it.")
+def rebuild_search_command(check: bool):
+    if check:
+        missing, stale = unindexed_leaves()
+        click.echo("leave_search is consistent" if not (missing or stale)
+                   else f"{missing} leaves not indexed, {stale} stale index rows")
+        raise SystemExit(1 if missing or stale else 0)
+    click.echo(f"Indexed {rebuild_search_index()} leaves")
+
+
+@bp.cli.command("archive-leaves")
+@click.option("--before", help="Archive decided leaves ending before this date (YYYY-MM-DD).")
+@click.option("--days", type=int, default=ARCHIVE_AFTER_DAYS, show_default=True,
+              help="Without --before: archive leaves that ended more than this many days ago.")
+@click.option("--chunk-size", type=int, default=ARCHIVE_CHUNK, show_default=True, help="Leaves moved per transaction.")
+@click.option("--pause", type=float, default=ARCHIVE_PAUSE, show_default=True, help="Seconds between chunks.")
+@click.option("--interval", type=float, help="Keep running, archiving again every this many seconds.")
+def archive_leaves_command(before, days, chunk_size, pause, interval):
+    while True:
+        try:
+            cutoff = parse_date(before) if before else default_cutoff(days)
+        except ValueError:
+            raise click.BadParameter("use YYYY-MM-DD", param_hint="--before")
+        moved = archive_leaves(cutoff, chunk_size, pause)
+        click.echo(f"Archived {moved} leaves that ended before {cutoff.isoformat()}")
+        if not interval:
+            return
+        time.sleep(interval)
+
+
+@bp.cli.command("import-employees")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), help="Defaults to the file extension.")
+@click.option("--approve", is_flag=True, help="Approve everyone and create their leave balances.")
+@click.option("--workers", type=int, default=None, help="Password hashing processes (default: CPU count).")
+@click.option("--batch-size", type=int, default=500)
+def import_employees_command(path, fmt, approve, workers, batch_size):
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, "rb") as fh:
+        try:
+            summary = import_employees(
+                iter_records(fh, fmt), approve=approve, workers=workers, batch_size=batch_size,
+                progress=lambda s: click.echo(
+                    f"\r{s['processed']} processed, {s['created']} created, "
+                    f"{s['duplicates']} duplicates, {s['invalid']} invalid", nl=False)
+            )
+        except InvalidUpload as e:
+            click.echo()
+            raise click.ClickException(f"{path}: {e}; {e.summary['created']} employees were created before it")
+    click.echo()
+    for err in summary["errors"]:
+        click.echo(f"record {err['record']}: {err['error']}", err=True)
+
+
+def create_app(config=Config):
+    app = Flask(__name__)
+    CORS(app, supports_credentials=True)
+    app.config.from_object(config)
+    db.init_app(app)
+    tune_sqlite(app)
+    init_metrics(app, db)
+    app.register_blueprint(bp)
+    return app
 
 
+app = create_app()
 
 
 if __name__ == "__main__":
+    with app.app_context():
+        for message in bootstrap():
+            print(message)
     app.run(host="0.0.0.0", port=8001)
@@ -0,0 +1,67 @@
+import os
+import time
+from datetime import date, datetime, timedelta
+from sqlalchemy import String, cast, literal, select, union_all
+from sqlalchemy.orm import aliased
+from extension import db
+from models import LeaveRequest, LeaveArchive
+from outbox import record_changes
+from versions import bump_versions, bump_versions_from
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVE_CHUNK = int(os.getenv("ARCHIVE_CHUNK", "500"))
+ARCHIVE_PAUSE = float(os.getenv("ARCHIVE_PAUSE", "0.02"))
+DECIDED = ("Approved", "Rejected")
+LEAVE_COLUMNS = tuple(c.name for c in LeaveRequest.__table__.columns)
+
+
+def default_cutoff(days: int = ARCHIVE_AFTER_DAYS) -> date:
+    return date.today() - timedelta(days=days)
+
+
+def leaves_with_archive():
+    """LeaveRequest mapped over leave_request UNION ALL leave_archive, for history that must include both."""
+    live, archive = LeaveRequest.__table__, LeaveArchive.__table__
+    union = union_all(select(*(live.c[n] for n in LEAVE_COLUMNS)),
+                      select(*(archive.c[n] for n in LEAVE_COLUMNS))).subquery("leave_all")
+    return aliased(LeaveRequest, union)
+
+
+def leave_source(include_archived: bool):
+    # The archive is only read when a caller asks for it; hot paths stay on leave_request.
+    return leaves_with_archive() if include_archived else LeaveRequest
+
+
+def archive_chunk(cutoff: date, chunk_size: int = ARCHIVE_CHUNK) -> int:
+    """Move the next chunk of decided leaves ending before cutoff in one short transaction."""
+    live, archive = LeaveRequest.__table__, LeaveArchive.__table__
+    eligible = (live.c.status.in_(DECIDED), live.c.end_date < cutoff)
+    ids = db.session.execute(select(live.c.id).where(*eligible).order_by(live.c.id).limit(chunk_size)).scalars().all()
+    if not ids:
+        db.session.rollback()
+        return 0
+    # The copy is the first write and re-checks eligibility under the write lock, so a leave
+    # decided back to Pending in the meantime stays put; the delete removes exactly what was copied.
+    db.session.execute(archive.insert().from_select(
+        LEAVE_COLUMNS + ("archived_at",),
+        select(*(live.c[n] for n in LEAVE_COLUMNS), literal(datetime.utcnow())).where(live.c.id.in_(ids), *eligible)))
+    moved = db.session.execute(select(archive.c.id).where(archive.c.id.in_(ids))).scalars().all()
+    db.session.execute(live.delete().where(live.c.id.in_(moved)))
+    # Stats, rollups and the search index keep archived leaves; replicas and /changes clients drop them.
+    record_changes(deleted_leaves=moved)
+    bump_versions("leaves")
+    bump_versions_from(select(literal("leaves:") + cast(archive.c.employee_id, String))
+                       .where(archive.c.id.in_(moved)))
+    db.session.commit()
+    return len(moved)
+
+
+def archive_leaves(cutoff: date, chunk_size: int = ARCHIVE_CHUNK, pause: float = ARCHIVE_PAUSE, progress=None) -> int:
+    # Resumable by construction: every chunk commits on its own and the next run starts from what is left.
+    total = 0
+    while moved := archive_chunk(cutoff, chunk_size):
+        total += moved
+        if progress:
+            progress(total)
+        time.sleep(pause)
+    return total
@@ -0,0 +1,123 @@
+import json
+import os
+import time
+from datetime import datetime
+from sqlalchemy import String, cast, func, literal, select
+from sqlalchemy.dialects.sqlite import insert
+from extension import db
+from models import BalanceJob, LeaveBalance
+from outbox import record_changes
+from versions import bump_versions, bump_versions_from
+
+BALANCE_JOB_CHUNK = int(os.getenv("BALANCE_JOB_CHUNK", "500"))
+BALANCE_JOB_PAUSE = float(os.getenv("BALANCE_JOB_PAUSE", "0.02"))
+MODES = ("reset", "accrue")
+
+
+class JobConflict(Exception):
+    """A job with this name already exists with different parameters."""
+
+
+def job_params(mode: str, amounts: dict, caps: dict, columns) -> dict:
+    # reset:  col = amount + min(col, cap)   (cap = days carried forward, 0 if not given)
+    # accrue: col = min(col + amount, cap)   (cap = ceiling on the balance, none if not given)
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+    for label, values in (("amounts", amounts), ("caps", caps)):
+        if not isinstance(values, dict):
+            raise ValueError(f"{label} must be an object")
+        for col, n in values.items():
+            if col not in columns:
+                raise ValueError(f"Unknown balance type in {label}: {col}")
+            if not isinstance(n, int) or isinstance(n, bool) or n < 0:
+                raise ValueError(f"{label}.{col} must be a non-negative integer")
+    if mode == "accrue" and not any(amounts.values()):
+        raise ValueError("accrue needs a positive amount for at least one balance type")
+    return {"mode": mode, "amounts": {c: amounts.get(c, 0) for c in columns},
+            "caps": {c: caps[c] for c in columns if c in caps}}
+
+
+def _new_values(params: dict) -> dict:
+    table = LeaveBalance.__table__
+    out = {}
+    for col, amount in params["amounts"].items():
+        cap = params["caps"].get(col)
+        if params["mode"] == "reset":
+            out[col] = amount + func.min(table.c[col], cap or 0)
+        elif not amount:
+            continue
+        elif cap is not None:
+            # Accrual stops at the cap but never takes away days already above it.
+            out[col] = func.max(table.c[col], func.min(table.c[col] + amount, cap))
+        else:
+            out[col] = table.c[col] + amount
+    return out
+
+
+def job_to_dict(job: BalanceJob) -> dict:
+    return {
+        "name": job.name,
+        **json.loads(job.params),
+        "cursor": job.cursor,
+        "processed": job.processed,
+        "started_at": job.started_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "done": job.finished_at is not None,
+    }
+
+
+def start_job(name: str, params: dict) -> BalanceJob:
+    # Re-submitting the same job resumes (or reports) it; the same name with other parameters is refused.
+    stmt = insert(BalanceJob).values(name=name, params=json.dumps(params, sort_keys=True), cursor=0,
+                                     processed=0, started_at=datetime.utcnow())
+    db.session.execute(stmt.on_conflict_do_nothing(index_elements=["name"]))
+    db.session.commit()
+    job = db.session.get(BalanceJob, name)
+    if json.loads(job.params) != params:
+        raise JobConflict(name)
+    return job
+
+
+def run_chunk(name: str, chunk_size: int = BALANCE_JOB_CHUNK) -> int:
+    """Apply the job to the next chunk of balances in one short transaction; returns rows updated."""
+    jobs, balances = BalanceJob.__table__, LeaveBalance.__table__
+    # Write first: the job row update takes the SQLite write lock, so the cursor read below cannot
+    # race another runner of the same job. No row means the job is already finished.
+    if not db.session.execute(jobs.update().where(jobs.c.name == name, jobs.c.finished_at.is_(None))
+                              .values(name=name)).rowcount:
+        db.session.rollback()
+        return 0
+    job = db.session.get(BalanceJob, name, populate_existing=True)
+    ids = db.session.execute(select(balances.c.employee_id).where(balances.c.employee_id > job.cursor)
+                             .order_by(balances.c.employee_id).limit(chunk_size)).scalars().all()
+    if not ids:
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return 0
+    lo, hi = job.cursor, ids[-1]
+    values = _new_values(json.loads(job.params))
+    if values:
+        db.session.execute(balances.update().where(balances.c.employee_id > lo, balances.c.employee_id <= hi)
+                           .values(values))
+        record_changes(balances=ids)
+        bump_versions("balances")
+        # The per-employee ETag counters of the whole chunk in one INSERT ... SELECT.
+        bump_versions_from(select(literal("balance:") + cast(balances.c.employee_id, String))
+                           .where(balances.c.employee_id > lo, balances.c.employee_id <= hi))
+    job.cursor, job.processed = hi, job.processed + len(ids)
+    db.session.commit()
+    return len(ids)
+
+
+def run_job(name: str, chunk_size: int = BALANCE_JOB_CHUNK, pause: float = BALANCE_JOB_PAUSE,
+            budget: float | None = None, progress=None) -> BalanceJob:
+    # Chunks commit one at a time with a pause in between, so live requests waiting on the write
+    # lock get it after at most one chunk. With a budget the caller resumes later with the same name.
+    deadline = time.monotonic() + budget if budget is not None else None
+    while run_chunk(name, chunk_size):
+        if progress:
+            progress(db.session.get(BalanceJob, name))
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        time.sleep(pause)
+    return db.session.get(BalanceJob, name, populate_existing=True)
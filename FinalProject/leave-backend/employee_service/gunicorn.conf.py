@@ -0,0 +1,24 @@
+import os
+
+# Production serving: python app.py stays as the single-process dev server.
+bind = f"0.0.0.0:{os.getenv('PORT', '8001')}"
+workers = int(os.getenv("WEB_WORKERS", "2"))
+# Every open /changes/stream holds a thread for up to SSE_MAX_SECONDS; app.py caps them per
+# worker at SSE_MAX_STREAMS (WEB_THREADS // 4 by default), so raise WEB_THREADS to serve more.
+threads = int(os.getenv("WEB_THREADS", "4"))
+worker_class = "gthread"
+timeout = int(os.getenv("WEB_TIMEOUT", "60"))
+keepalive = 5
+accesslog = "-"
+
+# Importing app is side-effect free (schema and seeding live in `flask bootstrap`), so this
+# only shares the loaded code with the workers.
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Nothing in the master should have connected, but never let workers share a SQLite handle.
+    from app import app
+    from extension import db
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,97 @@
+import os
+from sqlalchemy import inspect, text
+from werkzeug.security import generate_password_hash
+from extension import db
+from models import User, LeaveRequest, LeaveArchive, LeaveStat, LeaveRollup
+from stats import rebuild_leave_stats
+from rollups import rebuild_leave_rollups
+from outbox import record_changes, backfill_outbox
+from search import create_search_index, indexed_count, rebuild_search_index
+
+# Legacy rows may hold DD-MM-YYYY; rewrite them to ISO while copying.
+_ISO = ("CASE WHEN {c} LIKE '__-__-____' "
+        "THEN substr({c}, 7, 4) || '-' || substr({c}, 4, 2) || '-' || substr({c}, 1, 2) "
+        "ELSE {c} END")
+
+
+def _rebuild_leave_request():
+    # SQLite can neither ALTER a column's type nor add AUTOINCREMENT, so older leave_request
+    # tables (text dates, reusable ids) are rebuilt from the current model.
+    columns = {c["name"]: c for c in inspect(db.engine).get_columns("leave_request")}
+    with db.engine.connect() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'leave_request'")).scalar()
+    if "DATE" in str(columns["start_date"]["type"]).upper() and "AUTOINCREMENT" in ddl.upper():
+        return False
+    names = [c.name for c in LeaveRequest.__table__.columns]
+    select_list = ", ".join(
+        _ISO.format(c=n) if n in {"start_date", "end_date"} else n for n in names
+    )
+    with db.engine.begin() as conn:
+        for index in inspect(conn).get_indexes("leave_request"):
+            conn.execute(text(f'DROP INDEX IF EXISTS "{index["name"]}"'))
+        conn.execute(text("ALTER TABLE leave_request RENAME TO leave_request_old"))
+        LeaveRequest.__table__.create(bind=conn)
+        conn.execute(text(
+            f"INSERT INTO leave_request ({', '.join(names)}) SELECT {select_list} FROM leave_request_old"
+        ))
+        conn.execute(text("DROP TABLE leave_request_old"))
+    return True
+
+
+def _sync_leave_sequence():
+    # Archived leaves can sit above every live id, so the next id starts past both tables.
+    with db.engine.begin() as conn:
+        floor = max(conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {t}")).scalar()
+                    for t in (LeaveRequest.__tablename__, LeaveArchive.__tablename__))
+        synced = conn.execute(text("UPDATE sqlite_sequence SET seq = max(seq, :floor) WHERE name = 'leave_request'"),
+                              {"floor": floor}).rowcount
+        if not synced:
+            conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('leave_request', :floor)"),
+                         {"floor": floor})
+
+
+def _ensure_sqlite_dir():
+    if db.engine.dialect.name == "sqlite" and db.engine.url.database:
+        os.makedirs(os.path.dirname(os.path.abspath(db.engine.url.database)), exist_ok=True)
+
+
+def upgrade_schema():
+    _ensure_sqlite_dir()
+    db.create_all()
+    if db.engine.dialect.name == "sqlite":
+        _rebuild_leave_request()
+        _sync_leave_sequence()
+    create_search_index()
+    # create_all() skips indexes on tables that already exist, so add any new ones explicitly.
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+
+def bootstrap():
+    # Run once per deploy (flask bootstrap), not per worker; every step is idempotent.
+    messages = []
+    upgrade_schema()
+    messages.append("Schema is up to date")
+    if not User.query.filter_by(username="manager", role="manager").first():
+        manager = User(
+            username="manager",
+            password=generate_password_hash("manager123"),
+            role="manager",
+            approved=True
+        )
+        db.session.add(manager)
+        db.session.flush()
+        record_changes(users=[manager.id])
+        db.session.commit()
+        messages.append("✅ Seeded manager: manager / manager123")
+    if not LeaveStat.query.first() and LeaveRequest.query.first():
+        messages.append(f"Rebuilt {rebuild_leave_stats()} leave_stat counters")
+    if not LeaveRollup.query.first() and LeaveRequest.query.filter_by(status="Approved").first():
+        messages.append(f"Backfilled {rebuild_leave_rollups()} leave_rollup rows")
+    if not indexed_count() and LeaveRequest.query.first():
+        messages.append(f"Indexed {rebuild_search_index()} leaves for search")
+    backfilled = backfill_outbox()
+    if backfilled:
+        messages.append(f"Backfilled the outbox with {backfilled} row snapshots")
+    return messages
@@ -1,8 +1,10 @@
 from extension import db
+from datetime import datetime
 from werkzeug.security import generate_password_hash
 
 class User(db.Model):
     __tablename__ = "user"
+    __table_args__ = (db.Index("ix_user_role_approved", "role", "approved"),)
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)
@@ -21,17 +23,44 @@ class User(db.Model):
 
 class LeaveRequest(db.Model):
     __tablename__ = "leave_request"
+    __table_args__ = (
+        db.Index("ix_leave_request_employee_status", "employee_id", "status"),
+        # Overlap checks: one employee's leaves ordered by start.
+        db.Index("ix_leave_request_employee_start", "employee_id", "start_date", "end_date"),
+        # Calendar range scans: end_date >= :from narrows, start_date <= :to is checked in the index.
+        db.Index("ix_leave_request_end_start", "end_date", "start_date"),
+        # Ids are never handed out twice, so a leave deleted or archived keeps its id to itself.
+        {"sqlite_autoincrement": True},
+    )
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     reason = db.Column(db.String(200), nullable=False)
     leave_type = db.Column(db.String(20), nullable=False)  
-    start_date = db.Column(db.String(20), nullable=False)  
-    end_date = db.Column(db.String(20), nullable=False)     
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
     status = db.Column(db.String(20), default="Pending")    
     remarks = db.Column(db.String(200), nullable=True)
 
     employee = db.relationship("User", backref="leave_requests")
 
+class LeaveArchive(db.Model):
+    # Approved/Rejected leaves moved out of leave_request once they end before the archive cutoff.
+    # Same columns and ids, so reads that ask for include_archived can UNION ALL the two tables.
+    __tablename__ = "leave_archive"
+    __table_args__ = (
+        db.Index("ix_leave_archive_employee_start", "employee_id", "start_date", "end_date"),
+        db.Index("ix_leave_archive_end_start", "end_date", "start_date"),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    employee_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    reason = db.Column(db.String(200), nullable=False)
+    leave_type = db.Column(db.String(20), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    remarks = db.Column(db.String(200), nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
 class LeaveBalance(db.Model):
     __tablename__ = "leave_balance"
     id = db.Column(db.Integer, primary_key=True)
@@ -41,3 +70,67 @@ class LeaveBalance(db.Model):
     privileged = db.Column(db.Integer, default=18)
 
     employee = db.relationship("User", backref=db.backref("leave_balance", uselist=False))
+
+class LeaveStat(db.Model):
+    # Running leave counts, maintained in the same transaction as every leave write.
+    # scope is "all" (key ""), "type" (key = leave_type) or "employee" (key = employee id).
+    __tablename__ = "leave_stat"
+    scope = db.Column(db.String(10), primary_key=True)
+    key = db.Column(db.String(20), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class LeaveRollup(db.Model):
+    # Approved working days per calendar month, employee and leave type, kept in step with every
+    # approval change and rebuilt when the holiday calendar changes; utilization reports read only this table.
+    __tablename__ = "leave_rollup"
+    __table_args__ = (db.Index("ix_leave_rollup_employee_month", "employee_id", "month"),)
+    month = db.Column(db.String(7), primary_key=True)  # "YYYY-MM"
+    employee_id = db.Column(db.Integer, primary_key=True)
+    leave_type = db.Column(db.String(20), primary_key=True)
+    days = db.Column(db.Integer, nullable=False, default=0)
+
+class Holiday(db.Model):
+    # Public holidays; together with the weekend setting they define which days leave is charged for.
+    __tablename__ = "holiday"
+    day = db.Column(db.Date, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, default="")
+
+class CalendarSetting(db.Model):
+    # Key/value calendar configuration, e.g. "weekend" -> "5,6" (Monday is 0).
+    __tablename__ = "calendar_setting"
+    name = db.Column(db.String(40), primary_key=True)
+    value = db.Column(db.String(200), nullable=False)
+
+class BalanceJob(db.Model):
+    # One row per annual reset or accrual run. The cursor commits with each chunk it covers, so a
+    # job resumes where it stopped and a finished job is never applied twice.
+    __tablename__ = "balance_job"
+    name = db.Column(db.String(60), primary_key=True)
+    params = db.Column(db.Text, nullable=False)  # JSON: mode, amounts, caps
+    cursor = db.Column(db.Integer, nullable=False, default=0)  # last employee id processed
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+class DataVersion(db.Model):
+    # Write counters used as ETag validators, e.g. "leaves", "leaves:42", "balance:42".
+    __tablename__ = "data_version"
+    name = db.Column(db.String(40), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class OutboxEvent(db.Model):
+    # Row snapshots written in the same transaction as the change; seq is the replication cursor.
+    # AUTOINCREMENT so a seq is never reused, even after old events are pruned (outbox.compact_outbox).
+    __tablename__ = "outbox_event"
+    __table_args__ = (
+        # Compaction: is there a newer event for the same row?
+        db.Index("ix_outbox_event_entity_key_seq", "entity", "key", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+    seq = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)  # "user", "leave" or "balance"
+    key = db.Column(db.Integer, nullable=False)  # user id, leave id, or employee id for balances
+    op = db.Column(db.String(10), nullable=False, default="upsert")  # "upsert" or "delete"
+    payload = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
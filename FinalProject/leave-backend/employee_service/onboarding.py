@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from werkzeug.security import generate_password_hash
+from extension import db
+from models import User, LeaveBalance
+from versions import bump_versions
+from outbox import record_changes
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+MAX_REPORTED_ERRORS = 100
+USERNAME_MAX_LENGTH = 50
+TRUTHY = {"1", "true", "yes", "y"}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class InvalidUpload(ValueError):
+    """The body itself cannot be read (not UTF-8, broken CSV); nothing after this point is imported."""
+
+
+class BadRecord:
+    # Stands in for a line that did not parse, so it is counted and reported in order.
+    def __init__(self, error: str):
+        self.error = error
+
+
+def iter_records(stream, fmt: str):
+    # Reads the binary stream incrementally; nothing holds the whole file in memory.
+    if fmt not in {"csv", "jsonl"}:
+        raise ValueError("format must be csv or jsonl")
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    try:
+        if fmt == "csv":
+            for row in csv.DictReader(text):
+                yield row
+            return
+        for line in text:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield BadRecord("line is not valid JSON")
+    except UnicodeDecodeError:
+        raise InvalidUpload("body is not valid UTF-8")
+    except csv.Error as e:
+        raise InvalidUpload(f"malformed CSV: {e}")
+
+
+def hashing_pool(workers: int | None = None) -> ProcessPoolExecutor:
+    # One long-lived pool per process and size, shared by every import. forkserver children are
+    # forked from a clean single-threaded server, never from a gthread worker whose other threads
+    # may hold locks mid-fork.
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("forkserver"))
+        return pool
+
+
+def _chunks(iterable, size: int):
+    it = iter(iterable)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def import_employees(records, approve: bool = False, workers: int | None = None,
+                     batch_size: int = IMPORT_BATCH_SIZE, progress=None) -> dict:
+    """Bulk-create employees; hashing runs on a process pool, inserts go in batches."""
+    summary = {"processed": 0, "created": 0, "duplicates": 0, "invalid": 0, "errors": []}
+    seen = set()
+
+    def reject(error: str):
+        summary["invalid"] += 1
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append({"record": summary["processed"], "error": error})
+
+    pool = hashing_pool(workers)
+    try:
+        for batch in _chunks(records, batch_size):
+            rows = []
+            for rec in batch:
+                summary["processed"] += 1
+                if isinstance(rec, BadRecord):
+                    reject(rec.error)
+                    continue
+                if not isinstance(rec, dict):
+                    reject("record must be an object")
+                    continue
+                username = str(rec.get("username") or "").strip()
+                password = str(rec.get("password") or "")
+                if not username or not password:
+                    reject("username and password are required")
+                    continue
+                if len(username) > USERNAME_MAX_LENGTH:
+                    reject(f"username longer than {USERNAME_MAX_LENGTH} characters")
+                    continue
+                if username in seen:
+                    summary["duplicates"] += 1
+                    continue
+                seen.add(username)
+                approved = approve or str(rec.get("approved") or "").strip().lower() in TRUTHY
+                rows.append({"username": username, "password": password, "approved": approved})
+
+            if rows:
+                existing = {u for (u,) in db.session.query(User.username)
+                            .filter(User.username.in_([r["username"] for r in rows])).all()}
+                summary["duplicates"] += len(existing)
+                rows = [r for r in rows if r["username"] not in existing]
+
+            if rows:
+                chunksize = max(1, len(rows) // ((workers or os.cpu_count() or 1) * 4))
+                hashes = pool.map(generate_password_hash, [r["password"] for r in rows], chunksize=chunksize)
+                db.session.execute(User.__table__.insert(), [
+                    {"username": r["username"], "password": h, "role": "employee", "approved": r["approved"]}
+                    for r, h in zip(rows, hashes)
+                ])
+                created = db.session.query(User.id, User.approved)\
+                    .filter(User.username.in_([r["username"] for r in rows])).all()
+                approved_ids = [i for i, approved in created if approved]
+                if approved_ids:
+                    db.session.execute(LeaveBalance.__table__.insert(), [
+                        {"employee_id": i, "sick_casual": 10, "medical": 20, "privileged": 18} for i in approved_ids
+                    ])
+                    bump_versions("users", "balances")
+                else:
+                    bump_versions("users")
+                record_changes(users=[i for i, _ in created], balances=approved_ids)
+                db.session.commit()
+                summary["created"] += len(rows)
+
+            if progress:
+                progress(summary)
+    except InvalidUpload as e:
+        # Batches before the unreadable part are already committed; the caller reports how many.
+        db.session.rollback()
+        e.summary = summary
+        raise
+    return summary
@@ -0,0 +1,119 @@
+import json
+from datetime import datetime
+from sqlalchemy import exists, func, select
+from sqlalchemy.dialects.sqlite import insert
+from extension import db
+from models import User, LeaveRequest, LeaveBalance, OutboxEvent, DataVersion
+
+OUTBOX_PAGE_MAX = 1000
+BACKFILL_BATCH = 1000
+COMPACT_CHUNK = 5000
+# Highest seq of a deletion event dropped by compaction. A consumer positioned before it would
+# never learn about that deletion, so it has to start over from a full copy instead.
+COMPACTED = "outbox:compacted"
+
+# Password hashes stay in this service; replicas only get what they serve.
+_SNAPSHOTS = {
+    "user": (User, User.id, lambda u: {"id": u.id, "username": u.username, "role": u.role, "approved": bool(u.approved)}),
+    "leave": (LeaveRequest, LeaveRequest.id, lambda l: {
+        "id": l.id, "employee_id": l.employee_id, "reason": l.reason, "leave_type": l.leave_type,
+        "start_date": l.start_date.isoformat(), "end_date": l.end_date.isoformat(),
+        "status": l.status, "remarks": l.remarks or ""
+    }),
+    "balance": (LeaveBalance, LeaveBalance.employee_id, lambda b: {
+        "employee_id": b.employee_id, "sick_casual": b.sick_casual, "medical": b.medical, "privileged": b.privileged
+    }),
+}
+
+
+def _snapshot_events(entity: str, keys, now: datetime) -> list:
+    model, key_col, snapshot = _SNAPSHOTS[entity]
+    # populate_existing: conditional Core UPDATEs do not refresh objects already in the session.
+    rows = model.query.filter(key_col.in_(set(keys))).order_by(key_col)\
+        .execution_options(populate_existing=True).all()
+    return [{"entity": entity, "key": getattr(row, key_col.key), "op": "upsert",
+             "payload": json.dumps(snapshot(row)), "created_at": now} for row in rows]
+
+
+def record_changes(users=(), leaves=(), balances=(), deleted_leaves=()):
+    # Call after the write, before commit: rows are re-read inside the transaction, so the
+    # snapshot is exactly what commits. Balances are keyed by employee id.
+    now = datetime.utcnow()
+    events = []
+    for entity, keys in (("user", users), ("leave", leaves), ("balance", balances)):
+        if keys:
+            events.extend(_snapshot_events(entity, keys, now))
+    events.extend({"entity": "leave", "key": k, "op": "delete", "payload": None, "created_at": now}
+                  for k in sorted(set(deleted_leaves)))
+    if events:
+        db.session.execute(OutboxEvent.__table__.insert(), events)
+
+
+def event_to_dict(e: OutboxEvent) -> dict:
+    return {
+        "seq": e.seq,
+        "entity": e.entity,
+        "key": e.key,
+        "op": e.op,
+        "data": json.loads(e.payload) if e.payload else None,
+        "created_at": e.created_at.isoformat() + "Z"
+    }
+
+
+def compacted_through() -> int:
+    return db.session.query(DataVersion.version).filter(DataVersion.name == COMPACTED).scalar() or 0
+
+
+def read_events(after: int, limit: int) -> dict:
+    limit = max(1, min(limit, OUTBOX_PAGE_MAX))
+    head = db.session.query(db.func.max(OutboxEvent.seq)).scalar() or 0
+    if 0 < after < compacted_through():
+        # reset: drop the local copy and read again from seq 0.
+        return {"events": [], "head_seq": head, "reset": True}
+    events = OutboxEvent.query.filter(OutboxEvent.seq > after).order_by(OutboxEvent.seq).limit(limit).all()
+    return {"events": [event_to_dict(e) for e in events], "head_seq": head, "reset": False}
+
+
+def compact_outbox(through: int, chunk_size: int = COMPACT_CHUNK) -> int:
+    """Drop events at or below `through` that no consumer past it needs; returns rows removed.
+
+    A snapshot goes once a newer event for the same row exists, and a deletion goes with the
+    history it ends. What is left is one snapshot per live row, so a new replica can still start
+    from seq 0 and the table grows with the data rather than with every write.
+    """
+    events = OutboxEvent.__table__
+    newer = events.alias("newer")
+    head = db.session.query(func.max(events.c.seq)).scalar() or 0
+    through = min(through, head - 1)  # the newest event stays, so head_seq never goes backwards
+    removed, lo = 0, 0
+    while lo < through:
+        hi = db.session.execute(select(events.c.seq).where(events.c.seq > lo, events.c.seq <= through)
+                                .order_by(events.c.seq).offset(chunk_size - 1).limit(1)).scalar() or through
+        window = (events.c.seq > lo, events.c.seq <= hi)
+        # One short transaction per window, like archiving; the first statement takes the write lock.
+        removed += db.session.execute(events.delete().where(*window, exists().where(
+            newer.c.entity == events.c.entity, newer.c.key == events.c.key, newer.c.seq > events.c.seq
+        ))).rowcount
+        last_delete = db.session.execute(select(func.max(events.c.seq)).where(*window, events.c.op == "delete")).scalar()
+        if last_delete:
+            removed += db.session.execute(events.delete().where(*window, events.c.op == "delete")).rowcount
+            stmt = insert(DataVersion).values(name=COMPACTED, version=last_delete)
+            db.session.execute(stmt.on_conflict_do_update(index_elements=["name"], set_={
+                "version": func.max(DataVersion.version, stmt.excluded.version)}))
+        db.session.commit()
+        lo = hi
+    return removed
+
+
+def backfill_outbox() -> int:
+    # Seed the feed with a snapshot of every row so a fresh replica can start from seq 0.
+    if OutboxEvent.query.first() or not User.query.first():
+        return 0
+    total, now = 0, datetime.utcnow()
+    for entity, (_, key_col, _) in _SNAPSHOTS.items():
+        keys = [k for (k,) in db.session.query(key_col).order_by(key_col).all()]
+        for i in range(0, len(keys), BACKFILL_BATCH):
+            db.session.execute(OutboxEvent.__table__.insert(), _snapshot_events(entity, keys[i:i + BACKFILL_BATCH], now))
+        total += len(keys)
+    db.session.commit()
+    return total
@@ -0,0 +1,164 @@
+from datetime import date, timedelta
+from sqlalchemy import func, and_, or_
+from sqlalchemy.dialects.sqlite import insert
+from extension import db
+from models import User, LeaveRequest, LeaveRollup
+from archive import leaves_with_archive
+from workdays import WorkCalendar, work_calendar, load_calendar
+
+REBUILD_BATCH_SIZE = 5000
+REPORT_MAX_MONTHS = 120
+
+
+def month_days(start: date, end: date, calendar: WorkCalendar) -> dict:
+    # Working days of [start, end] falling in each calendar month, e.g. {"2024-01": 2, "2024-02": 3}.
+    out = {}
+    day = start
+    while day <= end:
+        next_month = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+        days = calendar.working_days(day, min(end, next_month - timedelta(days=1)))
+        if days:
+            out[day.strftime("%Y-%m")] = days
+        day = next_month
+    return out
+
+
+def bump_leave_rollups(leave: LeaveRequest, sign: int, calendar: WorkCalendar):
+    # Same session as the status change, like the leave_stat counters.
+    for month, days in month_days(leave.start_date, leave.end_date, calendar).items():
+        stmt = insert(LeaveRollup).values(month=month, employee_id=leave.employee_id,
+                                          leave_type=leave.leave_type, days=sign * days)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["month", "employee_id", "leave_type"],
+            set_={"days": LeaveRollup.days + sign * days}
+        )
+        db.session.execute(stmt)
+
+
+def move_leave_rollups(leave: LeaveRequest, old_status: str, new_status: str, calendar: WorkCalendar):
+    # Only approved leave consumes days, so only moves into or out of Approved matter.
+    if (old_status == "Approved") != (new_status == "Approved"):
+        bump_leave_rollups(leave, 1 if new_status == "Approved" else -1, calendar)
+
+
+def month_bounds(month: str) -> tuple:
+    # "2024-02" -> (date(2024, 2, 1), date(2024, 2, 29))
+    first = date(int(month[:4]), int(month[5:7]), 1)
+    return first, (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
+def compute_leave_rollups(batch_size: int = REBUILD_BATCH_SIZE, months=None, calendar: WorkCalendar = None) -> dict:
+    # Ground truth from leave_request and the archive, read in id order one batch at a time.
+    # months limits it to leaves overlapping those months and to their rows for them.
+    calendar = calendar or work_calendar()
+    leave = leaves_with_archive()
+    scope = []
+    if months is not None:
+        scope.append(or_(*(and_(leave.start_date <= last, leave.end_date >= first)
+                           for first, last in map(month_bounds, months))))
+    out, last_id = {}, 0
+    while True:
+        rows = db.session.query(
+            leave.id, leave.employee_id, leave.leave_type, leave.start_date, leave.end_date
+        ).filter(leave.status == "Approved", leave.id > last_id, *scope)\
+            .order_by(leave.id).limit(batch_size).all()
+        if not rows:
+            return out
+        for _, employee_id, leave_type, start, end in rows:
+            for month, days in month_days(start, end, calendar).items():
+                if months is None or month in months:
+                    key = (month, employee_id, leave_type)
+                    out[key] = out.get(key, 0) + days
+        last_id = rows[-1][0]
+
+
+def stored_leave_rollups() -> dict:
+    return {(r.month, r.employee_id, r.leave_type): r.days for r in LeaveRollup.query.all() if r.days}
+
+
+def replace_leave_rollups(months=None, batch_size: int = REBUILD_BATCH_SIZE) -> int:
+    # Rewrites the rollup rows of the given months (all of them for None) inside the caller's
+    # transaction, against the calendar as this session sees it, committed or not.
+    fresh = compute_leave_rollups(batch_size, months, load_calendar())
+    stale = LeaveRollup.query
+    if months is not None:
+        stale = stale.filter(LeaveRollup.month.in_(months))
+    stale.delete(synchronize_session=False)
+    rows = [{"month": m, "employee_id": e, "leave_type": t, "days": d} for (m, e, t), d in fresh.items()]
+    for i in range(0, len(rows), batch_size):
+        db.session.execute(LeaveRollup.__table__.insert(), rows[i:i + batch_size])
+    return len(rows)
+
+
+def rebuild_leave_rollups(batch_size: int = REBUILD_BATCH_SIZE) -> int:
+    rebuilt = replace_leave_rollups(batch_size=batch_size)
+    db.session.commit()
+    return rebuilt
+
+
+def parse_month(value: str) -> tuple:
+    # "YYYY-MM" (a full date is accepted and truncated) -> (year, month)
+    year, month = value[:7].split("-")
+    if len(year) != 4 or not 1 <= int(month) <= 12:
+        raise ValueError(value)
+    return int(year), int(month)
+
+
+def month_range(first: tuple, last: tuple) -> list:
+    start, end = first[0] * 12 + first[1] - 1, last[0] * 12 + last[1] - 1
+    return [f"{i // 12:04d}-{i % 12 + 1:02d}" for i in range(start, end + 1)]
+
+
+def _ratio(days: int, entitled: float) -> float:
+    return round(days / entitled, 4) if entitled else 0.0
+
+
+def utilization_report(months: list, entitlements: dict, employee_id=None, by_employee=False) -> dict:
+    # entitlements: leave_type -> days per employee per year. Everything is summed by SQLite
+    # over the rollup table; Python only lays the result out on the month grid.
+    types = list(entitlements)
+    q = db.session.query(LeaveRollup.month, LeaveRollup.leave_type, func.sum(LeaveRollup.days))\
+        .filter(LeaveRollup.month >= months[0], LeaveRollup.month <= months[-1])
+    employees = User.query.filter(User.role == "employee", User.approved.is_(True))
+    if employee_id is not None:
+        q = q.filter(LeaveRollup.employee_id == employee_id)
+        employees = employees.filter(User.id == employee_id)
+    headcount = employees.count()
+    per_month = {(m, t): d for m, t, d in q.group_by(LeaveRollup.month, LeaveRollup.leave_type).all()}
+
+    # Trend: cumulative days against a pro-rata share of the yearly entitlement.
+    rows, running = [], dict.fromkeys(types, 0)
+    for i, month in enumerate(months, 1):
+        days = {t: per_month.get((month, t), 0) for t in types}
+        for t in types:
+            running[t] += days[t]
+        rows.append({
+            "month": month,
+            "days": days,
+            "total": sum(days.values()),
+            "cumulative_utilization": {t: _ratio(running[t], headcount * entitlements[t] * i / 12) for t in types}
+        })
+
+    span = len(months) / 12
+    out = {
+        "from": months[0],
+        "to": months[-1],
+        "headcount": headcount,
+        "entitlements": entitlements,
+        "totals": {t: {"days": running[t], "entitled": round(headcount * entitlements[t] * span, 2),
+                       "utilization": _ratio(running[t], headcount * entitlements[t] * span)} for t in types},
+        "months": rows
+    }
+    if by_employee:
+        sums = db.session.query(LeaveRollup.employee_id, LeaveRollup.leave_type, func.sum(LeaveRollup.days))\
+            .filter(LeaveRollup.month >= months[0], LeaveRollup.month <= months[-1])
+        if employee_id is not None:
+            sums = sums.filter(LeaveRollup.employee_id == employee_id)
+        used = {(e, t): d for e, t, d in sums.group_by(LeaveRollup.employee_id, LeaveRollup.leave_type).all()}
+        out["employees"] = [{
+            "employee_id": u.id,
+            "username": u.username,
+            "days": {t: used.get((u.id, t), 0) for t in types},
+            "utilization": {t: _ratio(used.get((u.id, t), 0), entitlements[t] * span) for t in types}
+        } for u in employees.order_by(User.id).all()]
+    return out
@@ -0,0 +1,88 @@
+import re
+from sqlalchemy import bindparam, column, table, text
+from extension import db
+from models import LeaveRequest
+
+REBUILD_BATCH_SIZE = 5000
+
+# FTS5 index over leave reason, remarks and the employee's username; rowid is the leave id.
+# Porter stemming lets "surgery" find "surgeries". Not a model, so create_all() never sees it.
+SEARCH_DDL = ("CREATE VIRTUAL TABLE IF NOT EXISTS leave_search "
+              "USING fts5(reason, remarks, username, tokenize='porter unicode61')")
+leave_search = table("leave_search", column("rowid"), column("rank"))
+
+# Rows copied into the index, always by leave id. Archived leaves stay searchable.
+_INDEX_SELECT = ("SELECT l.id, l.reason, coalesce(l.remarks, ''), u.username FROM "
+                 "(SELECT id, employee_id, reason, remarks FROM leave_request UNION ALL "
+                 "SELECT id, employee_id, reason, remarks FROM leave_archive) l JOIN user u ON u.id = l.employee_id")
+
+
+def create_search_index():
+    with db.engine.begin() as conn:
+        conn.execute(text(SEARCH_DDL))
+
+
+def index_leaves(ids):
+    # Same transaction as the leave write; FTS5 has no upsert, so replace by rowid.
+    ids = sorted(set(ids))
+    if ids:
+        unindex_leaves(ids)
+        db.session.execute(text(f"INSERT INTO leave_search (rowid, reason, remarks, username) "
+                                f"{_INDEX_SELECT} WHERE l.id IN :ids")
+                           .bindparams(bindparam("ids", expanding=True)), {"ids": ids})
+
+
+def unindex_leaves(ids):
+    ids = sorted(set(ids))
+    if ids:
+        db.session.execute(text("DELETE FROM leave_search WHERE rowid IN :ids")
+                           .bindparams(bindparam("ids", expanding=True)), {"ids": ids})
+
+
+def rebuild_search_index(batch_size: int = REBUILD_BATCH_SIZE) -> int:
+    # Keyset batches so the copy never holds every leave in memory; one transaction overall.
+    db.session.execute(text("DELETE FROM leave_search"))
+    last, total = 0, 0
+    while True:
+        row = db.session.execute(text(
+            "SELECT max(id), count(*) FROM (SELECT id FROM (SELECT id FROM leave_request UNION ALL "
+            "SELECT id FROM leave_archive) WHERE id > :last ORDER BY id LIMIT :n)"),
+            {"last": last, "n": batch_size}).one()
+        if not row[1]:
+            break
+        db.session.execute(text(f"INSERT INTO leave_search (rowid, reason, remarks, username) "
+                                f"{_INDEX_SELECT} WHERE l.id > :last AND l.id <= :hi"),
+                           {"last": last, "hi": row[0]})
+        last, total = row[0], total + row[1]
+    db.session.execute(text("INSERT INTO leave_search (leave_search) VALUES ('optimize')"))
+    db.session.commit()
+    return total
+
+
+def indexed_count() -> int:
+    return db.session.execute(text("SELECT count(*) FROM leave_search")).scalar()
+
+
+def unindexed_leaves() -> tuple:
+    # (leaves missing from the index, index rows without a leave) for `rebuild-search --check`.
+    missing = sum(db.session.execute(text(
+        f"SELECT count(*) FROM {t} WHERE id NOT IN (SELECT rowid FROM leave_search)")).scalar()
+        for t in ("leave_request", "leave_archive"))
+    stale = db.session.execute(text(
+        "SELECT count(*) FROM leave_search WHERE rowid NOT IN (SELECT id FROM leave_request) "
+        "AND rowid NOT IN (SELECT id FROM leave_archive)")).scalar()
+    return missing, stale
+
+
+def match_expression(q: str) -> str:
+    # User text -> FTS5 query: every word must match (implicit AND), a trailing * keeps prefix
+    # matching, and quoting each term means FTS5 operators or stray quotes can never be a syntax error.
+    terms = re.findall(r"\w+\*?", q)
+    return " ".join(f'"{t.rstrip("*")}"' + ("*" if t.endswith("*") else "") for t in terms)
+
+
+def search_filter(query, expression: str, leave=LeaveRequest):
+    """Restrict a leave query to leaves matching the FTS expression, best matches first."""
+    return query.join(leave_search, leave_search.c.rowid == leave.id)\
+        .filter(text("leave_search MATCH :match").bindparams(match=expression))\
+        .order_by(leave_search.c.rank, leave.id)
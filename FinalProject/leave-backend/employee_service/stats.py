@@ -0,0 +1,83 @@
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from extension import db
+from models import LeaveRequest, LeaveStat
+from archive import leaves_with_archive
+
+STATUSES = ("Pending", "Approved", "Rejected")
+
+
+def _scopes(employee_id: int, leave_type: str):
+    return (("all", ""), ("type", leave_type), ("employee", str(employee_id)))
+
+
+def bump_leave_stats(employee_id: int, leave_type: str, status: str, delta: int):
+    # Runs on the request's session, so it commits or rolls back with the leave write itself.
+    for scope, key in _scopes(employee_id, leave_type):
+        stmt = insert(LeaveStat).values(scope=scope, key=key, status=status, count=delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["scope", "key", "status"],
+            set_={"count": LeaveStat.count + delta}
+        )
+        db.session.execute(stmt)
+
+
+def move_leave_stats(leave: LeaveRequest, old_status: str, new_status: str):
+    if old_status == new_status:
+        return
+    bump_leave_stats(leave.employee_id, leave.leave_type, old_status, -1)
+    bump_leave_stats(leave.employee_id, leave.leave_type, new_status, 1)
+
+
+def _summarise(rows) -> dict:
+    counts = {status.lower(): 0 for status in STATUSES}
+    for status, count in rows:
+        counts[(status or "Pending").lower()] = count
+    counts["total"] = sum(counts.values())
+    return counts
+
+
+def read_leave_stats(scope: str = "all") -> dict:
+    rows = db.session.query(LeaveStat.key, LeaveStat.status, LeaveStat.count)\
+        .filter(LeaveStat.scope == scope).all()
+    grouped = {}
+    for key, status, count in rows:
+        grouped.setdefault(key, []).append((status, count))
+    return {key: _summarise(items) for key, items in grouped.items()}
+
+
+def leave_totals() -> dict:
+    rows = db.session.query(LeaveStat.status, LeaveStat.count).filter(LeaveStat.scope == "all").all()
+    return _summarise(rows)
+
+
+def compute_leave_stats() -> dict:
+    # Ground truth straight from leave_request and the archive, keyed like the counters table.
+    out = {}
+    leave = leaves_with_archive()
+    rows = db.session.query(
+        leave.employee_id, leave.leave_type, leave.status, func.count()
+    ).group_by(leave.employee_id, leave.leave_type, leave.status).all()
+    for employee_id, leave_type, status, count in rows:
+        for scope_key in _scopes(employee_id, leave_type):
+            k = scope_key + (status or "Pending",)
+            out[k] = out.get(k, 0) + count
+    return out
+
+
+def stored_leave_stats() -> dict:
+    return {
+        (s.scope, s.key, s.status): s.count
+        for s in LeaveStat.query.all() if s.count
+    }
+
+
+def rebuild_leave_stats() -> int:
+    fresh = compute_leave_stats()
+    LeaveStat.query.delete()
+    db.session.add_all(
+        LeaveStat(scope=scope, key=key, status=status, count=count)
+        for (scope, key, status), count in fresh.items()
+    )
+    db.session.commit()
+    return len(fresh)
@@ -0,0 +1,64 @@
+"""Run from leave-backend/:  python -m pytest employee_service/tests
+
+Each service is a flat set of modules (app, models, config, ...), so the two suites cannot share
+one interpreter; run employee_service and manager_service tests separately.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app import create_app  # noqa: E402
+from config import Config, TestConfig  # noqa: E402
+from extension import db  # noqa: E402
+from migrations import bootstrap  # noqa: E402
+from models import User, LeaveRequest, LeaveBalance  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        bootstrap()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    # A real file and connection pool for concurrency tests: TestConfig shares one in-memory connection.
+    class FileConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'lms.db'}"
+    app = create_app(FileConfig)
+    with app.app_context():
+        bootstrap()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_employee(app):
+    def make(username="alice", **balance):
+        user = User.make(username, "secret")
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(LeaveBalance(employee_id=user.id, **{"sick_casual": 10, "medical": 20, "privileged": 18, **balance}))
+        db.session.commit()
+        return user.id
+    return make
+
+
+@pytest.fixture
+def apply(client):
+    def apply(employee_id, start, end, leave_type="sick"):
+        resp = client.post("/apply_leave", json={"employee_id": employee_id, "reason": "flu", "leave_type": leave_type,
+                                                 "start_date": start, "end_date": end})
+        assert resp.status_code == 201, resp.get_json()
+        return db.session.query(LeaveRequest.id).order_by(LeaveRequest.id.desc()).limit(1).scalar()
+    return apply
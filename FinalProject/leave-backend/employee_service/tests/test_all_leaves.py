@@ -0,0 +1,40 @@
+def ids(rows):
+    return [row["id"] for row in rows]
+
+
+def test_keyset_pages_cover_the_filtered_list_in_id_order(client, apply, make_employee):
+    alice, bob = make_employee("alice"), make_employee("bob")
+    leaves = [apply(emp, day, day) for emp, day in ((alice, "2024-01-01"), (bob, "2024-01-02"), (alice, "2024-01-08"),
+                                                    (bob, "2024-01-09"), (alice, "2024-01-15"))]
+    assert ids(client.get("/all_leaves").get_json()) == leaves
+
+    pages, cursor = [], None
+    while True:
+        body = client.get("/all_leaves", query_string={"limit": 2, **({"cursor": cursor} if cursor else {})}).get_json()
+        pages.append(ids(body["items"]))
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == [leaves[0:2], leaves[2:4], leaves[4:]]
+
+    first = client.get(f"/all_leaves?employee_id={alice}&limit=2").get_json()
+    assert ids(first["items"]) == [leaves[0], leaves[2]] and first["next_cursor"] == leaves[2]
+    rest = client.get(f"/all_leaves?employee_id={alice}&limit=2&cursor={first['next_cursor']}").get_json()
+    assert ids(rest["items"]) == [leaves[4]] and rest["next_cursor"] is None
+
+
+def test_stream_returns_the_same_rows_as_the_full_list(client, apply, make_employee):
+    emp = make_employee()
+    leaves = [apply(emp, day, day) for day in ("2024-01-01", "2024-01-08", "2024-01-15")]
+    assert client.put(f"/update_leave/{leaves[1]}", json={"status": "Approved"}).status_code == 200
+
+    streamed = client.get("/all_leaves?stream=1")
+    assert streamed.mimetype == "application/json"
+    assert streamed.get_json() == client.get("/all_leaves").get_json()
+    assert ids(client.get("/all_leaves?stream=1&status=Pending").get_json()) == [leaves[0], leaves[2]]
+    assert ids(client.get(f"/all_leaves?stream=1&limit=1&cursor={leaves[0]}").get_json()) == [leaves[1]]
+    assert client.get("/all_leaves?stream=1&status=Rejected").get_json() == []
+
+
+def test_bad_dates_are_rejected(client):
+    assert client.get("/all_leaves?from=someday").status_code == 400
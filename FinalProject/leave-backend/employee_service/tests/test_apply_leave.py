@@ -0,0 +1,40 @@
+import threading
+from extension import db
+from models import User, LeaveRequest
+
+LEAVE = {"reason": "trip", "leave_type": "privileged", "start_date": "2024-03-04", "end_date": "2024-03-08"}
+
+
+def test_overlapping_leave_is_rejected_until_the_first_is_rejected(client, apply, make_employee):
+    emp = make_employee()
+    first = apply(emp, "2024-03-04", "2024-03-08", "privileged")
+    resp = client.post("/apply_leave", json={"employee_id": emp, **LEAVE, "start_date": "2024-03-08"})
+    assert resp.status_code == 409
+    assert resp.get_json()["error"] == f"Overlaps leave #{first} (2024-03-04 to 2024-03-08)"
+    assert client.put(f"/update_leave/{first}", json={"status": "Rejected"}).status_code == 200
+    apply(emp, "2024-03-08", "2024-03-08", "privileged")
+
+
+def test_concurrent_identical_applications_create_one_leave(file_app):
+    app = file_app
+    with app.app_context():
+        emp = User.make("racer", "secret")
+        db.session.add(emp)
+        db.session.commit()
+        emp_id = emp.id
+
+    barrier, statuses = threading.Barrier(8), []
+
+    def worker():
+        client = app.test_client()
+        barrier.wait()
+        statuses.append(client.post("/apply_leave", json={"employee_id": emp_id, **LEAVE}).status_code)
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(statuses) == [201] + [409] * 7
+    with app.app_context():
+        assert LeaveRequest.query.filter_by(employee_id=emp_id).count() == 1
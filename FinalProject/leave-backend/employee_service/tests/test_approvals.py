@@ -0,0 +1,119 @@
+import threading
+from sqlalchemy import event
+from extension import db
+from models import User, LeaveRequest, LeaveBalance
+from stats import compute_leave_stats, stored_leave_stats
+
+
+def balance(employee_id, col="sick_casual"):
+    return db.session.query(getattr(LeaveBalance, col)).filter_by(employee_id=employee_id).scalar()
+
+
+def test_approval_deducts_working_days(client, apply, make_employee):
+    emp = make_employee()
+    leave_id = apply(emp, "2024-01-05", "2024-01-08")  # Friday to Monday
+    assert client.put(f"/update_leave/{leave_id}", json={"status": "Approved"}).status_code == 200
+    assert balance(emp) == 8
+
+
+def test_approval_is_refused_when_the_balance_is_short(client, apply, make_employee):
+    emp = make_employee(sick_casual=5)
+    first = apply(emp, "2024-01-01", "2024-01-03")
+    second = apply(emp, "2024-01-08", "2024-01-10")
+    assert client.put(f"/update_leave/{first}", json={"status": "Approved"}).status_code == 200
+    resp = client.put(f"/update_leave/{second}", json={"status": "Approved"})
+    assert resp.status_code == 400
+    assert balance(emp) == 2
+    assert db.session.query(LeaveRequest.status).filter_by(id=second).scalar() == "Pending"
+
+
+def test_second_approval_is_a_conflict_and_charges_nothing(client, apply, make_employee):
+    emp = make_employee()
+    leave_id = apply(emp, "2024-01-01", "2024-01-02")
+    assert client.put(f"/update_leave/{leave_id}", json={"status": "Approved"}).status_code == 200
+    assert client.put(f"/update_leave/{leave_id}", json={"status": "Approved"}).status_code == 409
+    assert balance(emp) == 8
+
+
+def test_bulk_approvals_deduct_per_employee_and_report_shortfalls(client, apply, make_employee):
+    emp = make_employee(sick_casual=3)
+    ids = [apply(emp, d, d) for d in ("2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04")]
+    resp = client.put("/update_leaves", json=[{"leave_id": i, "status": "Approved"} for i in ids])
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert (body["updated"], body["failed"]) == (3, 1)
+    assert body["results"][-1]["error"] == "Insufficient Sick/Casual balance"
+    assert balance(emp) == 0
+
+
+def test_bulk_reports_malformed_leave_ids_per_item(client, apply, make_employee):
+    emp = make_employee()
+    leave_id = apply(emp, "2024-01-01", "2024-01-01")
+    resp = client.put("/update_leaves", json=[{"leave_id": [leave_id], "status": "Approved"},
+                                              {"leave_id": {"id": leave_id}, "status": "Approved"},
+                                              {"leave_id": str(leave_id), "status": "Approved"}])
+    assert resp.status_code == 200
+    assert [(r["ok"], r.get("error")) for r in resp.get_json()["results"]] == [
+        (False, "leave_id must be an integer"), (False, "leave_id must be an integer"), (True, None)]
+    assert balance(emp) == 9
+
+
+def test_leaving_approved_gives_the_days_back(client, apply, make_employee):
+    emp = make_employee()
+    leave_id = apply(emp, "2024-01-01", "2024-01-01")
+    for status, expected in (("Approved", 9), ("Pending", 10), ("Approved", 9), ("Rejected", 10)):
+        assert client.put(f"/update_leave/{leave_id}", json={"status": status}).status_code == 200
+        assert balance(emp) == expected
+
+
+def test_bulk_credits_are_applied_before_deductions(client, apply, make_employee):
+    emp = make_employee(sick_casual=1)
+    approved = apply(emp, "2024-01-01", "2024-01-01")
+    pending = apply(emp, "2024-01-02", "2024-01-02")
+    assert client.put(f"/update_leave/{approved}", json={"status": "Approved"}).status_code == 200
+    resp = client.put("/update_leaves", json=[{"leave_id": approved, "status": "Rejected"},
+                                              {"leave_id": pending, "status": "Approved"}])
+    assert resp.get_json()["updated"] == 2
+    assert balance(emp) == 0
+
+
+def test_delete_loses_to_an_approval_committed_after_its_read(file_app):
+    with file_app.app_context():
+        emp = User.make("racer", "secret")
+        db.session.add(emp)
+        db.session.flush()
+        db.session.add(LeaveBalance(employee_id=emp.id, sick_casual=10, medical=0, privileged=0))
+        db.session.commit()
+        emp_id = emp.id
+    client = file_app.test_client()
+    leave = {"employee_id": emp_id, "reason": "race", "leave_type": "sick",
+             "start_date": "2024-01-01", "end_date": "2024-01-01"}
+    assert client.post("/apply_leave", json=leave).status_code == 201
+    with file_app.app_context():
+        leave_id = db.session.query(LeaveRequest.id).scalar()
+
+    # Another worker approves the leave after delete_leave has read it as Pending,
+    # just before its first write.
+    armed, approved = [True], []
+
+    def approve_first(conn, cursor, statement, *args):
+        if armed and statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            armed.clear()
+            t = threading.Thread(target=lambda: approved.append(file_app.test_client().put(
+                f"/update_leave/{leave_id}", json={"status": "Approved"}).status_code))
+            t.start()
+            t.join()
+    with file_app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", approve_first)
+    try:
+        resp = client.delete(f"/delete_leave/{leave_id}")
+    finally:
+        event.remove(engine, "before_cursor_execute", approve_first)
+
+    assert approved == [200]
+    assert resp.status_code == 409
+    with file_app.app_context():
+        assert db.session.query(LeaveRequest.status).filter_by(id=leave_id).scalar() == "Approved"
+        assert balance(emp_id) == 9
+        assert stored_leave_stats() == compute_leave_stats()
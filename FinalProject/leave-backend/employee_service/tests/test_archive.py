@@ -0,0 +1,76 @@
+from datetime import date
+from sqlalchemy import text
+from extension import db
+from models import LeaveRequest, LeaveArchive
+from archive import archive_leaves
+from migrations import upgrade_schema
+from search import unindexed_leaves
+from stats import compute_leave_stats, stored_leave_stats
+
+CUTOFF = date(2025, 1, 1)
+
+
+def decide(client, leave_id, status):
+    assert client.put(f"/update_leave/{leave_id}", json={"status": status}).status_code == 200
+
+
+def test_only_decided_leaves_before_the_cutoff_move(client, apply, make_employee):
+    emp = make_employee()
+    approved = apply(emp, "2024-01-01", "2024-01-02")
+    rejected = apply(emp, "2024-02-05", "2024-02-05")
+    pending = apply(emp, "2024-03-04", "2024-03-04")
+    recent = apply(emp, "2025-03-03", "2025-03-03")
+    latest = apply(emp, "2025-04-07", "2025-04-07")
+    decide(client, approved, "Approved")
+    decide(client, rejected, "Rejected")
+    decide(client, recent, "Approved")
+    decide(client, latest, "Approved")
+
+    assert archive_leaves(CUTOFF, chunk_size=1, pause=0) == 2
+    assert sorted(i for (i,) in db.session.query(LeaveArchive.id)) == [approved, rejected]
+    assert sorted(i for (i,) in db.session.query(LeaveRequest.id)) == [pending, recent, latest]
+    assert archive_leaves(CUTOFF, pause=0) == 0
+
+    live = {l["id"] for l in client.get(f"/my_leaves/{emp}").get_json()}
+    everything = {l["id"] for l in client.get(f"/my_leaves/{emp}?include_archived=1").get_json()}
+    assert live == {pending, recent, latest}
+    assert everything == live | {approved, rejected}
+    # Counters, stats and search keep archived history.
+    assert stored_leave_stats() == compute_leave_stats()
+    assert unindexed_leaves() == (0, 0)
+
+
+def test_archived_leaves_still_block_overlapping_applications(client, apply, make_employee):
+    emp = make_employee()
+    decide(client, apply(emp, "2024-01-01", "2024-01-05"), "Approved")
+    apply(emp, "2025-06-02", "2025-06-02")
+    assert archive_leaves(CUTOFF, pause=0) == 1
+    resp = client.post("/apply_leave", json={"employee_id": emp, "reason": "again", "leave_type": "sick",
+                                             "start_date": "2024-01-03", "end_date": "2024-01-04"})
+    assert resp.status_code == 409
+
+
+def test_ids_are_not_reused_after_the_newest_leaves_are_archived(client, apply, make_employee):
+    emp = make_employee()
+    first, second = apply(emp, "2024-01-01", "2024-01-01"), apply(emp, "2024-02-05", "2024-02-05")
+    pending = apply(emp, "2025-06-02", "2025-06-02")
+    decide(client, first, "Approved")
+    decide(client, second, "Rejected")
+    assert archive_leaves(CUTOFF, pause=0) == 2
+    assert client.delete(f"/delete_leave/{pending}").status_code == 200
+    assert apply(emp, "2025-07-07", "2025-07-07") > pending
+
+
+def test_upgrade_rebuilds_legacy_ids_past_archived_leaves(client, apply, make_employee):
+    emp = make_employee()
+    decide(client, apply(emp, "2024-01-01", "2024-01-01"), "Approved")
+    archived = apply(emp, "2024-02-05", "2024-02-05")
+    decide(client, archived, "Approved")
+    assert archive_leaves(CUTOFF, pause=0) == 2
+    # A table from before AUTOINCREMENT: SQLite would hand out max(live id) + 1, an archived id.
+    for statement in ("ALTER TABLE leave_request RENAME TO legacy",
+                      "CREATE TABLE leave_request AS SELECT * FROM legacy", "DROP TABLE legacy"):
+        db.session.execute(text(statement))
+    db.session.commit()
+    upgrade_schema()
+    assert apply(emp, "2025-07-07", "2025-07-07") == archived + 1
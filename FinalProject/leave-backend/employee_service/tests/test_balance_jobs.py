@@ -0,0 +1,47 @@
+import pytest
+from extension import db
+from models import LeaveBalance
+from balance_jobs import JobConflict, job_params, start_job, run_chunk, run_job
+
+COLUMNS = ("sick_casual", "medical", "privileged")
+
+
+def balances():
+    return dict(db.session.query(LeaveBalance.employee_id, LeaveBalance.sick_casual).all())
+
+
+def test_reset_carries_forward_up_to_the_cap(make_employee):
+    ids = [make_employee(f"e{i}", sick_casual=n) for i, n in enumerate((0, 2, 7))]
+    start_job("reset-2025", job_params("reset", {"sick_casual": 10}, {"sick_casual": 3}, COLUMNS))
+    job = run_job("reset-2025", chunk_size=2, pause=0)
+    assert job.finished_at is not None and job.processed == 3
+    assert balances() == dict(zip(ids, (10, 12, 13)))
+
+
+def test_interrupted_job_resumes_after_its_cursor_and_never_reapplies(make_employee):
+    ids = [make_employee(f"e{i}", sick_casual=1) for i in range(5)]
+    start_job("accrue-2025-01", job_params("accrue", {"sick_casual": 1}, {}, COLUMNS))
+    assert run_chunk("accrue-2025-01", chunk_size=2) == 2
+    assert balances() == dict(zip(ids, (2, 2, 1, 1, 1)))
+
+    # A second runner (or a restart) picks up after the committed cursor.
+    job = run_job("accrue-2025-01", chunk_size=2, pause=0)
+    assert job.processed == 5 and job.cursor == ids[-1]
+    assert balances() == dict.fromkeys(ids, 2)
+
+    assert run_job("accrue-2025-01", chunk_size=2, pause=0).processed == 5
+    assert balances() == dict.fromkeys(ids, 2)
+
+
+def test_same_name_with_other_parameters_is_refused(make_employee):
+    make_employee()
+    start_job("accrue-2025-02", job_params("accrue", {"medical": 1}, {}, COLUMNS))
+    with pytest.raises(JobConflict):
+        start_job("accrue-2025-02", job_params("accrue", {"medical": 2}, {}, COLUMNS))
+
+
+def test_capped_accrual_never_lowers_a_balance_above_the_cap(make_employee):
+    ids = [make_employee(f"e{i}", sick_casual=n) for i, n in enumerate((4, 5, 9))]
+    start_job("accrue-2025-03", job_params("accrue", {"sick_casual": 2}, {"sick_casual": 6}, COLUMNS))
+    run_job("accrue-2025-03", pause=0)
+    assert balances() == dict(zip(ids, (6, 6, 9)))
@@ -0,0 +1,25 @@
+from rollups import compute_leave_rollups, stored_leave_rollups
+
+
+def test_holiday_changes_recompute_only_their_months(client, apply, make_employee):
+    emp = make_employee()
+    for start, end in (("2024-01-01", "2024-01-05"), ("2024-03-04", "2024-03-04")):
+        assert client.put(f"/update_leave/{apply(emp, start, end)}", json={"status": "Approved"}).status_code == 200
+
+    resp = client.post("/holidays", json=[{"date": "2024-01-02", "name": "Bank holiday"}])
+    assert resp.get_json()["rollups_rebuilt"] == 1
+    assert stored_leave_rollups() == {("2024-01", emp, "sick"): 4, ("2024-03", emp, "sick"): 1}
+
+    resp = client.delete("/holidays/2024-01-02")
+    assert resp.get_json()["rollups_rebuilt"] == 1
+    assert stored_leave_rollups()[("2024-01", emp, "sick")] == 5
+
+
+def test_weekend_change_recomputes_every_month(client, apply, make_employee):
+    emp = make_employee()
+    for start, end in (("2024-01-05", "2024-01-08"), ("2024-03-08", "2024-03-11")):  # Friday to Monday
+        assert client.put(f"/update_leave/{apply(emp, start, end)}", json={"status": "Approved"}).status_code == 200
+
+    assert client.put("/weekend", json={"days": ["Sunday"]}).get_json()["rollups_rebuilt"] == 2
+    assert stored_leave_rollups() == compute_leave_rollups() == {("2024-01", emp, "sick"): 3,
+                                                                 ("2024-03", emp, "sick"): 3}
@@ -0,0 +1,35 @@
+import threading
+import app as app_module
+
+
+def test_changes_sends_a_snapshot_then_only_what_changed(client, apply, make_employee):
+    emp = make_employee()
+    kept, dropped = apply(emp, "2024-01-01", "2024-01-01"), apply(emp, "2024-01-08", "2024-01-08")
+    snapshot = client.get("/changes").get_json()
+    assert snapshot["reset"] and {l["id"] for l in snapshot["leaves"]} == {kept, dropped}
+
+    assert client.put(f"/update_leave/{kept}", json={"status": "Approved"}).status_code == 200
+    assert client.delete(f"/delete_leave/{dropped}").status_code == 200
+    delta = client.get(f"/changes?since={snapshot['version']}").get_json()
+    assert not delta["reset"] and delta["version"] > snapshot["version"]
+    assert [(l["id"], l["status"]) for l in delta["leaves"]] == [(kept, "Approved")]
+    assert delta["deleted_leaves"] == [dropped]
+    assert [b["sick_casual"] for b in delta["balances"]] == [9]
+    assert delta["users"] == []
+
+    assert client.get(f"/changes?since={delta['version']}").get_json()["leaves"] == []
+    # A version this server never issued (another database, say) gets a fresh snapshot.
+    assert client.get(f"/changes?since={delta['version'] + 100}").get_json()["reset"]
+
+
+def test_streams_above_the_cap_are_refused_until_one_closes(client, monkeypatch):
+    monkeypatch.setattr(app_module, "_streams", threading.BoundedSemaphore(1))
+    first = client.get("/changes/stream")
+    assert first.status_code == 200 and first.mimetype == "text/event-stream"
+    refused = client.get("/changes/stream")
+    assert refused.status_code == 503
+    assert refused.headers["Retry-After"] == str(app_module.SSE_RETRY_AFTER_SECONDS)
+    first.close()
+    again = client.get("/changes/stream")
+    assert again.status_code == 200
+    again.close()
@@ -0,0 +1,30 @@
+def test_unchanged_data_answers_304_until_a_relevant_write(client, apply, make_employee):
+    alice, bob = make_employee("alice"), make_employee("bob")
+    leave_id = apply(alice, "2024-01-01", "2024-01-01")
+    first = client.get(f"/my_leaves/{alice}")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+
+    again = client.get(f"/my_leaves/{alice}", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b"" and again.headers["ETag"] == etag
+
+    # Another employee's leave bumps only their own counter.
+    apply(bob, "2024-01-01", "2024-01-01")
+    assert client.get(f"/my_leaves/{alice}", headers={"If-None-Match": etag}).status_code == 304
+
+    assert client.put(f"/update_leave/{leave_id}", json={"status": "Approved"}).status_code == 200
+    changed = client.get(f"/my_leaves/{alice}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert changed.get_json()[0]["status"] == "Approved"
+
+
+def test_the_query_string_is_part_of_the_etag(client, apply, make_employee):
+    apply(make_employee(), "2024-01-01", "2024-01-01")
+    etag = client.get("/all_leaves").headers["ETag"]
+    assert client.get("/all_leaves?status=Approved", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/all_leaves", headers={"If-None-Match": f'W/"x", {etag}'}).status_code == 304
+
+
+def test_error_responses_carry_no_validator(client):
+    resp = client.get("/all_leaves?from=someday")
+    assert resp.status_code == 400 and "ETag" not in resp.headers
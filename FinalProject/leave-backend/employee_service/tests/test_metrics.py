@@ -0,0 +1,30 @@
+import logging
+import metrics
+
+
+def db_timing(resp):
+    # Server-Timing: app;dur=..., db;dur=...;desc="N queries", ...
+    return next(part for part in resp.headers["Server-Timing"].split(", ") if part.startswith("db;"))
+
+
+def test_an_ordinary_approval_does_not_trip_the_n_plus_1_warning(client, apply, make_employee, caplog):
+    leave_id = apply(make_employee(), "2024-01-01", "2024-01-02")
+    with caplog.at_level(logging.WARNING, logger="metrics"):
+        assert client.put(f"/update_leave/{leave_id}", json={"status": "Approved"}).status_code == 200
+    assert caplog.records == []
+    route = metrics.metrics.snapshot()["routes"]["PUT /update_leave/<int:leave_id>"]["sql"]
+    assert route["requests_over_threshold"] == 0 and route["reads"] < route["queries"]
+
+
+def test_reads_over_the_threshold_are_logged(client, apply, make_employee, caplog, monkeypatch):
+    apply(make_employee(), "2024-01-01", "2024-01-02")
+    monkeypatch.setattr(metrics, "QUERY_WARN_THRESHOLD", 1)
+    with caplog.at_level(logging.WARNING, logger="metrics"):
+        client.get("/all_leaves")
+    assert [r.getMessage().split(" issued ")[0] for r in caplog.records] == ["GET /all_leaves"]
+
+
+def test_counters_start_from_zero_for_every_request(client):
+    # The fixture keeps one app context pushed, so g would otherwise carry over between requests.
+    first, second = client.get("/all_leaves"), client.get("/all_leaves")
+    assert db_timing(first).split(";desc=")[1] == db_timing(second).split(";desc=")[1]
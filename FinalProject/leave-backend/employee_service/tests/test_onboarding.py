@@ -0,0 +1,32 @@
+from models import User
+from onboarding import hashing_pool
+
+
+def test_jsonl_import_reports_unparseable_lines_separately(client):
+    body = b'{"username": "ann", "password": "pw"}\n{not json\n{"username": "bob"}\n["carl", "pw"]\n'
+    resp = client.post("/import_employees?format=jsonl", data=body)
+    assert resp.status_code == 200
+    summary = resp.get_json()
+    assert (summary["created"], summary["invalid"]) == (1, 3)
+    assert summary["errors"] == [
+        {"record": 2, "error": "line is not valid JSON"},
+        {"record": 3, "error": "username and password are required"},
+        {"record": 4, "error": "record must be an object"},
+    ]
+
+
+def test_non_utf8_body_is_a_bad_request(client):
+    resp = client.post("/import_employees?format=csv", data=b"username,password\nj\xf6rg,pw\n")
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "Invalid upload: body is not valid UTF-8"
+    assert User.query.filter_by(role="employee").count() == 0
+
+
+def test_long_usernames_get_their_own_error_and_imports_share_one_pool(client):
+    body = ("username,password\n" + "x" * 51 + ",pw\n" + "y" * 50 + ",pw\n").encode()
+    summary = client.post("/import_employees?format=csv", data=body).get_json()
+    assert (summary["created"], summary["errors"]) == (1, [{"record": 1, "error": "username longer than 50 characters"}])
+    pool = hashing_pool()
+    assert pool._mp_context.get_start_method() == "forkserver"
+    client.post("/import_employees?format=csv", data=b"username,password\nzed,pw\n")
+    assert hashing_pool() is pool
@@ -0,0 +1,48 @@
+from extension import db
+from models import OutboxEvent
+from outbox import compact_outbox, compacted_through
+
+
+def events():
+    return [(e.entity, e.key, e.op) for e in OutboxEvent.query.order_by(OutboxEvent.seq)]
+
+
+def head(client):
+    return client.get("/outbox?after=0&limit=1").get_json()["head_seq"]
+
+
+def test_compaction_keeps_one_snapshot_per_live_row(client, apply, make_employee):
+    emp = make_employee()
+    kept = apply(emp, "2024-01-01", "2024-01-01")
+    gone = apply(emp, "2024-01-08", "2024-01-08")
+    apply(emp, "2024-01-15", "2024-01-15")
+    assert client.delete(f"/delete_leave/{gone}").status_code == 200
+    assert client.put(f"/update_leave/{kept}", json={"status": "Approved"}).status_code == 200
+    before = head(client)
+
+    removed = compact_outbox(before)
+    leave_events = [e for e in events() if e[0] == "leave"]
+    assert removed > 0
+    # The newest event always stays, so the feed head does not move backwards.
+    assert head(client) == before
+    assert ("leave", gone, "upsert") not in leave_events and ("leave", gone, "delete") not in leave_events
+    assert leave_events.count(("leave", kept, "upsert")) == 1
+    assert compact_outbox(before) == 0
+
+
+def test_consumers_behind_a_compacted_deletion_are_told_to_reset(client, apply, make_employee):
+    emp = make_employee()
+    first = apply(emp, "2024-01-01", "2024-01-01")
+    apply(emp, "2024-01-08", "2024-01-08")
+    since = head(client)
+    assert client.delete(f"/delete_leave/{first}").status_code == 200
+    apply(emp, "2024-01-15", "2024-01-15")
+    assert client.post("/outbox/prune", json={"through": head(client)}).status_code == 200
+    assert compacted_through() > since
+
+    assert client.get(f"/outbox?after={since}").get_json()["reset"] is True
+    assert client.get(f"/changes?since={since}").get_json()["reset"] is True
+    latest = head(client)
+    assert client.get(f"/outbox?after={latest}").get_json()["reset"] is False
+    assert client.get(f"/changes?since={latest}").get_json()["reset"] is False
+    assert db.session.query(OutboxEvent).count() < 10
@@ -0,0 +1,43 @@
+import pytest
+from search import match_expression
+
+HOSTILE = ['"', 'knee" OR "', "AND", "NEAR(knee surgery)", "reason:knee", "knee -surgery", "(knee", "^knee", "*", "kn**"]
+
+
+def leave(client, employee_id, reason, day):
+    resp = client.post("/apply_leave", json={"employee_id": employee_id, "reason": reason, "leave_type": "medical",
+                                             "start_date": day, "end_date": day})
+    assert resp.status_code == 201
+
+
+def found(client, q, **args):
+    resp = client.get("/search_leaves", query_string={"q": q, **args})
+    assert resp.status_code == 200, resp.get_json()
+    return [l["reason"] for l in resp.get_json()["items"]]
+
+
+def test_every_term_is_quoted_and_only_a_trailing_star_survives():
+    assert match_expression('knee "surgery" OR rehab*') == '"knee" "surgery" "OR" "rehab"*'
+    assert match_expression("NEAR(a b) reason:x -y") == '"NEAR" "a" "b" "reason" "x" "y"'
+    assert match_expression('" * ( ^ :') == ""
+
+
+@pytest.mark.parametrize("q", HOSTILE)
+def test_fts_syntax_in_user_text_is_never_an_error(client, make_employee, q):
+    leave(client, make_employee(), "knee surgery", "2024-01-01")
+    resp = client.get("/search_leaves", query_string={"q": q})
+    assert resp.status_code in {200, 400}
+    if resp.status_code == 400:
+        assert resp.get_json()["error"] == "q must contain at least one word"
+
+
+def test_words_are_anded_stemmed_and_prefix_matched(client, make_employee):
+    emp = make_employee()
+    leave(client, emp, "knee surgery", "2024-01-01")
+    leave(client, emp, "dental surgeries", "2024-01-08")
+    leave(client, emp, "family wedding", "2024-01-15")
+    assert sorted(found(client, "surgery")) == ["dental surgeries", "knee surgery"]
+    assert found(client, "knee surgery") == ["knee surgery"]
+    assert found(client, 'knee" OR "wedding') == []
+    assert found(client, "wed*") == ["family wedding"]
+    assert found(client, "surgery", employee_id=emp + 1) == []
@@ -0,0 +1,55 @@
+import hashlib
+from functools import wraps
+from flask import request, make_response
+from sqlalchemy import literal, select, true
+from sqlalchemy.dialects.sqlite import insert
+from extension import db
+from models import DataVersion
+
+
+def bump_versions(*names: str):
+    # Same session as the write, so readers never see new data under an old validator.
+    # One multi-row upsert however many names a bulk write touches.
+    names = sorted(set(names))
+    if names:
+        stmt = insert(DataVersion).values([{"name": name, "version": 1} for name in names])
+        stmt = stmt.on_conflict_do_update(index_elements=["name"], set_={"version": DataVersion.version + 1})
+        db.session.execute(stmt)
+
+
+def bump_versions_from(names):
+    # Set-based variant for bulk jobs: names is a SELECT of one column of counter names.
+    rows = names.subquery()
+    # WHERE true: without one SQLite would parse the ON CONFLICT as a join constraint.
+    stmt = insert(DataVersion).from_select(["name", "version"],
+                                           select(rows.c[0], literal(1)).distinct().where(true()))
+    db.session.execute(stmt.on_conflict_do_update(index_elements=["name"], set_={"version": DataVersion.version + 1}))
+
+
+def current_etag(names, variant: bytes = b"") -> str:
+    rows = dict(db.session.query(DataVersion.name, DataVersion.version).filter(DataVersion.name.in_(names)).all())
+    token = ";".join(f"{n}={rows.get(n, 0)}" for n in names).encode() + b"?" + variant
+    return hashlib.sha1(token).hexdigest()[:20]
+
+
+def conditional(*name_templates: str):
+    """Answer If-None-Match with 304 from the version counters alone, before the view runs.
+
+    Templates are formatted with the view's URL arguments, e.g. "leaves:{employee_id}".
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            names = [t.format(**kwargs) for t in name_templates]
+            etag = current_etag(names, request.query_string)
+            if request.if_none_match.contains(etag):
+                resp = make_response("", 304)
+            else:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.set_etag(etag)
+            resp.headers["Cache-Control"] = "no-cache"
+            return resp
+        return wrapper
+    return decorator
@@ -0,0 +1,98 @@
+import threading
+from datetime import date, timedelta
+from sqlalchemy.dialects.sqlite import insert
+from extension import db
+from models import Holiday, CalendarSetting, DataVersion
+from versions import bump_versions
+
+DEFAULT_WEEKEND = (5, 6)  # Saturday, Sunday
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+class WorkCalendar:
+    """Working-day counts from per-year prefix sums: any range costs one lookup per year it spans."""
+
+    def __init__(self, weekend, holidays):
+        self.weekend = frozenset(weekend)
+        self.holidays = frozenset(holidays)
+        self._years = {}
+
+    def _prefix(self, year: int) -> list:
+        # prefix[i] = working days among the first i days of the year; built once per year.
+        prefix = self._years.get(year)
+        if prefix is None:
+            prefix, day = [0], date(year, 1, 1)
+            while day.year == year:
+                prefix.append(prefix[-1] + (day.weekday() not in self.weekend and day not in self.holidays))
+                day += timedelta(days=1)
+            self._years[year] = prefix
+        return prefix
+
+    def working_days(self, start: date, end: date) -> int:
+        total = 0
+        for year in range(start.year, end.year + 1):
+            prefix = self._prefix(year)
+            first = date(year, 1, 1)
+            lo = (start - first).days if year == start.year else 0
+            hi = (end - first).days + 1 if year == end.year else len(prefix) - 1
+            total += prefix[hi] - prefix[lo]
+        return max(total, 0)
+
+
+_cache = {"version": None, "calendar": None}
+_lock = threading.Lock()
+
+
+def work_calendar() -> WorkCalendar:
+    # One primary-key read per call: the "calendar" version counter is bumped with every
+    # calendar write, so each worker process reloads after a change and never serves a stale one.
+    version = db.session.query(DataVersion.version).filter(DataVersion.name == "calendar").scalar() or 0
+    if _cache["version"] != version:
+        with _lock:
+            if _cache["version"] != version:
+                _cache["calendar"] = load_calendar()
+                _cache["version"] = version
+    return _cache["calendar"]
+
+
+def load_calendar() -> WorkCalendar:
+    # Uncached, so a calendar write still inside its transaction never reaches the shared cache.
+    return WorkCalendar(read_weekend(), [d for (d,) in db.session.query(Holiday.day).all()])
+
+
+def read_weekend() -> tuple:
+    value = db.session.query(CalendarSetting.value).filter(CalendarSetting.name == "weekend").scalar()
+    if value is None:
+        return DEFAULT_WEEKEND
+    return tuple(int(d) for d in value.split(",") if d)
+
+
+def parse_weekdays(names) -> tuple:
+    # ["Saturday", "sun"] -> (5, 6)
+    out = set()
+    for name in names:
+        matches = [i for i, day in enumerate(WEEKDAYS) if len(str(name)) >= 3 and day.startswith(str(name).lower())]
+        if len(matches) != 1:
+            raise ValueError(name)
+        out.add(matches[0])
+    return tuple(sorted(out))
+
+
+def set_weekend(days: tuple):
+    stmt = insert(CalendarSetting).values(name="weekend", value=",".join(map(str, days)))
+    db.session.execute(stmt.on_conflict_do_update(index_elements=["name"], set_={"value": stmt.excluded.value}))
+    bump_versions("calendar")
+
+
+def save_holidays(items: list):
+    # items: [(date, name), ...]
+    stmt = insert(Holiday).values([{"day": d, "name": n} for d, n in items])
+    db.session.execute(stmt.on_conflict_do_update(index_elements=["day"], set_={"name": stmt.excluded.name}))
+    bump_versions("calendar")
+
+
+def delete_holiday(day: date) -> bool:
+    deleted = Holiday.query.filter(Holiday.day == day).delete()
+    if deleted:
+        bump_versions("calendar")
+    return bool(deleted)
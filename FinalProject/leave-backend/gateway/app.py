@@ -1,55 +1,271 @@
-from flask import Flask, request, jsonify, Response
+from flask import Flask, g, request, jsonify, Response
 from flask_cors import CORS
-import requests
+from werkzeug.http import unquote_etag
+from urllib3.exceptions import NewConnectionError, ProtocolError, TimeoutError as UpstreamTimeout
+import urllib3
 import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from cache import ResponseCache, INVALIDATES
+from metrics import init_metrics, rule_label
+from upstreams import Upstream, NoReplica, CONNECT_TIMEOUT
 
 app = Flask(__name__)
 CORS(app, supports_credentials=True)
 
+# Each may list several replicas, comma-separated; see upstreams.py for balancing and failover.
 EMPLOYEE_URL = os.getenv("EMPLOYEE_URL", "http://lms-employee_service:8001")
 MANAGER_URL  = os.getenv("MANAGER_URL",  "http://lms-manager_service:8002")
+employee = Upstream("employee_service", EMPLOYEE_URL)
+manager = Upstream("manager_service", MANAGER_URL)
 
-def forward_request(target_url: str):
+CHUNK_SIZE      = int(os.getenv("PROXY_CHUNK_SIZE", "65536"))
 
-    excluded = {'host', 'connection', 'upgrade'}
+# Opt-in response cache for the idempotent GETs listed in cache.CACHE_ROUTES (freshness rules there).
+CACHE_ENABLED = os.getenv("GATEWAY_CACHE", "0").lower() in {"1", "true", "yes"}
+cache = ResponseCache(
+    max_bytes=int(os.getenv("GATEWAY_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    max_entries=int(os.getenv("GATEWAY_CACHE_MAX_ENTRIES", "1024")),
+    max_entry_bytes=int(os.getenv("GATEWAY_CACHE_MAX_ENTRY_BYTES", str(4 * 1024 * 1024))),
+) if CACHE_ENABLED else None
+
+# Composite dashboard routes: sections are fetched concurrently, each bounded by one deadline.
+DASHBOARD_TIMEOUT = float(os.getenv("DASHBOARD_TIMEOUT", "5"))
+_fanout = ThreadPoolExecutor(max_workers=int(os.getenv("DASHBOARD_WORKERS", "16")), thread_name_prefix="dashboard")
+
+# section -> (upstream, path); paths are formatted with the query arguments.
+MANAGER_SECTIONS = {
+    "all_leaves": (employee, "/all_leaves"),
+    "pending_employees": (employee, "/pending_employees"),
+    "employee_balances": (employee, "/employee_balances"),
+    "leave_statistics": (employee, "/leave_statistics"),
+}
+EMPLOYEE_SECTIONS = {
+    "my_leaves": (employee, "/my_leaves/{employee_id}"),
+    "leave_balance": (employee, "/leave_balance/{employee_id}"),
+}
+
+# Service-to-service endpoints (the replication feed) that are not exposed to browsers.
+INTERNAL_PATHS = {"outbox"}
+
+HOP_BY_HOP = {'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+              'te', 'trailers', 'transfer-encoding', 'upgrade'}
+
+def close_upstream(resp):
+    # A fully read body has already handed its connection back to the pool;
+    # a half-read one (client went away) is closed rather than reused.
+    resp.close()
+    resp.release_conn()
+
+def relay_events(resp):
+    # Server-sent events go out as soon as each chunk arrives; stream() would wait to fill CHUNK_SIZE.
+    while True:
+        chunk = resp.read1(CHUNK_SIZE, decode_content=False)
+        if not chunk:
+            return
+        yield chunk
+
+def cached_response(hit: dict, outcome: str):
+    # Cached validators are honoured here too, so polling clients still get their 304s.
+    if hit["etag"] and request.if_none_match.contains(unquote_etag(hit["etag"])[0]):
+        return Response(status=304, headers=[(k, v) for k, v in hit["headers"]
+                                             if k.lower() in {"etag", "cache-control"}] + [("X-Cache", outcome)])
+    return Response(hit["body"], status=hit["status"], headers=hit["headers"] + [("X-Cache", outcome)])
+
+def forward_request(upstream: Upstream, path: str):
+    excluded = {'host'} | HOP_BY_HOP
     headers = {k: v for k, v in request.headers if k.lower() not in excluded}
+    url = f"/{path}?{request.query_string.decode()}" if request.query_string else f"/{path}"
+    # The request body is streamed through as-is; chunked only when the client sent it chunked.
+    has_body = bool(request.content_length) or "chunked" in request.headers.get("Transfer-Encoding", "").lower()
+
+    route = cache.route_for(path) if cache and request.method == "GET" and not has_body else None
+    hit = None
+    if route:
+        cache_key = (upstream.name, path, request.query_string)
+        generation = cache.generation(route[1])
+        hit = cache.get(cache_key)
+        if hit and not hit["etag"]:
+            return cached_response(hit, "HIT")
+        if hit:
+            # Ask upstream whether the stored copy is still current: a 304 costs it one counter
+            # read and no body, and catches writes this worker never saw.
+            headers = {k: v for k, v in headers.items() if k.lower() != "if-none-match"}
+            headers["If-None-Match"] = hit["etag"]
+
     try:
-        resp = requests.request(
-            method=request.method,
-            url=target_url,
+        resp = upstream.request(
+            request.method,
+            url,
+            idempotent=request.method in {"GET", "HEAD"} and not has_body,
+            body=request.stream if has_body else None,
             headers=headers,
-            data=request.get_data(),
-            params=request.args,
-            cookies=request.cookies,
-            timeout=30,
+            chunked=has_body and not request.content_length,
+            redirect=False,
+            preload_content=False,
+            decode_content=False,
         )
-       
-        drop = {'connection', 'content-encoding', 'content-length', 'transfer-encoding'}
-        forwarded_headers = [(k, v) for k, v in resp.headers.items() if k.lower() not in drop]
-        return Response(resp.content, status=resp.status_code, headers=forwarded_headers)
-    except requests.exceptions.ConnectionError:
-        return jsonify({"error": f"Service unavailable: {target_url}"}), 503
-    except requests.exceptions.Timeout:
+    except NoReplica:
+        return jsonify({"error": f"Service unavailable: {upstream.name} (circuit open)"}), 503
+    except (NewConnectionError, ProtocolError):
+        return jsonify({"error": f"Service unavailable: {upstream.name}/{path}"}), 503
+    except UpstreamTimeout:
         return jsonify({"error": "Service timeout"}), 504
     except Exception as e:
         return jsonify({"error": f"Gateway error: {str(e)}"}), 500
 
+    # Raw (still encoded) bytes go straight through, so Content-Encoding/Length stay valid.
+    forwarded_headers = [(k, v) for k, v in resp.headers.items() if k.lower() not in HOP_BY_HOP]
+
+    if cache and request.method in {"POST", "PUT", "PATCH", "DELETE"} and resp.status < 400:
+        tags = INVALIDATES.get(path.split("/", 1)[0])
+        if tags:
+            cache.invalidate(tags)
+
+    if hit and resp.status == 304:
+        close_upstream(resp)
+        cache.refresh(cache_key)
+        return cached_response(hit, "REVALIDATED")
+
+    length = resp.headers.get("Content-Length")
+    if route and resp.status == 200 and length and int(length) <= cache.max_entry_bytes:
+        try:
+            body = resp.read()
+        finally:
+            close_upstream(resp)
+        cache.put(cache_key, route[1], generation, route[0], resp.status, forwarded_headers, body)
+        return Response(body, status=resp.status, headers=forwarded_headers + [("X-Cache", "MISS")])
+
+    if resp.headers.get("Content-Type", "").startswith("text/event-stream"):
+        body = relay_events(resp)
+    else:
+        body = resp.stream(CHUNK_SIZE, decode_content=False)
+    out = Response(body, status=resp.status, headers=forwarded_headers)
+    out.call_on_close(lambda: close_upstream(resp))
+    return out
+
+
+class SectionError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def fetch_section(upstream: Upstream, path: str, deadline: float):
+    # One attempt bounded by what is left of the deadline: a failover retry would keep this pool
+    # thread busy long after fan_out has answered without the section.
+    remaining = max(0.05, deadline - time.monotonic())
+    try:
+        resp = upstream.request(
+            "GET", path,
+            idempotent=True,
+            failover=False,
+            headers={"Accept": "application/json"},
+            timeout=urllib3.Timeout(total=remaining, connect=min(CONNECT_TIMEOUT, remaining)),
+            redirect=False,
+            retries=False,
+        )
+    except UpstreamTimeout:
+        raise SectionError(504, "Service timeout")
+    except NoReplica:
+        raise SectionError(503, f"Service unavailable: {upstream.name} (circuit open)")
+    except (NewConnectionError, ProtocolError):
+        raise SectionError(503, f"Service unavailable: {upstream.name}")
+    try:
+        body = json.loads(resp.data)
+    except ValueError:
+        raise SectionError(502, "Invalid JSON from upstream")
+    if resp.status >= 400:
+        raise SectionError(resp.status, body.get("error", resp.reason) if isinstance(body, dict) else resp.reason)
+    return body
+
+
+def fan_out(sections: dict, args: dict):
+    # ?sections=a,b limits the response to those sections. A failed or slow section is
+    # reported under "errors" with its status and comes back as null; the rest still return.
+    wanted = request.args.get("sections")
+    names = [n for n in wanted.split(",") if n in sections] if wanted else list(sections)
+    if not names:
+        return jsonify({"error": f"Unknown sections. Use {','.join(sections)}"}), 400
+    deadline = time.monotonic() + DASHBOARD_TIMEOUT
+    futures = {
+        name: _fanout.submit(fetch_section, sections[name][0], sections[name][1].format(**args), deadline)
+        for name in names
+    }
+    wait(futures.values(), timeout=DASHBOARD_TIMEOUT)
+    # Sections are fetched on pool threads, so the wait stands in for this request's upstream time.
+    g.upstream_ms = (time.monotonic() - deadline + DASHBOARD_TIMEOUT) * 1000
+
+    out, errors = {}, {}
+    for name, future in futures.items():
+        out[name] = None
+        if not future.done():
+            future.cancel()
+            errors[name] = {"status": 504, "error": "Section timed out"}
+            continue
+        try:
+            out[name] = future.result()
+        except SectionError as e:
+            errors[name] = {"status": e.status, "error": str(e)}
+        except Exception as e:
+            errors[name] = {"status": 500, "error": f"Gateway error: {str(e)}"}
+    out["errors"] = errors
+    return jsonify(out), 502 if len(errors) == len(names) else 200
+
+
+@app.route("/dashboard/manager")
+def manager_dashboard():
+    return fan_out(MANAGER_SECTIONS, {})
+
+
+@app.route("/dashboard/employee")
+def employee_dashboard():
+    employee_id = request.args.get("employee_id", type=int)
+    if employee_id is None:
+        return jsonify({"error": "employee_id is required"}), 400
+    return fan_out(EMPLOYEE_SECTIONS, {"employee_id": employee_id})
+
 
 @app.route("/health")
 def health():
     return jsonify({"status": "gateway-ok", "employee_url": EMPLOYEE_URL, "manager_url": MANAGER_URL})
 
 
+@app.route("/gateway/upstreams")
+def upstream_stats():
+    return jsonify({u.name: u.stats() for u in (employee, manager)})
+
+
+@app.route("/gateway/cache_stats")
+def cache_stats():
+    if not cache:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **cache.stats()})
+
+
 @app.route("/manager/<path:path>", methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"])
 def manager_proxy(path):
-    return forward_request(f"{MANAGER_URL}/{path}")
+    return forward_request(manager, path)
 
 
 @app.route("/", defaults={"path": ""}, methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"])
 @app.route("/<path:path>", methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"])
 def employee_proxy(path):
-    return forward_request(f"{EMPLOYEE_URL}/{path}")
+    if path.split("/", 1)[0] in INTERNAL_PATHS:
+        return jsonify({"error": "Not found"}), 404
+    return forward_request(employee, path)
+
+
+def route_label() -> str:
+    # Proxied calls share two catch-all rules, so label them by their first path segment.
+    if request.endpoint in {"employee_proxy", "manager_proxy"}:
+        prefix = "/manager/" if request.endpoint == "manager_proxy" else "/"
+        return f"{request.method} {prefix}{request.view_args['path'].split('/', 1)[0]}"
+    return rule_label()
+
+
+init_metrics(app, route_label=route_label)
 
 if __name__ == "__main__":
-    import os
-    app.run(host="0.0.0.0", port=3000, debug=True)
+    app.run(host="0.0.0.0", port=3000, debug=os.getenv("FLASK_DEBUG") == "1")
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+
+# First path segment -> (ttl seconds, resources the response depends on).
+# Responses carrying an ETag are revalidated upstream on every hit (If-None-Match), so writes that
+# bypass this process (other workers, CLI jobs, manager_service) are seen at once; the TTL then only
+# bounds how long an idle entry is kept. Responses without a validator are served for the TTL and
+# dropped early only by writes proxied through this worker; with Cache-Control: no-cache they are
+# not stored at all.
+CACHE_ROUTES = {
+    "all_leaves":        (30, {"leaves"}),
+    "leave_requests":    (30, {"leaves"}),
+    "my_leaves":         (30, {"leaves"}),
+    "leave_statistics":  (30, {"leaves"}),
+    "employees":         (30, {"employees", "leaves"}),
+    "pending_employees": (30, {"employees"}),
+    "leave_balance":     (30, {"balances"}),
+    "employee_balances": (30, {"balances", "employees"}),
+    "reports":           (60, {"leaves", "employees"}),
+    "search_leaves":     (30, {"leaves"}),
+}
+
+# Mutating call (first path segment) -> resources it changes.
+INVALIDATES = {
+    "apply_leave":      {"leaves"},
+    "update_leave":     {"leaves", "balances"},
+    "update_leaves":    {"leaves", "balances"},
+    "delete_leave":     {"leaves"},
+    "approve_employee": {"employees", "balances"},
+    "create_employee":  {"employees"},
+    "import_employees": {"employees", "balances"},
+    "holidays":         {"leaves"},
+    "weekend":          {"leaves"},
+    "balance_jobs":     {"balances"},
+}
+
+
+class ResponseCache:
+    """Bounded LRU/TTL cache of upstream GET responses, invalidated by resource tag."""
+
+    def __init__(self, max_bytes: int, max_entries: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.stores = self.evictions = self.invalidations = self.revalidations = 0
+
+    @staticmethod
+    def route_for(path: str):
+        return CACHE_ROUTES.get(path.split("/", 1)[0])
+
+    def generation(self, tags) -> tuple:
+        # Snapshot taken before the upstream fetch; a write in between makes put() a no-op.
+        with self._lock:
+            return tuple(self._generations.get(t, 0) for t in sorted(tags))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["expires"] < time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, tags, generation, ttl, status, headers, body: bytes):
+        etag = next((v for k, v in headers if k.lower() == "etag"), None)
+        no_cache = any(k.lower() == "cache-control" and "no-cache" in v.lower() for k, v in headers)
+        if len(body) > self.max_entry_bytes or (no_cache and not etag):
+            return
+        with self._lock:
+            if tuple(self._generations.get(t, 0) for t in sorted(tags)) != generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = {
+                "expires": time.monotonic() + ttl, "ttl": ttl, "tags": tags, "etag": etag,
+                "status": status, "headers": headers, "body": body,
+            }
+            self._bytes += len(body)
+            self.stores += 1
+            while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def refresh(self, key):
+        # Upstream answered 304 to the stored ETag: the entry is current for another TTL.
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["expires"] = time.monotonic() + entry["ttl"]
+            self.revalidations += 1
+
+    def invalidate(self, tags):
+        with self._lock:
+            for t in tags:
+                self._generations[t] = self._generations.get(t, 0) + 1
+            stale = [k for k, e in self._entries.items() if e["tags"] & tags]
+            for k in stale:
+                self._drop(k)
+            self.invalidations += len(stale)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry["body"])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "stores": self.stores,
+                "evictions": self.evictions, "invalidations": self.invalidations,
+                "revalidations": self.revalidations,
+            }
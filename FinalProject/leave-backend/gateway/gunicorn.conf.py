@@ -0,0 +1,11 @@
+import os
+
+# Production serving: python app.py stays as the single-process dev server.
+bind = f"0.0.0.0:{os.getenv('PORT', '3000')}"
+workers = int(os.getenv("WEB_WORKERS", "2"))
+threads = int(os.getenv("WEB_THREADS", "8"))
+worker_class = "gthread"
+# Upstream read timeout plus headroom, so a slow upstream surfaces as a 504 rather than a killed worker.
+timeout = int(os.getenv("WEB_TIMEOUT", "60"))
+keepalive = 5
+accesslog = "-"
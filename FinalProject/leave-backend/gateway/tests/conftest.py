@@ -0,0 +1,72 @@
+"""Run from leave-backend/:  python -m pytest gateway/tests
+
+Upstreams are real HTTP servers on loopback ports, so pooling, timeouts and failover are exercised
+end to end without the backend services.
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+class Backend:
+    """A loopback upstream whose status, delay, headers and body each test sets."""
+
+    def __init__(self):
+        self.status, self.delay, self.headers, self.body = 200, 0.0, {}, b'{"ok": true}'
+        self.respond = None  # optional callable(request dict) -> (status, headers, body)
+        self.requests, self.connections = [], set()
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle_one_request(self):
+                backend.connections.add(self.client_address)
+                super().handle_one_request()
+
+            def serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                req = {"method": self.command, "path": self.path, "headers": dict(self.headers),
+                       "body": self.rfile.read(length) if length else b""}
+                backend.requests.append(req)
+                time.sleep(backend.delay)
+                status, headers, body = backend.respond(req) if backend.respond else \
+                    (backend.status, backend.headers, backend.body)
+                self.send_response(status)
+                for k, v in {"Content-Type": "application/json", **headers}.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = serve
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def backend():
+    started = []
+
+    def start():
+        started.append(Backend())
+        return started[-1]
+    yield start
+    for b in started:
+        b.close()
@@ -0,0 +1,118 @@
+import pytest
+import app as gateway
+import cache as cache_module
+from cache import ResponseCache
+from upstreams import Upstream
+
+JSON = [("Content-Type", "application/json")]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def small_cache(**limits):
+    return ResponseCache(**{"max_bytes": 1000, "max_entries": 10, "max_entry_bytes": 500, **limits})
+
+
+def store(c, key, tags=frozenset({"leaves"}), ttl=30, headers=JSON, body=b"x"):
+    c.put(key, set(tags), c.generation(tags), ttl, 200, headers, body)
+
+
+def test_entries_expire_after_their_ttl(clock):
+    c = small_cache()
+    store(c, "a")
+    clock.now += 29
+    assert c.get("a")["body"] == b"x"
+    clock.now += 2
+    assert c.get("a") is None and c.stats()["entries"] == 0
+
+
+def test_invalidation_drops_tagged_entries_only(clock):
+    c = small_cache()
+    store(c, "leaves")
+    store(c, "balances", tags={"balances"})
+    c.invalidate({"leaves"})
+    assert c.get("leaves") is None and c.get("balances") is not None
+
+
+def test_a_write_during_the_fetch_keeps_the_stale_response_out(clock):
+    c = small_cache()
+    generation = c.generation({"leaves"})
+    c.invalidate({"leaves"})  # proxied write lands while the GET is upstream
+    c.put("a", {"leaves"}, generation, 30, 200, JSON, b"stale")
+    assert c.get("a") is None and c.stats()["stores"] == 0
+
+
+def test_lru_eviction_and_size_limits(clock):
+    c = small_cache(max_entries=2, max_bytes=10, max_entry_bytes=6)
+    store(c, "a")
+    store(c, "b")
+    c.get("a")
+    store(c, "c")  # evicts b, the least recently used
+    assert [k for k in ("a", "b", "c") if c.get(k)] == ["a", "c"]
+    store(c, "big", body=b"1234567")
+    assert c.get("big") is None
+    store(c, "d", body=b"123456")
+    assert c.stats()["bytes"] <= 10
+
+
+def test_no_cache_without_a_validator_is_not_stored_and_refresh_extends(clock):
+    c = small_cache()
+    store(c, "a", headers=JSON + [("Cache-Control", "no-cache")])
+    assert c.get("a") is None
+    store(c, "b", headers=JSON + [("Cache-Control", "no-cache"), ("ETag", '"v1"')])
+    clock.now += 25
+    c.refresh("b")
+    clock.now += 25
+    assert c.get("b")["etag"] == '"v1"'
+
+
+def test_gateway_revalidates_hits_with_the_stored_etag(backend, monkeypatch):
+    server = backend()
+    monkeypatch.setattr(gateway, "employee", Upstream("employee_service", server.url))
+    monkeypatch.setattr(gateway, "cache", ResponseCache(max_bytes=1 << 20, max_entries=100, max_entry_bytes=1 << 16))
+    version = {"etag": '"v1"', "body": b'{"leaves": 1}'}
+
+    def respond(req):
+        headers = {"ETag": version["etag"], "Cache-Control": "no-cache"}
+        if req["headers"].get("If-None-Match") == version["etag"]:
+            return 304, headers, b""
+        return 200, headers, version["body"]
+    server.respond = respond
+    client = gateway.app.test_client()
+
+    first = client.get("/all_leaves")
+    assert first.headers["X-Cache"] == "MISS"
+    again = client.get("/all_leaves")
+    assert again.headers["X-Cache"] == "REVALIDATED" and again.get_json() == {"leaves": 1}
+    assert server.requests[-1]["headers"]["If-None-Match"] == '"v1"'
+    # The client's own validator still gets a 304 from the cached copy.
+    assert client.get("/all_leaves", headers={"If-None-Match": '"v1"'}).status_code == 304
+
+    # A write that never went through this gateway (another worker, a CLI job) is still seen.
+    version.update(etag='"v2"', body=b'{"leaves": 2}')
+    changed = client.get("/all_leaves")
+    assert changed.headers["X-Cache"] == "MISS" and changed.get_json() == {"leaves": 2}
+
+
+def test_proxied_writes_invalidate_matching_routes(backend, monkeypatch):
+    server = backend()
+    monkeypatch.setattr(gateway, "employee", Upstream("employee_service", server.url))
+    monkeypatch.setattr(gateway, "cache", ResponseCache(max_bytes=1 << 20, max_entries=100, max_entry_bytes=1 << 16))
+    client = gateway.app.test_client()
+    assert client.get("/leave_balance/1").headers["X-Cache"] == "MISS"
+    assert client.get("/leave_balance/1").headers["X-Cache"] == "HIT"
+    assert client.put("/update_leave/3", json={"status": "Approved"}).status_code == 200
+    assert client.get("/leave_balance/1").headers["X-Cache"] == "MISS"
@@ -0,0 +1,32 @@
+import time
+import pytest
+import app as gateway
+from upstreams import Upstream
+
+
+def test_a_slow_section_gets_one_attempt_within_the_deadline(backend):
+    a, b = backend(), backend()
+    a.delay = b.delay = 0.5
+    started = time.monotonic()
+    with pytest.raises(gateway.SectionError) as e:
+        gateway.fetch_section(Upstream("svc", [a.url, b.url]), "/slow", started + 0.2)
+    # No failover to the second replica once the first has used up the deadline.
+    assert e.value.status == 504 and time.monotonic() - started < 0.4
+    assert [r["path"] for r in a.requests + b.requests if r["path"] != "/health"] == ["/slow"]
+
+
+def test_dashboard_returns_fast_sections_and_reports_the_slow_one(backend, monkeypatch):
+    fast, slow = backend(), backend()
+    fast.body, slow.delay = b'{"leaves": []}', 0.5
+    monkeypatch.setattr(gateway, "DASHBOARD_TIMEOUT", 0.2)
+    monkeypatch.setattr(gateway, "EMPLOYEE_SECTIONS", {
+        "my_leaves": (Upstream("employee_service", fast.url), "/my_leaves/{employee_id}"),
+        "leave_balance": (Upstream("employee_service", slow.url), "/leave_balance/{employee_id}"),
+    })
+    started = time.monotonic()
+    resp = gateway.app.test_client().get("/dashboard/employee?employee_id=7")
+    assert time.monotonic() - started < 0.4
+    body = resp.get_json()
+    assert resp.status_code == 200 and body["my_leaves"] == {"leaves": []} and body["leave_balance"] is None
+    assert body["errors"]["leave_balance"]["status"] == 504
+    assert fast.requests[0]["path"] == "/my_leaves/7"
@@ -0,0 +1,36 @@
+import pytest
+import app as gateway
+from upstreams import Upstream
+
+
+@pytest.fixture
+def upstream(backend, monkeypatch):
+    server = backend()
+    monkeypatch.setattr(gateway, "employee", Upstream("employee_service", server.url))
+    return server
+
+
+def test_requests_reuse_one_pooled_keepalive_connection(upstream):
+    client = gateway.app.test_client()
+    for _ in range(3):
+        assert client.get("/all_leaves").get_json() == {"ok": True}
+    assert len(upstream.connections) == 1
+
+
+def test_method_query_body_and_status_pass_through(upstream):
+    upstream.status, upstream.body = 201, b'{"message": "created"}'
+    upstream.headers = {"X-Upstream": "yes", "Connection": "keep-alive"}
+    resp = gateway.app.test_client().post("/apply_leave?dry=1", json={"employee_id": 1})
+    assert (resp.status_code, resp.get_json()) == (201, {"message": "created"})
+    assert resp.headers["X-Upstream"] == "yes" and "Connection" not in resp.headers
+    req = upstream.requests[-1]
+    assert (req["method"], req["path"], req["body"]) == ("POST", "/apply_leave?dry=1", b'{"employee_id": 1}')
+
+
+def test_unreachable_upstream_is_a_503(backend, monkeypatch):
+    server = backend()
+    server.close()
+    monkeypatch.setattr(gateway, "employee", Upstream("employee_service", server.url))
+    resp = gateway.app.test_client().get("/all_leaves")
+    assert resp.status_code == 503 and resp.get_json()["error"].startswith("Service unavailable")
+
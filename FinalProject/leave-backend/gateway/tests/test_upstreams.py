@@ -0,0 +1,102 @@
+import time
+import pytest
+import upstreams
+from upstreams import NoReplica, Upstream
+
+
+@pytest.fixture(autouse=True)
+def first_replica_first(monkeypatch):
+    # Ties in acquire() start from a random replica; start from the first so tests are deterministic.
+    monkeypatch.setattr(upstreams.random, "randrange", lambda n: 0)
+    monkeypatch.setattr(upstreams, "HEALTH_INTERVAL", 0)
+
+
+def test_idempotent_requests_fail_over_to_another_replica(backend):
+    a, b = backend(), backend()
+    a.status = 503
+    up = Upstream("svc", [a.url, b.url])
+    resp = up.request("GET", "/x", idempotent=True)
+    assert resp.status == 200 and len(a.requests) == len(b.requests) == 1
+    # A write that reached a replica is never sent twice.
+    assert up.request("POST", "/x", body=b"{}").status == 503
+    assert [r["method"] for r in a.requests + b.requests].count("POST") == 1
+
+
+def test_a_refused_connection_is_retried_even_for_writes(backend):
+    a, b = backend(), backend()
+    a.close()
+    resp = Upstream("svc", [a.url, b.url]).request("POST", "/x", body=b"{}")
+    assert resp.status == 200 and len(b.requests) == 1
+
+
+def test_breaker_opens_fails_fast_and_closes_after_a_good_trial(backend, monkeypatch):
+    monkeypatch.setattr(upstreams, "BREAKER_FAILURES", 2)
+    monkeypatch.setattr(upstreams, "BREAKER_COOLDOWN", 0.1)
+    server = backend()
+    server.status = 503
+    up = Upstream("svc", server.url)
+    for _ in range(2):
+        assert up.request("GET", "/x", idempotent=True).status == 503
+    with pytest.raises(NoReplica):
+        up.request("GET", "/x", idempotent=True)
+    assert len(server.requests) == 2 and up.stats()["rejected"] == 1
+
+    time.sleep(0.15)
+    server.status = 200
+    assert up.request("GET", "/x", idempotent=True).status == 200
+    assert up.stats()["replicas"][0]["breaker"] == "closed"
+
+
+def test_a_failed_trial_reopens_the_breaker(backend, monkeypatch):
+    monkeypatch.setattr(upstreams, "BREAKER_FAILURES", 1)
+    monkeypatch.setattr(upstreams, "BREAKER_COOLDOWN", 0.1)
+    server = backend()
+    server.status = 503
+    up = Upstream("svc", server.url)
+    up.request("GET", "/x", idempotent=True)
+    time.sleep(0.15)
+    assert up.request("GET", "/x", idempotent=True).status == 503
+    assert up.stats()["replicas"][0]["breaker"] == "open"
+
+
+def test_hedged_request_returns_the_faster_replica(backend, monkeypatch):
+    monkeypatch.setattr(upstreams, "HEDGE_MS", 50)
+    slow, fast = backend(), backend()
+    slow.delay, slow.body, fast.body = 0.5, b"slow", b"fast"
+    up = Upstream("svc", [slow.url, fast.url])
+    started = time.monotonic()
+    resp = up.request("GET", "/x", idempotent=True, preload_content=True)
+    assert resp.data == b"fast" and time.monotonic() - started < 0.3
+    assert len(slow.requests) == len(fast.requests) == 1
+    # Writes are never hedged (once the slow copy is done, both replicas are idle again).
+    time.sleep(0.5)
+    assert up.request("POST", "/x", body=b"{}", preload_content=True).data == b"slow"
+    assert len(fast.requests) == 1
+
+
+def test_health_checks_eject_and_readmit_replicas(backend, monkeypatch):
+    monkeypatch.setattr(upstreams, "EJECT_AFTER", 2)
+    monkeypatch.setattr(upstreams, "READMIT_AFTER", 2)
+    a, b = backend(), backend()
+    up = Upstream("svc", [a.url, b.url])
+    replica = up.replicas[0]
+    a.status = 500
+    up.probe(replica)
+    assert replica.healthy
+    up.probe(replica)
+    assert not replica.healthy
+    up.request("GET", "/x", idempotent=True)
+    assert [r["path"] for r in a.requests] == ["/health", "/health"] and len(b.requests) == 1
+
+    a.status = 200
+    up.probe(replica)
+    up.probe(replica)
+    assert replica.healthy
+
+
+def test_every_replica_ejected_still_routes(backend):
+    server = backend()
+    up = Upstream("svc", [server.url, server.url])
+    for r in up.replicas:
+        r.healthy = False
+    assert up.request("GET", "/x", idempotent=True).status == 200
@@ -0,0 +1,261 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import urllib3
+from urllib3.exceptions import NewConnectionError, ProtocolError, TimeoutError as UpstreamTimeout
+from metrics import metrics
+
+POOL_SIZE       = int(os.getenv("UPSTREAM_POOL_SIZE", "20"))
+CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT    = float(os.getenv("UPSTREAM_READ_TIMEOUT", "30"))
+
+# Active health checks: a replica failing EJECT_AFTER probes in a row stops getting traffic
+# until it passes READMIT_AFTER in a row. Only runs when an upstream has more than one replica.
+HEALTH_PATH     = os.getenv("UPSTREAM_HEALTH_PATH", "/health")
+HEALTH_INTERVAL = float(os.getenv("UPSTREAM_HEALTH_INTERVAL", "2"))
+HEALTH_TIMEOUT  = float(os.getenv("UPSTREAM_HEALTH_TIMEOUT", "1"))
+EJECT_AFTER     = int(os.getenv("UPSTREAM_EJECT_AFTER", "2"))
+READMIT_AFTER   = int(os.getenv("UPSTREAM_READMIT_AFTER", "2"))
+
+# Per-replica circuit breaker: BREAKER_FAILURES consecutive failures open it, requests then fail
+# fast for BREAKER_COOLDOWN seconds, after which a single trial request decides whether it closes.
+BREAKER_FAILURES = int(os.getenv("UPSTREAM_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("UPSTREAM_BREAKER_COOLDOWN", "10"))
+
+# Idempotent requests (GETs without a body) may be retried on another replica, and with
+# UPSTREAM_HEDGE_MS > 0 a second copy goes to another replica when the first is that slow.
+RETRIES  = int(os.getenv("UPSTREAM_RETRIES", "1"))
+HEDGE_MS = float(os.getenv("UPSTREAM_HEDGE_MS", "0"))
+_hedges = ThreadPoolExecutor(max_workers=int(os.getenv("UPSTREAM_HEDGE_WORKERS", "32")), thread_name_prefix="hedge")
+
+# Statuses that say "this replica cannot serve right now" rather than "the request is bad".
+FAILURE_STATUSES = {502, 503, 504}
+TRANSPORT_ERRORS = (NewConnectionError, ProtocolError, UpstreamTimeout)
+
+
+class NoReplica(Exception):
+    """Every replica of an upstream has its circuit breaker open."""
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.pool = urllib3.connection_from_url(
+            self.url,
+            maxsize=POOL_SIZE,
+            block=False,
+            timeout=urllib3.Timeout(connect=CONNECT_TIMEOUT, read=READ_TIMEOUT),
+            retries=False,
+        )
+        self.outstanding = 0
+        self.healthy = True
+        self.probe_passes = self.probe_fails = 0
+        self.failures = 0          # consecutive failed requests
+        self.opened_at = None      # breaker open since (monotonic), None while closed
+        self.trial = False         # the half-open trial request is in flight
+        self.requests = self.errors = 0
+
+    def breaker(self, now: float) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if now - self.opened_at >= BREAKER_COOLDOWN else "open"
+
+    def to_dict(self, now: float) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "breaker": self.breaker(now),
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "consecutive_failures": self.failures,
+        }
+
+
+class Upstream:
+    """A named service behind one or more interchangeable replicas."""
+
+    def __init__(self, name: str, urls):
+        if isinstance(urls, str):
+            urls = [u.strip() for u in urls.split(",") if u.strip()]
+        if not urls:
+            raise ValueError(f"{name}: at least one replica URL is required")
+        self.name = name
+        self.replicas = [Replica(u) for u in urls]
+        self.rejected = 0  # requests failed fast because no breaker admitted them
+        self._lock = threading.Lock()
+        self._prober_pid = None
+
+    def acquire(self, exclude=()) -> Replica:
+        # Least outstanding requests among healthy replicas whose breaker admits one; a random
+        # start breaks ties so idle replicas share the load. If health checks have ejected every
+        # replica, all of them are tried rather than failing everything (panic routing).
+        self._ensure_probing()
+        with self._lock:
+            now = time.monotonic()
+            pool = [r for r in self.replicas if r not in exclude]
+            candidates = [r for r in pool if r.healthy] or pool
+            start = random.randrange(len(candidates)) if candidates else 0
+            best = None
+            for r in candidates[start:] + candidates[:start]:
+                state = r.breaker(now)
+                if state == "open" or (state == "half_open" and r.trial):
+                    continue
+                if best is None or r.outstanding < best.outstanding:
+                    best = r
+            if best is None:
+                self.rejected += 1
+                raise NoReplica(self.name)
+            if best.breaker(now) == "half_open":
+                best.trial = True
+            best.outstanding += 1
+            return best
+
+    def release(self, replica: Replica, ok: bool):
+        with self._lock:
+            replica.outstanding -= 1
+            replica.requests += 1
+            trial, replica.trial = replica.trial, False
+            if ok:
+                replica.failures, replica.opened_at = 0, None
+                return
+            replica.errors += 1
+            replica.failures += 1
+            if trial or replica.failures >= BREAKER_FAILURES:
+                replica.opened_at = time.monotonic()
+
+    def _attempt(self, replica: Replica, method: str, url: str, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            resp = replica.pool.urlopen(method, url, **kwargs)
+        except UpstreamTimeout:
+            self.release(replica, False)
+            metrics.observe_upstream(self.name, "timeout", (time.perf_counter() - t0) * 1000)
+            raise
+        except (NewConnectionError, ProtocolError):
+            self.release(replica, False)
+            metrics.observe_upstream(self.name, "unavailable", (time.perf_counter() - t0) * 1000)
+            raise
+        except Exception:
+            self.release(replica, False)
+            metrics.observe_upstream(self.name, "error", (time.perf_counter() - t0) * 1000)
+            raise
+        # Released at response headers: a long streamed body (SSE) must not look like load.
+        self.release(replica, resp.status not in FAILURE_STATUSES)
+        metrics.observe_upstream(self.name, f"{resp.status // 100}xx", (time.perf_counter() - t0) * 1000)
+        return resp
+
+    def _hedged(self, first: Replica, tried: list, method: str, url: str, **kwargs):
+        # First usable answer wins; the slower copy is drained and dropped when it arrives.
+        futures = {_hedges.submit(self._attempt, first, method, url, **kwargs)}
+        done, _ = wait(futures, timeout=HEDGE_MS / 1000)
+        if not done:
+            try:
+                second = self.acquire(exclude=tried)
+            except NoReplica:
+                second = None
+            if second is not None:
+                tried.append(second)
+                futures.add(_hedges.submit(self._attempt, second, method, url, **kwargs))
+        pending, fallback, error = futures, None, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                if f.exception() is not None:
+                    error = error or f.exception()
+                elif f.result().status not in FAILURE_STATUSES:
+                    for other in pending:
+                        other.add_done_callback(_discard)
+                    if fallback is not None:
+                        discard(fallback)
+                    return f.result()
+                elif fallback is None:
+                    fallback = f.result()
+                else:
+                    discard(f.result())
+        if fallback is not None:
+            return fallback
+        raise error
+
+    def request(self, method: str, url: str, idempotent: bool = False, failover: bool = True, **kwargs):
+        """Send to the best replica. Retries go to a different replica: for idempotent requests
+        after any transport error or 502/503/504, otherwise only when the connection was refused
+        (nothing was sent). failover=False makes a single attempt, for callers with a deadline.
+        Raises NoReplica when every breaker is open."""
+        retries = RETRIES if failover else 0
+        tried, error = [], None
+        for attempt in range(1 + retries):
+            try:
+                replica = self.acquire(exclude=tried)
+            except NoReplica:
+                if error is not None:
+                    raise error
+                raise
+            tried.append(replica)
+            last = attempt == retries or len(tried) == len(self.replicas)
+            try:
+                if idempotent and HEDGE_MS > 0 and len(self.replicas) > 1:
+                    resp = self._hedged(replica, tried, method, url, **kwargs)
+                else:
+                    resp = self._attempt(replica, method, url, **kwargs)
+            except TRANSPORT_ERRORS as e:
+                if last or not (idempotent or isinstance(e, NewConnectionError)):
+                    raise
+                error = e
+                continue
+            if idempotent and resp.status in FAILURE_STATUSES and not last:
+                discard(resp)
+                continue
+            return resp
+
+    def _ensure_probing(self):
+        # Started lazily in each process: a prober started before gunicorn forks would not survive it.
+        if len(self.replicas) < 2 or HEALTH_INTERVAL <= 0 or self._prober_pid == os.getpid():
+            return
+        with self._lock:
+            if self._prober_pid == os.getpid():
+                return
+            self._prober_pid = os.getpid()
+        threading.Thread(target=self._probe_forever, name=f"health-{self.name}", daemon=True).start()
+
+    def _probe_forever(self):
+        while True:
+            for replica in self.replicas:
+                self.probe(replica)
+            time.sleep(HEALTH_INTERVAL)
+
+    def probe(self, replica: Replica) -> bool:
+        try:
+            resp = replica.pool.urlopen("GET", HEALTH_PATH, retries=False, redirect=False,
+                                        timeout=urllib3.Timeout(connect=HEALTH_TIMEOUT, read=HEALTH_TIMEOUT))
+            ok = resp.status == 200
+        except Exception:
+            ok = False
+        with self._lock:
+            if ok:
+                replica.probe_passes, replica.probe_fails = replica.probe_passes + 1, 0
+                if not replica.healthy and replica.probe_passes >= READMIT_AFTER:
+                    replica.healthy = True
+            else:
+                replica.probe_passes, replica.probe_fails = 0, replica.probe_fails + 1
+                if replica.healthy and replica.probe_fails >= EJECT_AFTER:
+                    replica.healthy = False
+        return ok
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {"name": self.name, "rejected": self.rejected, "replicas": [r.to_dict(now) for r in self.replicas]}
+
+
+def discard(resp):
+    # A response nobody will read: close it instead of returning a half-read connection to the pool.
+    resp.close()
+    resp.release_conn()
+
+
+def _discard(future):
+    if future.exception() is None:
+        discard(future.result())
@@ -1,65 +1,110 @@
-import os
-from flask import Flask, request, jsonify
+import json
+import logging
+import threading
+import click
+import requests
+from flask import Blueprint, Flask, current_app, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
-from extension import db
-from models import User, LeaveRequest, LeaveBalance 
-
-app = Flask(__name__)
-CORS(app, supports_credentials=True)
-
-
-DB_PATH = os.path.join(app.instance_path, "manager.db")
-
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{DB_PATH}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
+from extension import db, tune_sqlite
+from config import Config
+from metrics import init_metrics
+from migrations import upgrade_schema, bootstrap
+from models import User, LeaveRequest
+from replication import POLL_INTERVAL, forward_to_primary, sync_once, run_forever, replication_status
+
+bp = Blueprint("manager", __name__, cli_group=None)
+
+ALL_LEAVES_PAGE_MAX = 500
+STREAM_BATCH_SIZE = 500
+
+def leave_to_dict(r, user):
+    return {
+        "id": r.id,
+        "employee_id": r.employee_id,
+        "employee_name": user.username,
+        "reason": r.reason,
+        "status": r.status,
+        "remarks": r.remarks or "",
+        "start_date": r.start_date,
+        "end_date": r.end_date
+    }
+
+def parse_date(date_str: str):
+    # Same formats as employee_service's parse_date, so a query means the same on the primary
+    # and on this replica.
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return datetime.strptime(date_str, "%d-%m-%Y").date()
+
+def filtered_leaves_query(args):
+    q = db.session.query(LeaveRequest, User).join(User, LeaveRequest.employee_id == User.id)
+    if args.get("status"):
+        q = q.filter(LeaveRequest.status == args["status"])
+    employee_id = args.get("employee_id", type=int)
+    if employee_id is not None:
+        q = q.filter(LeaveRequest.employee_id == employee_id)
+    if args.get("leave_type"):
+        q = q.filter(LeaveRequest.leave_type == args["leave_type"].strip().lower())
+    if args.get("from"):
+        # Dates are replicated as ISO strings, which compare in date order.
+        q = q.filter(LeaveRequest.end_date >= parse_date(args["from"]).isoformat())
+    if args.get("to"):
+        q = q.filter(LeaveRequest.start_date <= parse_date(args["to"]).isoformat())
+    cursor = args.get("cursor", type=int)
+    if cursor is not None:
+        q = q.filter(LeaveRequest.id > cursor)
+    return q.order_by(LeaveRequest.id)
+
+def stream_json_array(rows):
+    yield "["
+    first = True
+    for r, user in rows:
+        yield ("" if first else ",") + json.dumps(leave_to_dict(r, user))
+        first = False
+    yield "]"
+
+def primary_write(path: str, sync: bool = True):
+    # Writes go to employee_service; pulling the feed right after gives read-your-writes here.
+    try:
+        body, status = forward_to_primary(request.method, path, request.get_json(silent=True))
+    except requests.RequestException:
+        return jsonify({"error": "employee_service is unavailable"}), 503
+    if sync and status < 300:
+        try:
+            sync_once(max_batches=1)
+        except requests.RequestException:
+            db.session.rollback()
+    return jsonify(body), status
+
+def primary_read(path: str):
+    # Archived leaves live only on the primary; the replica holds the live set.
+    try:
+        body, status = forward_to_primary("GET", f"{path}?{request.query_string.decode()}")
+    except requests.RequestException:
+        return jsonify({"error": "employee_service is unavailable"}), 503
+    return jsonify(body), status
 
-@app.route("/create_employee", methods=["POST"])
+@bp.route("/create_employee", methods=["POST"])
 def create_employee():
-    data = request.get_json()
-    username = data.get("username")
-    password = data.get("password")
-
-    if not username or not password:
-        return jsonify({"error": "Username and password are required"}), 400
-
-    if User.query.filter_by(username=username).first():
-        return jsonify({"error": "Username already exists"}), 409
+    return primary_write("/create_employee")
 
-    hashed_password = generate_password_hash(password)
-    new_user = User(username=username, password=hashed_password, role="employee", approved=False)
-    db.session.add(new_user)
-    db.session.commit()
-    return jsonify({"message": f"Employee {username} created successfully."}), 201
-
-@app.route("/login", methods=["POST"])
+@bp.route("/login", methods=["POST"])
 def login():
-    data = request.json
-    user = User.query.filter_by(username=data["username"]).first()
-    if not user or not check_password_hash(user.password, data["password"]):
-        return jsonify({"error": "Invalid credentials"}), 401
-    return jsonify({"message": f"Welcome {user.username}", "role": user.role, "id": user.id})
+    # Nothing changes on a login, so there is nothing to sync.
+    return primary_write("/login", sync=False)
 
-@app.route("/pending_employees", methods=["GET"])
+@bp.route("/pending_employees", methods=["GET"])
 def pending_employees():
     users = User.query.filter_by(role="employee", approved=False).all()
     return jsonify([{"id": u.id, "username": u.username} for u in users])
 
-@app.route("/approve_employee/<int:user_id>", methods=["PUT"])
+@bp.route("/approve_employee/<int:user_id>", methods=["PUT"])
 def approve_employee(user_id):
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-
-    user.approved = True
-    if not LeaveBalance.query.filter_by(employee_id=user.id).first():
-        db.session.add(LeaveBalance(employee_id=user.id))
-    db.session.commit()
-    return jsonify({"message": f"Employee {user.username} approved and leave balance initialized"})
+    return primary_write(f"/approve_employee/{user_id}")
 
-@app.route("/leave_requests", methods=["GET"])
+@bp.route("/leave_requests", methods=["GET"])
 def leave_requests():
     requests_ = LeaveRequest.query.filter_by(status="Pending").all()
     return jsonify([
@@ -75,84 +120,103 @@ def leave_requests():
         } for r in requests_
     ])
 
-@app.route("/all_leaves", methods=["GET"])
+@bp.route("/all_leaves", methods=["GET"])
 def all_leaves():
-    requests_ = LeaveRequest.query.all()
-    return jsonify([
-        {
-            "id": r.id,
-            "employee_id": r.employee_id,
-            "employee_name": r.employee.username,
-            "reason": r.reason,
-            "status": r.status,
-            "remarks": r.remarks or "",
-            "start_date": r.start_date,
-            "end_date": r.end_date
-        } for r in requests_
-    ])
-
-@app.route("/update_leave/<int:leave_id>", methods=["PUT"])
-def update_leave(leave_id):
+    # Same contract as employee_service: ?limit=&cursor= for keyset pages, ?stream=1 to stream.
+    if request.args.get("include_archived") in {"1", "true"}:
+        return primary_read("/all_leaves")
     try:
-        data = request.get_json(force=True)
-        if not data:
-            return jsonify({"error": "No input data provided"}), 400
-
-        leave = LeaveRequest.query.get(leave_id)
-        if not leave:
-            return jsonify({"error": "Leave not found"}), 404
-
-        status = data.get("status")
-        remarks = data.get("remarks", "")
-
-        if status not in ["Approved", "Rejected", "Pending"]:
-            return jsonify({"error": "Invalid status"}), 400
-
-        if status == "Approved":
-            balance = LeaveBalance.query.filter_by(employee_id=leave.employee_id).first()
-            if not balance:
-                return jsonify({"error": "Leave balance not found"}), 404
-
-            days_requested = (
-                datetime.strptime(leave.end_date, "%Y-%m-%d") -
-                datetime.strptime(leave.start_date, "%Y-%m-%d")
-            ).days + 1
-
-            lt = (leave.leave_type or "").lower()
-            if lt == "sick":
-                if balance.sick_casual < days_requested:
-                    return jsonify({"error": "Insufficient Sick/Casual balance"}), 400
-                balance.sick_casual -= days_requested
-            elif lt == "medical":
-                if balance.medical < days_requested:
-                    return jsonify({"error": "Insufficient Medical balance"}), 400
-                balance.medical -= days_requested
-            elif lt == "privileged":
-                if balance.privileged < days_requested:
-                    return jsonify({"error": "Insufficient Privileged balance"}), 400
-                balance.privileged -= days_requested
-            else:
-                return jsonify({"error": "Invalid leave type"}), 400
-
-        leave.status = status
-        leave.remarks = remarks
-        db.session.commit()
-        return jsonify({"message": f"Leave {status.lower()} successfully"}), 200
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-@app.route("/health")
+        q = filtered_leaves_query(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid date format (use YYYY-MM-DD)"}), 400
+
+    limit = request.args.get("limit", type=int)
+    if request.args.get("stream") in {"1", "true"}:
+        if limit:
+            q = q.limit(limit)
+        return Response(stream_with_context(stream_json_array(q.yield_per(STREAM_BATCH_SIZE))), mimetype="application/json")
+
+    if limit:
+        limit = max(1, min(limit, ALL_LEAVES_PAGE_MAX))
+        rows = q.limit(limit + 1).all()
+        page = rows[:limit]
+        return jsonify({
+            "items": [leave_to_dict(r, user) for r, user in page],
+            "next_cursor": page[-1][0].id if len(rows) > limit else None
+        })
+
+    return jsonify([leave_to_dict(r, user) for r, user in q.all()])
+
+@bp.route("/update_leave/<int:leave_id>", methods=["PUT"])
+def update_leave(leave_id):
+    return primary_write(f"/update_leave/{leave_id}")
+
+@bp.route("/update_leaves", methods=["PUT"])
+def update_leaves():
+    return primary_write("/update_leaves")
+
+@bp.route("/replication_status", methods=["GET"])
+def replication_status_route():
+    return jsonify(replication_status())
+
+@bp.route("/health")
 def health():
     return jsonify({"status": "manager-ok"})
 
 
-with app.app_context():
-    os.makedirs("/app/instance", exist_ok=True)
-    db.create_all()
-    if not User.query.filter_by(username="manager").first():
-        hashed_password = generate_password_hash("manager123")
-        db.session.add(User(username="manager", password=hashed_password, role="manager", approved=True))
-        db.session.commit()
+@bp.cli.command("migrate")
+def migrate_command():
+    upgrade_schema()
+    click.echo("Schema is up to date")
+
+
+@bp.cli.command("bootstrap")
+def bootstrap_command():
+    for message in bootstrap():
+        click.echo(message)
+
+
+@bp.cli.command("replicate")
+@click.option("--once", is_flag=True, help="Drain the feed once and exit instead of polling.")
+@click.option("--interval", type=float, default=POLL_INTERVAL, show_default=True, help="Seconds between polls.")
+def replicate_command(once, interval):
+    bootstrap()
+    if once:
+        click.echo(f"Applied {sync_once()} change events")
+        return
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    run_forever(current_app._get_current_object(), interval)
+
+
+@bp.cli.command("prune-outbox")
+def prune_outbox_command():
+    # Compacts employee_service's outbox up to what this replica has applied. With several
+    # replicas, run it from the one furthest behind: any replica older than a dropped deletion
+    # is told to reload from seq 0.
+    body, status = forward_to_primary("POST", "/outbox/prune", {"through": replication_status()["last_seq"]})
+    if status != 200:
+        raise click.ClickException(body.get("error", f"employee_service answered {status}"))
+    click.echo(f"Removed {body['removed']} outbox events at or below seq {body['through']}")
+
+
+def create_app(config=Config):
+    app = Flask(__name__)
+    CORS(app, supports_credentials=True)
+    app.config.from_object(config)
+    db.init_app(app)
+    tune_sqlite(app)
+    init_metrics(app, db)
+    app.register_blueprint(bp)
+    return app
+
+
+app = create_app()
+
+
 if __name__ == "__main__":
+    with app.app_context():
+        for message in bootstrap():
+            print(message)
+    # Single dev process: replicate in a background thread. In production run `flask replicate`.
+    threading.Thread(target=run_forever, args=(app,), daemon=True).start()
     app.run(host="0.0.0.0", port=8002, debug=False)
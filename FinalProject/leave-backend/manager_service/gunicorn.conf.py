@@ -0,0 +1,22 @@
+import os
+
+# Production serving: python app.py stays as the single-process dev server.
+bind = f"0.0.0.0:{os.getenv('PORT', '8002')}"
+workers = int(os.getenv("WEB_WORKERS", "2"))
+threads = int(os.getenv("WEB_THREADS", "4"))
+worker_class = "gthread"
+timeout = int(os.getenv("WEB_TIMEOUT", "60"))
+keepalive = 5
+accesslog = "-"
+
+# Importing app is side-effect free (schema and seeding live in `flask bootstrap`), so this
+# only shares the loaded code with the workers.
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Nothing in the master should have connected, but never let workers share a SQLite handle.
+    from app import app
+    from extension import db
+    with app.app_context():
+        db.engine.dispose(close=False)
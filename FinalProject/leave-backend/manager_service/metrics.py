@@ -0,0 +1,237 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, g, has_request_context, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+
+# Copied unchanged into every service: each image is built from its own directory.
+
+# A request issuing more SQL reads than this is logged: the usual sign of an N+1 loop. Writes are
+# not counted, since one approval legitimately fans out into outbox, counter and index upserts.
+QUERY_WARN_THRESHOLD = int(os.getenv("METRICS_QUERY_WARN", "20"))
+READ_PREFIXES = ("SELECT", "WITH")
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Route labels come from URL rules, but unmatched paths are client-controlled; cap them.
+MAX_ROUTES = 500
+
+log = logging.getLogger("metrics")
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+
+    def cumulative(self):
+        total = 0
+        for bound, n in zip(BUCKETS_MS + ("+Inf",), self.counts):
+            total += n
+            yield bound, total
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "sum_ms": round(self.sum_ms, 3),
+                "buckets": {str(bound): n for bound, n in self.cumulative()}}
+
+
+class RouteStats:
+    def __init__(self):
+        self.statuses = defaultdict(int)
+        self.latency = Histogram()
+        self.sql_queries = 0
+        self.sql_reads = 0
+        self.sql_ms = 0.0
+        self.max_reads = 0
+        self.over_threshold = 0
+        self.json_ms = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "statuses": dict(sorted(self.statuses.items())),
+            "latency_ms": self.latency.to_dict(),
+            "sql": {"queries": self.sql_queries, "reads": self.sql_reads, "ms": round(self.sql_ms, 3),
+                    "max_reads_per_request": self.max_reads, "requests_over_threshold": self.over_threshold},
+            "json_ms": round(self.json_ms, 3),
+        }
+
+
+class UpstreamStats:
+    def __init__(self):
+        self.outcomes = defaultdict(int)
+        self.latency = Histogram()
+
+    def to_dict(self) -> dict:
+        return {"outcomes": dict(sorted(self.outcomes.items())), "latency_ms": self.latency.to_dict()}
+
+
+class Metrics:
+    """Per-process counters; under gunicorn every worker reports its own (see "pid")."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.in_flight = 0
+        self.routes = defaultdict(RouteStats)
+        self.upstreams = defaultdict(UpstreamStats)
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def observe_request(self, route: str, status: int, ms: float, queries: int, reads: int, sql_ms: float,
+                        json_ms: float):
+        with self._lock:
+            if route not in self.routes and len(self.routes) >= MAX_ROUTES:
+                route = "<other>"
+            stats = self.routes[route]
+            stats.statuses[str(status)] += 1
+            stats.latency.observe(ms)
+            stats.sql_queries += queries
+            stats.sql_reads += reads
+            stats.sql_ms += sql_ms
+            stats.max_reads = max(stats.max_reads, reads)
+            stats.over_threshold += reads > QUERY_WARN_THRESHOLD
+            stats.json_ms += json_ms
+
+    def observe_upstream(self, upstream: str, outcome: str, ms: float):
+        # outcome is the status class ("2xx" ... "5xx") or "timeout" / "unavailable" / "error".
+        with self._lock:
+            stats = self.upstreams[upstream]
+            stats.outcomes[outcome] += 1
+            stats.latency.observe(ms)
+        if has_request_context():
+            g.upstream_ms = g.get("upstream_ms", 0.0) + ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "in_flight": self.in_flight,
+                "query_warn_threshold": QUERY_WARN_THRESHOLD,
+                "routes": {k: v.to_dict() for k, v in sorted(self.routes.items())},
+                "upstreams": {k: v.to_dict() for k, v in sorted(self.upstreams.items())},
+            }
+
+    def prometheus(self) -> str:
+        snap = self.snapshot()
+        lines = [f"process_uptime_seconds {snap['uptime_seconds']}", f"http_requests_in_flight {snap['in_flight']}"]
+        with self._lock:
+            for route, s in sorted(self.routes.items()):
+                method, _, rule = route.partition(" ")
+                labels = f'method="{method}",route="{rule}"'
+                lines += [f'http_requests_total{{{labels},status="{code}"}} {n}' for code, n in sorted(s.statuses.items())]
+                lines += _histogram("http_request_duration_seconds", labels, s.latency)
+                lines += [f"db_queries_total{{{labels}}} {s.sql_queries}",
+                          f"db_reads_total{{{labels}}} {s.sql_reads}",
+                          f"db_query_seconds_total{{{labels}}} {s.sql_ms / 1000:.6f}",
+                          f"db_queries_over_threshold_total{{{labels}}} {s.over_threshold}",
+                          f"json_encode_seconds_total{{{labels}}} {s.json_ms / 1000:.6f}"]
+            for upstream, s in sorted(self.upstreams.items()):
+                labels = f'upstream="{upstream}"'
+                lines += [f'upstream_requests_total{{{labels},outcome="{o}"}} {n}' for o, n in sorted(s.outcomes.items())]
+                lines += _histogram("upstream_duration_seconds", labels, s.latency)
+        return "\n".join(lines) + "\n"
+
+
+def _histogram(name: str, labels: str, h: Histogram) -> list:
+    out = [f'{name}_bucket{{{labels},le="{b if b == "+Inf" else format(b / 1000, "g")}"}} {n}'
+           for b, n in h.cumulative()]
+    return out + [f"{name}_sum{{{labels}}} {h.sum_ms / 1000:.6f}", f"{name}_count{{{labels}}} {h.count}"]
+
+
+metrics = Metrics()
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    # jsonify() goes through dumps(), so this separates serialization from handler time.
+    def dumps(self, obj, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            if has_request_context():
+                g.json_ms = g.get("json_ms", 0.0) + (time.perf_counter() - t0) * 1000
+
+
+def instrument_sql(engine):
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_t0 = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            g.sql_queries = g.get("sql_queries", 0) + 1
+            g.sql_reads = g.get("sql_reads", 0) + statement.lstrip()[:6].upper().startswith(READ_PREFIXES)
+            g.sql_ms = g.get("sql_ms", 0.0) + (time.perf_counter() - context._metrics_t0) * 1000
+
+
+def rule_label() -> str:
+    rule = request.url_rule.rule if request.url_rule else "<unmatched>"
+    return f"{request.method} {rule}"
+
+
+def init_metrics(app, db=None, route_label=rule_label):
+    # Times every request and breaks it down in a Server-Timing header: db (SQL), json
+    # (serialization), upstream (proxied calls) and app (the rest of the handler).
+    app.json = TimedJSONProvider(app)
+    if db is not None:
+        with app.app_context():
+            instrument_sql(db.engine)
+
+    @app.before_request
+    def start_timer():
+        g.metrics_t0 = time.perf_counter()
+        # g outlives the request when an app context is already pushed (tests, CLI, benchmarks).
+        g.sql_queries, g.sql_reads, g.sql_ms, g.json_ms, g.upstream_ms = 0, 0, 0.0, 0.0, 0.0
+        metrics.request_started()
+
+    @app.after_request
+    def record_request(response):
+        if "metrics_t0" not in g:
+            return response
+        ms = (time.perf_counter() - g.metrics_t0) * 1000
+        queries, reads, sql_ms, json_ms = g.sql_queries, g.sql_reads, g.sql_ms, g.json_ms
+        upstream_ms = g.upstream_ms
+        label = route_label()
+        metrics.observe_request(label, response.status_code, ms, queries, reads, sql_ms, json_ms)
+        if reads > QUERY_WARN_THRESHOLD:
+            log.warning("%s %s issued %d SQL reads (%d statements, %.1f ms), over the threshold of %d",
+                        request.method, request.full_path.rstrip("?"), reads, queries, sql_ms, QUERY_WARN_THRESHOLD)
+        timing = [f"app;dur={max(0.0, ms - sql_ms - json_ms - upstream_ms):.1f}"]
+        if queries:
+            timing.append(f'db;dur={sql_ms:.1f};desc="{queries} queries"')
+        if json_ms:
+            timing.append(f"json;dur={json_ms:.1f}")
+        if upstream_ms:
+            timing.append(f"upstream;dur={upstream_ms:.1f}")
+        response.headers["Server-Timing"] = ", ".join(timing)
+        return response
+
+    @app.teardown_request
+    def finish_request(_exc):
+        if "metrics_t0" in g:
+            metrics.request_finished()
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        # JSON by default; ?format=prometheus for the text exposition format.
+        if request.args.get("format") == "prometheus":
+            return Response(metrics.prometheus(), mimetype="text/plain; version=0.0.4")
+        return jsonify(metrics.snapshot()), 200
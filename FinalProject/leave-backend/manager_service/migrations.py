@@ -0,0 +1,28 @@
+import os
+from sqlalchemy.dialects.sqlite import insert
+from extension import db
+from models import ReplicationState
+from replication import SOURCE
+
+
+def _ensure_sqlite_dir():
+    if db.engine.dialect.name == "sqlite" and db.engine.url.database:
+        os.makedirs(os.path.dirname(os.path.abspath(db.engine.url.database)), exist_ok=True)
+
+
+def upgrade_schema():
+    _ensure_sqlite_dir()
+    db.create_all()
+
+
+def bootstrap():
+    # Run once per deploy (flask bootstrap), not per worker; every step is idempotent.
+    # Users, leaves and balances are replicated from employee_service, so nothing is seeded here.
+    messages = []
+    upgrade_schema()
+    messages.append("Schema is up to date")
+    stmt = insert(ReplicationState).values(source=SOURCE, last_seq=0, head_seq=0)
+    if db.session.execute(stmt.on_conflict_do_nothing(index_elements=["source"])).rowcount:
+        messages.append(f"Replication from {SOURCE} starts at seq 0")
+    db.session.commit()
+    return messages
@@ -29,3 +29,13 @@ class LeaveBalance(db.Model):
     privileged  = db.Column(db.Integer, default=18)
 
     employee = db.relationship('User', backref=db.backref('leave_balance', uselist=False))
+
+class ReplicationState(db.Model):
+    # One row per upstream feed. last_seq is committed with the rows it covers, so a restart
+    # resumes exactly where the last applied batch ended.
+    __tablename__ = "replication_state"
+    source = db.Column(db.String(40), primary_key=True)
+    last_seq = db.Column(db.Integer, nullable=False, default=0)
+    head_seq = db.Column(db.Integer, nullable=False, default=0)
+    behind_since = db.Column(db.DateTime, nullable=True)  # created_at of the oldest unapplied event
+    last_sync_at = db.Column(db.DateTime, nullable=True)
@@ -0,0 +1,155 @@
+import os
+import time
+import logging
+from datetime import datetime
+import requests
+from sqlalchemy.dialects.sqlite import insert
+from extension import db
+from metrics import metrics
+from models import User, LeaveRequest, LeaveBalance, ReplicationState
+
+EMPLOYEE_URL = os.getenv("EMPLOYEE_URL", "http://localhost:8001")
+SOURCE = "employee_service"
+BATCH_SIZE = int(os.getenv("REPLICATION_BATCH_SIZE", "500"))
+POLL_INTERVAL = float(os.getenv("REPLICATION_POLL_INTERVAL", "1.0"))
+PRIMARY_TIMEOUT = float(os.getenv("PRIMARY_TIMEOUT", "10"))
+
+log = logging.getLogger("replication")
+_http = requests.Session()
+
+# entity -> (table, key column). Balances are keyed by employee id on both sides.
+_TABLES = {
+    "user": (User.__table__, "id"),
+    "balance": (LeaveBalance.__table__, "employee_id"),
+    "leave": (LeaveRequest.__table__, "id"),
+}
+
+
+def _call_primary(method: str, path: str, **kwargs):
+    t0 = time.perf_counter()
+    try:
+        resp = _http.request(method, f"{EMPLOYEE_URL}{path}", timeout=PRIMARY_TIMEOUT, **kwargs)
+    except requests.RequestException as e:
+        outcome = "timeout" if isinstance(e, requests.Timeout) else "unavailable"
+        metrics.observe_upstream(SOURCE, outcome, (time.perf_counter() - t0) * 1000)
+        raise
+    metrics.observe_upstream(SOURCE, f"{resp.status_code // 100}xx", (time.perf_counter() - t0) * 1000)
+    return resp
+
+
+def forward_to_primary(method: str, path: str, payload=None):
+    # employee_service owns every write; this replica only serves reads.
+    resp = _call_primary(method, path, json=payload)
+    try:
+        body = resp.json()
+    except ValueError:
+        body = {"error": resp.text or resp.reason}
+    return body, resp.status_code
+
+
+def fetch_events(after: int) -> dict:
+    resp = _call_primary("GET", "/outbox", params={"after": after, "limit": BATCH_SIZE})
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _upsert(entity: str, rows: list):
+    table, key = _TABLES[entity]
+    if entity == "user":
+        # Password hashes are not replicated; logins are forwarded to employee_service.
+        rows = [dict(r, password="") for r in rows]
+    stmt = insert(table).values(rows)
+    updated = {c: stmt.excluded[c] for c in rows[0] if c not in {key, "password"}}
+    db.session.execute(stmt.on_conflict_do_update(index_elements=[key], set_=updated))
+
+
+def apply_batch(events: list, head_seq: int) -> int:
+    # The first statement is a write, so SQLite's write lock is held before the cursor is read:
+    # concurrent appliers queue up and can never replay an older snapshot over a newer one.
+    now = datetime.utcnow()
+    state = ReplicationState.__table__
+    db.session.execute(state.update().where(state.c.source == SOURCE).values(last_sync_at=now))
+    last_seq = db.session.query(ReplicationState.last_seq).filter_by(source=SOURCE).scalar() or 0
+    fresh = [e for e in events if e["seq"] > last_seq]
+
+    if fresh and last_seq == 0:
+        # Rows written before replication existed are not in the feed; start from a clean copy.
+        for table, _ in reversed(list(_TABLES.values())):
+            db.session.execute(table.delete())
+
+    # Events are full row snapshots, so only the newest one per row matters.
+    latest = {}
+    for e in fresh:
+        latest[(e["entity"], e["key"])] = e
+    for entity, (table, key) in _TABLES.items():
+        rows = [e["data"] for (ent, _), e in latest.items() if ent == entity and e["op"] == "upsert"]
+        for i in range(0, len(rows), BATCH_SIZE):
+            _upsert(entity, rows[i:i + BATCH_SIZE])
+        gone = [k for (ent, k), e in latest.items() if ent == entity and e["op"] == "delete"]
+        if gone:
+            db.session.execute(table.delete().where(table.c[key].in_(gone)))
+
+    new_last = fresh[-1]["seq"] if fresh else last_seq
+    values = {"last_seq": new_last, "head_seq": max(head_seq, new_last)}
+    if new_last >= head_seq:
+        values["behind_since"] = None
+    elif fresh:
+        values["behind_since"] = datetime.fromisoformat(fresh[-1]["created_at"].rstrip("Z"))
+    db.session.execute(state.update().where(state.c.source == SOURCE).values(**values))
+    db.session.commit()
+    return len(fresh)
+
+
+def restart_replication():
+    log.warning("feed compacted past last_seq, reloading from seq 0")
+    state = ReplicationState.__table__
+    db.session.execute(state.update().where(state.c.source == SOURCE).values(last_seq=0))
+    db.session.commit()
+
+
+def sync_once(max_batches: int = 0) -> int:
+    # Pull pages until the feed is drained (or max_batches pages); returns events applied.
+    applied = batches = 0
+    while True:
+        after = db.session.query(ReplicationState.last_seq).filter_by(source=SOURCE).scalar() or 0
+        db.session.rollback()
+        page = fetch_events(after)
+        if page.get("reset"):
+            # The primary compacted deletions this replica had not read yet: reload from seq 0.
+            restart_replication()
+            continue
+        applied += apply_batch(page["events"], page["head_seq"])
+        batches += 1
+        if len(page["events"]) < BATCH_SIZE or (max_batches and batches >= max_batches):
+            return applied
+
+
+def run_forever(app, interval: float = POLL_INTERVAL):
+    while True:
+        with app.app_context():
+            try:
+                applied = sync_once()
+                if applied:
+                    log.info("applied %d change events", applied)
+            except requests.RequestException as e:
+                db.session.rollback()
+                log.warning("replication poll failed: %s", e)
+        time.sleep(interval)
+
+
+def replication_status() -> dict:
+    state = ReplicationState.query.get(SOURCE)
+    now = datetime.utcnow()
+    if not state:
+        return {"source": SOURCE, "last_seq": 0, "head_seq": None, "lag_events": None, "lag_seconds": None,
+                "seconds_since_sync": None}
+    lag_events = max(0, state.head_seq - state.last_seq)
+    return {
+        "source": SOURCE,
+        "last_seq": state.last_seq,
+        "head_seq": state.head_seq,
+        "lag_events": lag_events,
+        "lag_seconds": round((now - state.behind_since).total_seconds(), 3) if lag_events and state.behind_since else 0.0,
+        # head_seq is as of the last poll; a large value here means the replicator is not running.
+        "seconds_since_sync": round((now - state.last_sync_at).total_seconds(), 3) if state.last_sync_at else None
+    }
@@ -0,0 +1,30 @@
+"""Run from leave-backend/:  python -m pytest manager_service/tests
+
+Each service is a flat set of modules (app, models, config, ...), so the two suites cannot share
+one interpreter; run employee_service and manager_service tests separately.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app import create_app  # noqa: E402
+from config import TestConfig  # noqa: E402
+from extension import db  # noqa: E402
+from migrations import bootstrap  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        bootstrap()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,17 @@
+from replication import apply_batch
+
+
+def leave(seq, id_, day):
+    return {"seq": seq, "entity": "leave", "key": id_, "op": "upsert", "created_at": "2025-01-01T00:00:00Z",
+            "data": {"id": id_, "employee_id": 1, "reason": "flu", "leave_type": "sick", "status": "Pending",
+                     "remarks": "", "start_date": day, "end_date": day}}
+
+
+def test_date_filters_accept_the_same_formats_as_the_primary(client):
+    apply_batch([{"seq": 1, "entity": "user", "key": 1, "op": "upsert", "created_at": "2025-01-01T00:00:00Z",
+                  "data": {"id": 1, "username": "alice", "role": "employee", "approved": True}},
+                 leave(2, 10, "2025-01-06"), leave(3, 11, "2025-02-03")], head_seq=3)
+    for start, end in (("2025-01-01", "2025-01-31"), ("01-01-2025", "31-01-2025")):
+        resp = client.get(f"/all_leaves?from={start}&to={end}")
+        assert resp.status_code == 200 and [l["id"] for l in resp.get_json()] == [10]
+    assert client.get("/all_leaves?from=2025/01/01").status_code == 400
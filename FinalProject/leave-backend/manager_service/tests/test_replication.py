@@ -0,0 +1,102 @@
+import pytest
+import replication
+from extension import db
+from models import User, LeaveRequest, ReplicationState
+from replication import SOURCE, apply_batch, sync_once
+
+
+def event(seq, entity, key, data=None):
+    return {"seq": seq, "entity": entity, "key": key, "op": "upsert" if data else "delete", "data": data,
+            "created_at": "2025-01-01T00:00:00Z"}
+
+
+def user(seq, id_, username):
+    return event(seq, "user", id_, {"id": id_, "username": username, "role": "employee", "approved": True})
+
+
+def leave(seq, id_, status):
+    return event(seq, "leave", id_, {"id": id_, "employee_id": 1, "reason": "flu", "leave_type": "sick",
+                                     "start_date": "2025-01-06", "end_date": "2025-01-06", "status": status,
+                                     "remarks": ""})
+
+
+FEED = [user(1, 1, "alice"), leave(2, 10, "Pending"), leave(3, 11, "Pending"), leave(4, 10, "Approved"),
+        event(5, "leave", 11)]
+
+
+def statuses():
+    return dict(db.session.query(LeaveRequest.id, LeaveRequest.status).all())
+
+
+def last_seq():
+    return db.session.query(ReplicationState.last_seq).filter_by(source=SOURCE).scalar()
+
+
+def test_newest_snapshot_per_row_wins_and_deletes_apply(app):
+    assert apply_batch(FEED, head_seq=5) == 5
+    assert statuses() == {10: "Approved"}
+    assert User.query.one().password == ""
+    assert last_seq() == 5
+
+
+def test_replayed_and_older_events_are_ignored(app):
+    apply_batch(FEED, head_seq=5)
+    # A retried page, and a stale snapshot from before the approval, change nothing.
+    assert apply_batch(FEED, head_seq=5) == 0
+    assert apply_batch([leave(2, 10, "Pending")], head_seq=5) == 0
+    assert statuses() == {10: "Approved"}
+
+
+def test_sync_resumes_from_the_committed_cursor(app, monkeypatch):
+    requested = []
+
+    def fetch(after):
+        requested.append(after)
+        page = [e for e in FEED if e["seq"] > after][:2]
+        return {"events": page, "head_seq": FEED[-1]["seq"]}
+    monkeypatch.setattr(replication, "BATCH_SIZE", 2)
+    monkeypatch.setattr(replication, "fetch_events", fetch)
+
+    assert sync_once(max_batches=1) == 2
+    assert last_seq() == 2 and statuses() == {10: "Pending"}
+
+    # A restart (or a failed poll) continues after seq 2 rather than from the start.
+    db.session.remove()
+    assert sync_once() == 3
+    assert requested == [0, 2, 4]
+    assert statuses() == {10: "Approved"}
+    assert replication.replication_status()["lag_events"] == 0
+
+
+def test_a_failed_page_leaves_the_cursor_where_it_was(app, monkeypatch):
+    apply_batch(FEED[:2], head_seq=5)
+
+    def broken(after):
+        raise replication.requests.ConnectionError("primary down")
+    monkeypatch.setattr(replication, "fetch_events", broken)
+    with pytest.raises(replication.requests.ConnectionError):
+        sync_once()
+    assert last_seq() == 2
+
+
+def test_a_compacted_feed_makes_the_replica_reload_from_seq_0(app, monkeypatch):
+    apply_batch(FEED[:3], head_seq=3)
+    # The primary compacted through seq 5: leave 11's deletion is gone, only snapshots remain.
+    compacted = [user(1, 1, "alice"), leave(4, 10, "Approved"), leave(6, 12, "Pending")]
+
+    def fetch(after):
+        if 0 < after < 5:
+            return {"events": [], "head_seq": 6, "reset": True}
+        return {"events": [e for e in compacted if e["seq"] > after], "head_seq": 6, "reset": False}
+    monkeypatch.setattr(replication, "fetch_events", fetch)
+
+    assert sync_once() == 3
+    assert statuses() == {10: "Approved", 12: "Pending"}
+    assert last_seq() == 6
+
+
+def test_login_is_forwarded_without_syncing(client, monkeypatch):
+    import app as manager_app
+    monkeypatch.setattr(manager_app, "forward_to_primary", lambda method, path, payload=None: ({"id": 1}, 200))
+    monkeypatch.setattr(manager_app, "sync_once", lambda **kwargs: pytest.fail("login must not sync"))
+    assert client.post("/login", json={"username": "a", "password": "b"}).status_code == 200
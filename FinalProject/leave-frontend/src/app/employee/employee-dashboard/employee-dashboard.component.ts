@@ -55,7 +55,20 @@ export class EmployeeDashboardComponent implements OnInit {
 
   ngOnInit(): void {
     this.username = localStorage.getItem('username') || 'Employee';
-    this.loadLeaves();
+    this.loadDashboard();
+  }
+
+  // -------------------- LOAD LEAVES + BALANCE (one request) --------------------
+  loadDashboard() {
+    this.leaveService.getEmployeeDashboard().subscribe({
+      next: (res) => {
+        if (res.my_leaves) this.leaves = res.my_leaves;
+        if (res.leave_balance) this.showBalance(res.leave_balance);
+        if (res.errors['my_leaves']) this.showToast('Failed to fetch leaves');
+        else if (res.errors['leave_balance']) this.showToast('Failed to fetch leave balance');
+      },
+      error: () => this.showToast('Failed to fetch leaves')
+    });
   }
 
   // -------------------- LOAD LEAVES --------------------
@@ -69,20 +82,22 @@ export class EmployeeDashboardComponent implements OnInit {
   // -------------------- LOAD BALANCE --------------------
   loadBalance() {
     this.leaveService.getLeaveBalance().subscribe({
-      next: (res) => {
-        this.balance = res;
-        this.pieChartData = {
-          labels: this.pieChartLabels,
-          datasets: [{
-            data: [res.sick_casual, res.medical, res.privileged],
-            backgroundColor: ['#28a745', '#17a2b8', '#007bff']
-          }]
-        };
-      },
+      next: (res) => this.showBalance(res),
       error: () => this.showToast('Failed to fetch leave balance')
     });
   }
 
+  private showBalance(res: { sick_casual: number; medical: number; privileged: number }) {
+    this.balance = res;
+    this.pieChartData = {
+      labels: this.pieChartLabels,
+      datasets: [{
+        data: [res.sick_casual, res.medical, res.privileged],
+        backgroundColor: ['#28a745', '#17a2b8', '#007bff']
+      }]
+    };
+  }
+
   // -------------------- SWITCH VIEW --------------------
   setView(view: 'dashboard' | 'apply' | 'myLeaves' | 'approvals' | 'balances') {
     this.currentView = view;
@@ -108,8 +123,7 @@ export class EmployeeDashboardComponent implements OnInit {
       next: () => {
         this.showToast('✅ Leave applied successfully');
         this.newLeave = { start_date: '', end_date: '', leave_type: undefined, reason: '' };
-        this.loadLeaves();
-        this.loadBalance();
+        this.loadDashboard();
         setTimeout(() => this.setView('myLeaves'), 2000);
       },
       error: (err) => {
@@ -124,8 +138,7 @@ export class EmployeeDashboardComponent implements OnInit {
     this.leaveService.deleteLeave(id).subscribe({
       next: () => {
         this.showToast(`🗑️ Leave #${id} cancelled`);
-        this.loadLeaves();
-        this.loadBalance();
+        this.loadDashboard();
       },
       error: () => this.showToast('Failed to delete leave')
     });
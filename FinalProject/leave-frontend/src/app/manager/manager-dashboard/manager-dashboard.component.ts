@@ -1,6 +1,7 @@
-import { Component, OnInit } from '@angular/core';
-import { LeaveService } from '../../services/leave.service';
+import { Component, OnDestroy, OnInit } from '@angular/core';
+import { EmployeeBalance, LeaveService } from '../../services/leave.service';
 import { Router } from '@angular/router';
+import { Subscription } from 'rxjs';
 import { ChartData, ChartOptions } from 'chart.js';
 
 @Component({
@@ -8,7 +9,7 @@ import { ChartData, ChartOptions } from 'chart.js';
   templateUrl: './manager-dashboard.component.html',
   styleUrls: ['./manager-dashboard.component.css']
 })
-export class ManagerDashboardComponent implements OnInit {
+export class ManagerDashboardComponent implements OnInit, OnDestroy {
 
   pieChartData: ChartData<'pie', number[], string | string[]> = {
     labels: ['Sick/Casual', 'Medical', 'Privileged'],
@@ -41,13 +42,45 @@ export class ManagerDashboardComponent implements OnInit {
 
   newEmployee = { username: '', password: '' };
 
+  private subscriptions = new Subscription();
+
   constructor(private leaveService: LeaveService, private router: Router) {}
 
   ngOnInit(): void {
     this.username = localStorage.getItem('username') || 'Manager';
-    this.loadAllLeaves();
-    this.loadPendingEmployees();
-    this.loadEmployeeBalances();
+    // Lists come from the service's local store, which the change feed keeps current,
+    // so actions below never re-download whole lists.
+    this.subscriptions.add(this.leaveService.leaves$.subscribe(leaves => {
+      this.allLeaves = leaves;
+      this.pendingLeaves = leaves.filter(l => l.status === 'Pending');
+      this.leaves = this.currentView === 'approvals' ? this.pendingLeaves : leaves;
+    }));
+    this.subscriptions.add(this.leaveService.pendingEmployees$.subscribe(res => this.pendingEmployees = res));
+    this.subscriptions.add(this.leaveService.employeeBalances$.subscribe(res => this.showBalances(res)));
+    this.loading = true;
+    this.leaveService.startChangeFeed().subscribe({
+      next: () => this.loading = false,
+      error: () => {
+        this.error = 'Failed to load leaves';
+        this.loading = false;
+      }
+    });
+  }
+
+  ngOnDestroy(): void {
+    this.subscriptions.unsubscribe();
+    this.leaveService.stopChangeFeed();
+  }
+
+  // Pulls the latest delta right away instead of waiting for the stream to deliver it.
+  refresh(): void {
+    this.leaveService.syncChanges().subscribe({
+      next: () => this.loading = false,
+      error: () => {
+        this.error = 'Failed to load leaves';
+        this.loading = false;
+      }
+    });
   }
 
 
@@ -61,7 +94,7 @@ export class ManagerDashboardComponent implements OnInit {
         this.showToast('Employee created successfully. Waiting for approval.');
         this.newEmployee = { username: '', password: '' };
         //this.setView('employees');      
-        this.loadPendingEmployees();    
+        this.refresh();
       },
       error: () => this.error = 'Failed to create employee'
     });
@@ -80,29 +113,8 @@ export class ManagerDashboardComponent implements OnInit {
       case 'all-leaves':
         this.leaves = this.allLeaves;
         break;
-      case 'balances':
-        this.loadEmployeeBalances();
-        break;
-      case 'employees':
-        this.loadPendingEmployees();
-        break;
     }
   }
-  loadAllLeaves(): void {
-    this.loading = true;
-    this.leaveService.getAllLeaves().subscribe({
-      next: (res: any[]) => {
-        this.allLeaves = res;
-        this.leaves = res;
-        this.pendingLeaves = res.filter(l => l.status === 'Pending');
-        this.loading = false;
-      },
-      error: () => {
-        this.error = 'Failed to load leaves';
-        this.loading = false;
-      }
-    });
-  }
 
   approve(leave: any): void {
     this.updateLeaveStatus(leave.id, 'Approved', leave.remarks || 'Approved by manager');
@@ -116,11 +128,8 @@ export class ManagerDashboardComponent implements OnInit {
     this.loading = true;
     this.leaveService.updateLeaveStatus(leaveId, status, remarks).subscribe({
       next: () => {
-        setTimeout(() => {
-          this.showToast(`Leave ${status.toLowerCase()} successfully`);
-          this.loadAllLeaves();
-          this.loading = false;
-        }, 2000);
+        this.showToast(`Leave ${status.toLowerCase()} successfully`);
+        this.refresh();
       },
       error: () => {
         this.error = 'Failed to update leave';
@@ -131,41 +140,68 @@ export class ManagerDashboardComponent implements OnInit {
 
 
 
-  loadEmployeeBalances(): void {
+  // -------- Multi-select approvals --------
+  selectedLeaveIds = new Set<number>();
+
+  toggleSelected(leaveId: number): void {
+    if (this.selectedLeaveIds.has(leaveId)) this.selectedLeaveIds.delete(leaveId);
+    else this.selectedLeaveIds.add(leaveId);
+  }
+
+  allPendingSelected(): boolean {
+    return this.leaves.length > 0 && this.leaves.every(l => this.selectedLeaveIds.has(l.id));
+  }
+
+  toggleSelectAll(): void {
+    if (this.allPendingSelected()) this.selectedLeaveIds.clear();
+    else this.leaves.forEach(l => this.selectedLeaveIds.add(l.id));
+  }
+
+  updateSelected(status: 'Approved' | 'Rejected'): void {
+    const items = this.leaves
+      .filter(l => this.selectedLeaveIds.has(l.id))
+      .map(l => ({
+        leave_id: l.id,
+        status,
+        remarks: l.remarks || `${status} by manager`
+      }));
+    if (items.length === 0) return;
+
     this.loading = true;
-    this.leaveService.getEmployeeBalances().subscribe({
+    this.leaveService.updateLeaveStatuses(items).subscribe({
       next: (res) => {
-        this.employeeBalances = res;
-        if (res.length > 0) {
-          const first = res[0];
-          this.pieChartData.datasets[0].data = [
-            first.sick_casual || 10,
-            first.medical || 10,
-            first.privileged || 10
-          ];
+        this.selectedLeaveIds.clear();
+        const failed = res.results.filter(r => !r.ok);
+        this.showToast(`${res.updated} leave(s) ${status.toLowerCase()}`);
+        if (failed.length > 0) {
+          this.error = failed.map(r => `#${r.leave_id}: ${r.error}`).join('; ');
         }
-        this.loading = false;
+        this.refresh();
       },
       error: () => {
-        this.error = 'Failed to load balances';
+        this.error = 'Failed to update selected leaves';
         this.loading = false;
       }
     });
   }
 
-
-  loadPendingEmployees(): void {
-    this.leaveService.getPendingEmployees().subscribe({
-      next: (res) => this.pendingEmployees = res,
-      error: () => this.error = 'Failed to load pending employees'
-    });
+  private showBalances(res: EmployeeBalance[]): void {
+    this.employeeBalances = res;
+    if (res.length > 0) {
+      const first = res[0];
+      this.pieChartData.datasets[0].data = [
+        first.sick_casual || 10,
+        first.medical || 10,
+        first.privileged || 10
+      ];
+    }
   }
 
   approveEmployee(userId: number): void {
     this.leaveService.approveEmployee(userId).subscribe({
       next: () => {
         this.showToast('Employee approved successfully');
-        this.loadPendingEmployees();
+        this.refresh();
       },
       error: () => this.error = 'Failed to approve employee'
     });
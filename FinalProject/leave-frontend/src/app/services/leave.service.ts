@@ -1,6 +1,7 @@
 import { Injectable } from '@angular/core';
-import { HttpClient, HttpHeaders } from '@angular/common/http';
-import { Observable, throwError } from 'rxjs';
+import { HttpClient, HttpErrorResponse, HttpHeaders, HttpResponse } from '@angular/common/http';
+import { BehaviorSubject, Observable, of, throwError } from 'rxjs';
+import { catchError, finalize, map, tap } from 'rxjs/operators';
 import { AuthService } from './auth.service';
 import { environment } from 'src/environments/environment';
 
@@ -16,12 +17,166 @@ export interface LeaveRequest {
   leave_type?: 'sick' | 'medical' | 'privileged';
 }
 
+export interface BulkUpdateResult {
+  updated: number;
+  failed: number;
+  results: { leave_id: number; ok: boolean; status?: string; error?: string }[];
+}
+
+export interface UserSummary {
+  id: number;
+  username: string;
+  role: 'manager' | 'employee';
+  approved: boolean;
+}
+
+export interface EmployeeBalance {
+  employee_id: number;
+  username: string;
+  sick_casual: number;
+  medical: number;
+  privileged: number;
+}
+
+// Composite responses from the gateway: a section that failed is null and listed in errors.
+export interface DashboardErrors {
+  errors: { [section: string]: { status: number; error: string } };
+}
+
+export interface EmployeeDashboard extends DashboardErrors {
+  my_leaves: LeaveRequest[] | null;
+  leave_balance: { sick_casual: number; medical: number; privileged: number } | null;
+}
+
+export interface ManagerDashboard extends DashboardErrors {
+  all_leaves: LeaveRequest[] | null;
+  pending_employees: { id: number; username: string }[] | null;
+  employee_balances: { username: string; sick_casual: number; medical: number; privileged: number }[] | null;
+  leave_statistics: any | null;
+}
+
+// One delta from GET /changes or the /changes/stream event stream.
+export interface ChangeSet {
+  version: number;
+  reset: boolean;
+  leaves: LeaveRequest[];
+  deleted_leaves: number[];
+  users: UserSummary[];
+  balances: EmployeeBalance[];
+}
+
+// Matches the backend's Retry-After for a refused /changes/stream.
+const STREAM_RETRY_MS = 30000;
+
 @Injectable({ providedIn: 'root' })
 export class LeaveService {
   private apiUrl = environment.apiBase; // use relative base (/api)
 
+  // Last body + ETag per URL; the backend answers 304 while nothing has changed.
+  private etagCache = new Map<string, { etag: string; body: unknown }>();
+
+  // Local copy of leaves, users and balances, patched with deltas from the change feed.
+  private version = 0;
+  private leaveStore = new Map<number, LeaveRequest>();
+  private userStore = new Map<number, UserSummary>();
+  private balanceStore = new Map<number, EmployeeBalance>();
+  private changeStream?: EventSource;
+  private changeRetry?: ReturnType<typeof setTimeout>;
+
+  readonly leaves$ = new BehaviorSubject<LeaveRequest[]>([]);
+  readonly pendingEmployees$ = new BehaviorSubject<UserSummary[]>([]);
+  readonly employeeBalances$ = new BehaviorSubject<EmployeeBalance[]>([]);
+
   constructor(private http: HttpClient, private auth: AuthService) {}
 
+  private getWithEtag<T>(url: string): Observable<T> {
+    const cached = this.etagCache.get(url);
+    const headers = cached ? new HttpHeaders({ 'If-None-Match': cached.etag }) : undefined;
+    return this.http.get<T>(url, { headers, observe: 'response' }).pipe(
+      map((res: HttpResponse<T>) => {
+        const etag = res.headers.get('ETag');
+        if (etag) this.etagCache.set(url, { etag, body: res.body });
+        return res.body as T;
+      }),
+      catchError((err: HttpErrorResponse) =>
+        err.status === 304 && cached ? of(cached.body as T) : throwError(() => err)
+      )
+    );
+  }
+
+  // --------- Change feed ----------
+  // Fetches what changed since the last applied version (everything on the first call).
+  syncChanges(): Observable<ChangeSet> {
+    return this.http
+      .get<ChangeSet>(`${this.apiUrl}/changes`, { params: { since: this.version } })
+      .pipe(tap(changes => this.applyChanges(changes)));
+  }
+
+  // Brings the store up to date, then keeps it current from the server-sent event stream.
+  startChangeFeed(): Observable<ChangeSet> {
+    return this.syncChanges().pipe(finalize(() => this.openChangeStream()));
+  }
+
+  private openChangeStream(): void {
+    if (this.changeStream) return;
+    // EventSource reconnects on its own and resumes from the last event id it saw.
+    this.changeStream = new EventSource(`${this.apiUrl}/changes/stream?since=${this.version}`);
+    this.changeStream.addEventListener('changes', (e: MessageEvent) =>
+      this.applyChanges(JSON.parse(e.data) as ChangeSet)
+    );
+    // A refused stream (503 when the server is at its stream cap) is not retried by EventSource;
+    // catch up over /changes a little later and try the stream again.
+    this.changeStream.onerror = () => {
+      if (this.changeStream?.readyState !== EventSource.CLOSED) return;
+      this.changeStream = undefined;
+      this.changeRetry = setTimeout(() => this.startChangeFeed().subscribe(), STREAM_RETRY_MS);
+    };
+  }
+
+  stopChangeFeed(): void {
+    clearTimeout(this.changeRetry);
+    this.changeRetry = undefined;
+    this.changeStream?.close();
+    this.changeStream = undefined;
+  }
+
+  private applyChanges(changes: ChangeSet): void {
+    // An HTTP sync and the stream can overlap; a delta older than what we hold adds nothing.
+    if (!changes.reset && changes.version <= this.version) return;
+    if (changes.reset) {
+      this.leaveStore.clear();
+      this.userStore.clear();
+      this.balanceStore.clear();
+    }
+    changes.leaves.forEach(l => this.leaveStore.set(l.id, l));
+    changes.deleted_leaves.forEach(id => this.leaveStore.delete(id));
+    changes.users.forEach(u => this.userStore.set(u.id, u));
+    changes.balances.forEach(b => this.balanceStore.set(b.employee_id, b));
+    this.version = changes.version;
+
+    this.leaves$.next([...this.leaveStore.values()].sort((a, b) => a.id - b.id));
+    this.pendingEmployees$.next(
+      [...this.userStore.values()].filter(u => u.role === 'employee' && !u.approved)
+    );
+    this.employeeBalances$.next(
+      [...this.balanceStore.values()].sort((a, b) => a.employee_id - b.employee_id)
+    );
+  }
+
+  // --------- Dashboards (one gateway round-trip each) ----------
+  getEmployeeDashboard(): Observable<EmployeeDashboard> {
+    const employeeId = this.auth.getEmployeeId();
+    if (!employeeId) return throwError(() => new Error('Employee ID not found.'));
+    return this.http.get<EmployeeDashboard>(`${this.apiUrl}/dashboard/employee`, {
+      params: { employee_id: employeeId }
+    });
+  }
+
+  getManagerDashboard(sections?: string[]): Observable<ManagerDashboard> {
+    const params = sections ? { sections: sections.join(',') } : undefined;
+    return this.http.get<ManagerDashboard>(`${this.apiUrl}/dashboard/manager`, { params });
+  }
+
   // --------- Manager helper ----------
   createEmployee(username: string, password: string) {
     return this.http.post(`${this.apiUrl}/create_employee`, { username, password });
@@ -31,7 +186,7 @@ export class LeaveService {
   myLeaves(): Observable<LeaveRequest[]> {
     const employeeId = this.auth.getEmployeeId();
     if (!employeeId) return throwError(() => new Error('Employee ID not found.'));
-    return this.http.get<LeaveRequest[]>(`${this.apiUrl}/my_leaves/${employeeId}`);
+    return this.getWithEtag<LeaveRequest[]>(`${this.apiUrl}/my_leaves/${employeeId}`);
   }
 
   applyLeave(leaveData: {
@@ -53,14 +208,14 @@ export class LeaveService {
   getLeaveBalance(): Observable<{ sick_casual: number; medical: number; privileged: number }> {
     const employeeId = this.auth.getEmployeeId();
     if (!employeeId) return throwError(() => new Error('Employee ID not found.'));
-    return this.http.get<{ sick_casual: number; medical: number; privileged: number }>(
+    return this.getWithEtag<{ sick_casual: number; medical: number; privileged: number }>(
       `${this.apiUrl}/leave_balance/${employeeId}`
     );
   }
 
   // --------- Manager APIs ----------
   getAllLeaves(): Observable<any[]> {
-    return this.http.get<any[]>(`${this.apiUrl}/all_leaves`);
+    return this.getWithEtag<any[]>(`${this.apiUrl}/all_leaves`);
   }
 
   updateLeaveStatus(
@@ -72,12 +227,21 @@ export class LeaveService {
     return this.http.put(`${this.apiUrl}/update_leave/${leaveId}`, { status, remarks }, { headers });
   }
 
+  updateLeaveStatuses(
+    items: { leave_id: number; status: 'Approved' | 'Rejected'; remarks: string }[]
+  ): Observable<BulkUpdateResult> {
+    const headers = new HttpHeaders({ 'Content-Type': 'application/json' });
+    return this.http.put<BulkUpdateResult>(
+      `${this.apiUrl}/update_leaves`, items, { headers }
+    );
+  }
+
   getEmployeeBalances(): Observable<any[]> {
-    return this.http.get<any[]>(`${this.apiUrl}/employee_balances`);
+    return this.getWithEtag<any[]>(`${this.apiUrl}/employee_balances`);
   }
 
   getPendingEmployees(): Observable<any[]> {
-    return this.http.get<any[]>(`${this.apiUrl}/pending_employees`);
+    return this.getWithEtag<any[]>(`${this.apiUrl}/pending_employees`);
   }
 
   approveEmployee(userId: number): Observable<any> {